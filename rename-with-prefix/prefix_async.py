@@ -0,0 +1,189 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable
+
+import prefix_renamer
+from prefix_fsops import DirHandleCache, atomic_noreplace
+from prefix_renamer import PlannedRename, RenameResult, Rules, apply_one
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_CONCURRENCY = 4
+
+
+def _next_batch(it, batch_size: int, cancel: threading.Event) -> list:
+    batch = []
+    for x in it:
+        batch.append(x)
+        if len(batch) >= batch_size or cancel.is_set():
+            break
+    return batch
+
+
+class _Targets:
+    """
+    Cibles par dossier, partagées par les lots qui tournent en parallèle : un verrou et
+    l'ensemble des noms déjà promis par dossier. Une simulation ne renomme rien, le disque
+    ne dit donc pas ce que les autres lots ont retenu : sans ces noms, deux lots en mode
+    number annonceraient le même "AI_x (1).txt" pour deux fichiers différents.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirs: dict[str, tuple[threading.Lock, set[str]]] = {}
+
+    def get(self, folder: str) -> tuple[threading.Lock, set[str]]:
+        with self._lock:
+            entry = self._dirs.get(folder)
+            if entry is None:
+                entry = self._dirs[folder] = (threading.Lock(), set())
+            return entry
+
+
+def _pull(it, lock: threading.Lock, batch_size: int, cancel: threading.Event) -> list:
+    # Un seul tirage à la fois : un générateur ne supporte pas deux next() concurrents
+    with lock:
+        return _next_batch(it, batch_size, cancel)
+
+
+async def plan(
+    root: str | Path,
+    rules: Rules,
+    recursive: bool = False,
+    *,
+    executor: Executor | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_progress: Callable[[int], None] | None = None,
+) -> AsyncIterator[PlannedRename]:
+    """
+    Itère (async for) sur les renommages prévus sous root (dossier ou fichier), comme
+    prefix_renamer.plan. on_progress(n) : nombre d'éléments planifiés, après chaque lot.
+    """
+    loop = asyncio.get_running_loop()
+    cancel = threading.Event()
+    gen = prefix_renamer.plan(Path(root), rules, recursive)
+    gen_lock = threading.Lock()
+    fut = None
+    done = 0
+    try:
+        while True:
+            fut = loop.run_in_executor(executor, _pull, gen, gen_lock, batch_size, cancel)
+            batch = await fut
+            if not batch:
+                return
+            for item in batch:
+                yield item
+            done += len(batch)
+            if on_progress is not None:
+                on_progress(done)
+    finally:
+        # Annulation : le lot en cours dans l'exécuteur s'arrête au prochain élément ; le
+        # générateur n'est fermé qu'une fois ce tirage terminé (jamais depuis deux threads)
+        cancel.set()
+        if fut is not None and not fut.done():
+            fut.add_done_callback(lambda _: gen.close())
+        else:
+            gen.close()
+
+
+def _apply_batch(
+    batch: list[PlannedRename],
+    dry_run: bool,
+    collision: str,
+    cancel: threading.Event,
+    targets: _Targets,
+) -> list[RenameResult]:
+    results = []
+    # Renommage réel avec RENAME_NOREPLACE : le système arbitre, pas besoin de verrou.
+    # Sinon (simulation, ou exists + rename non atomique) : un lot à la fois par dossier.
+    serialize = dry_run or not atomic_noreplace()
+    # Un cache de dossiers par lot : les lots tournent en parallèle, le cache n'est pas partagé
+    with DirHandleCache(16) as dirs:
+        for item in batch:
+            if cancel.is_set():
+                break
+            # Éléments retenus (no_match, stale...) : apply_one rend leur résultat sans renommer
+            if serialize and item.reason == "match":
+                lock, reserved = targets.get(str(item.path.parent))
+                with lock:
+                    r = apply_one(item, dry_run, collision, dirs=dirs, reserved=reserved if dry_run else None)
+            else:
+                r = apply_one(item, dry_run, collision, dirs=dirs)
+            results.append(r)
+    return results
+
+
+async def _aiter(items: AsyncIterable | Iterable):
+    if hasattr(items, "__aiter__"):
+        async for x in items:
+            yield x
+    else:
+        for x in items:
+            yield x
+
+
+async def apply(
+    items: AsyncIterable[PlannedRename] | Iterable[PlannedRename],
+    *,
+    dry_run: bool = False,
+    collision: str = "skip",
+    executor: Executor | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_progress: Callable[[int], None] | None = None,
+    on_result: Callable[[RenameResult], None] | None = None,
+) -> dict[str, int]:
+    """
+    Applique des renommages (itérable ou itérable async, ex: plan(...)).
+    Au plus `concurrency` lots tournent en même temps dans l'exécuteur (créé et fermé ici si None).
+    Retourne les compteurs par statut ; on_result(r) reçoit chaque résultat, on_progress(n) le cumul.
+    """
+    loop = asyncio.get_running_loop()
+    cancel = threading.Event()
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="prefix-apply")
+
+    targets = _Targets()
+    counts = {"DRY_RUN": 0, "RENAMED": 0, "SKIP": 0, "ERROR": 0}
+    done = 0
+    pending: set[asyncio.Future] = set()
+
+    def collect(fut: asyncio.Future):
+        nonlocal done
+        for r in fut.result():
+            counts[r.status] = counts.get(r.status, 0) + 1
+            if on_result is not None:
+                on_result(r)
+            done += 1
+        if on_progress is not None:
+            on_progress(done)
+
+    async def drain(limit: int):
+        nonlocal pending
+        while len(pending) > limit:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in finished:
+                collect(fut)
+
+    try:
+        batch: list[PlannedRename] = []
+        async for item in _aiter(items):
+            batch.append(item)
+            if len(batch) >= batch_size:
+                await drain(concurrency - 1)
+                pending.add(loop.run_in_executor(executor, _apply_batch, batch, dry_run, collision, cancel, targets))
+                batch = []
+        if batch:
+            await drain(concurrency - 1)
+            pending.add(loop.run_in_executor(executor, _apply_batch, batch, dry_run, collision, cancel, targets))
+        await drain(0)
+    except BaseException:
+        # Annulation (CancelledError) ou erreur : les lots en cours s'arrêtent au prochain fichier
+        cancel.set()
+        raise
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+    return counts
@@ -0,0 +1,301 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+import prefix_slowfs
+from prefix_fsops import DirHandleCache
+from prefix_perf import PhaseStats
+from prefix_renamer import (
+    Visited,
+    apply,
+    build_regex,
+    compile_rules,
+    plan,
+    rename_item,
+    scan_folder,
+    write_csv_log,
+)
+
+SHAPES = ("wide", "deep", "collisions")
+# Phases relevées par le PhaseStats des points d'entrée eux-mêmes
+PHASES = ("walk", "match", "collision", "rename", "log")
+
+
+# -------------------------
+# Générateur d'arborescences
+# -------------------------
+
+def _file_name(rng: random.Random, i: int, match_ratio: float) -> str:
+    if rng.random() < match_ratio:
+        return f"doc_{i:07d}_RAG.txt"
+    return f"doc_{i:07d}.txt"
+
+
+def generate_tree(
+    root: Path,
+    shape: str,
+    n_files: int,
+    seed: int = 42,
+    match_ratio: float = 0.3,
+    prefix: str = "AI_",
+) -> int:
+    """
+    Génère une arborescence reproductible (même seed -> mêmes noms) sous root.
+    Retourne le nombre de fichiers créés (collisions incluses).
+
+    shape:
+      - wide       : un seul niveau, 10 000 fichiers par dossier
+      - deep       : chaînes de 32 dossiers imbriqués, 50 fichiers par dossier
+      - collisions : comme wide, mais chaque fichier ciblé a déjà sa cible préfixée
+                     et 1 à 3 variantes " (n)" (sondage intensif en mode number)
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Forme inconnue: {shape}")
+
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    created = 0
+
+    def touch(p: Path):
+        nonlocal created
+        with open(p, "wb"):
+            pass
+        created += 1
+
+    if shape == "deep":
+        per_dir, depth = 50, 32
+        folder = root
+        for i in range(n_files):
+            if i % per_dir == 0:
+                # Nouvelle chaîne à la racine tous les `depth` niveaux
+                parent = root if (i // per_dir) % depth == 0 else folder
+                folder = parent / f"d{(i // per_dir):06d}"
+                folder.mkdir()
+            touch(folder / _file_name(rng, i, match_ratio))
+        return created
+
+    per_dir = 10_000
+    folder = root
+    for i in range(n_files):
+        if i % per_dir == 0:
+            folder = root / f"w{(i // per_dir):05d}"
+            folder.mkdir()
+        name = _file_name(rng, i, match_ratio)
+        touch(folder / name)
+        if shape == "collisions" and "RAG" in name:
+            touch(folder / (prefix + name))
+            base, ext = os.path.splitext(prefix + name)
+            for n in range(1, rng.randint(1, 3) + 1):
+                touch(folder / f"{base} ({n}){ext}")
+    return created
+
+
+# -------------------------
+# Mesures
+# -------------------------
+
+class Timer:
+    """Chronomètre de phase : with Timer() as t: ... ; t.seconds"""
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._t0
+        return False
+
+
+def _phases(stats: PhaseStats) -> dict[str, tuple[float, int]]:
+    return {p: (stats.seconds.get(p, 0.0), stats.ops.get(p, 0)) for p in PHASES}
+
+
+def bench_cli_core(root: Path, prefix: str, collision: str, log_path: Path) -> dict[str, tuple[float, int]]:
+    """
+    Chemin du CLI (rename-with-prefix.py) : plan() -> apply() de prefix_renamer, puis le log CSV.
+    Parcours, correspondance et renommage s'entremêlent (itérateurs paresseux) : chaque phase
+    est chronométrée par le PhaseStats passé à plan/apply, comme dans le résumé du CLI.
+    Hors dry-run, le sondage de collision se fait dans le renommage (RENAME_NOREPLACE).
+    """
+    stats = PhaseStats()
+    rules = compile_rules("RAG", prefix)
+    rows = []
+    for r in apply(plan(root, rules, recursive=True, stats=stats), collision=collision, stats=stats):
+        rows.append({
+            "timestamp": "",
+            "status": r.status,
+            "old_path": str(r.path),
+            "new_path": str(r.path.with_name(r.new_name)),
+            "reason": r.reason,
+            "error": r.message if r.status == "ERROR" else "",
+        })
+    with stats.phase("log", len(rows)):
+        write_csv_log(log_path, rows)
+    return _phases(stats)
+
+
+def bench_gui_core(root: Path, prefix: str, collision: str, log_path: Path) -> dict[str, tuple[float, int]]:
+    """
+    Chemin de la GUI (test3.py), hors Tk : scan_folder() comme le processus de scan
+    (prefix_scanproc, aperçu avec sondage de collision), puis rename_item() sur les éléments
+    retenus et le log CSV, comme le thread de renommage.
+    """
+    stats = PhaseStats()
+    rx = build_regex("RAG", False, False)
+    items = scan_folder(str(root), rx, prefix, True, True, collision, stats, visited=Visited())
+    rows = []
+    with DirHandleCache() as dirs:
+        for it in items.iter_will_rename():
+            t0 = perf_counter()
+            status, new_name, error = rename_item(dirs, it, collision, prefix)
+            stats.add("rename", perf_counter() - t0)
+            rows.append({
+                "timestamp": "",
+                "status": status,
+                "old_path": it.old_path,
+                "new_path": os.path.join(os.path.dirname(it.old_path), new_name),
+                "reason": it.reason,
+                "error": error,
+            })
+    with stats.phase("log", len(rows)):
+        write_csv_log(log_path, rows)
+    return _phases(stats)
+
+
+def run_case(core_name: str, bench, shape: str, n_files: int, args, workdir: Path) -> list[dict]:
+    """Génère un arbre neuf, lance le cœur demandé, retourne un enregistrement par phase."""
+    tree = workdir / f"{core_name}_{shape}_{n_files}"
+    if tree.exists():
+        shutil.rmtree(tree)
+
+    with Timer() as t:
+        created = generate_tree(tree, shape, n_files, seed=args.seed, match_ratio=args.match_ratio, prefix=args.prefix)
+    gen_seconds = t.seconds
+
+    log_path = workdir / f"{core_name}_{shape}_{n_files}.csv"
+    slow = prefix_slowfs.config_from_args(args)
+    if slow is None:
+        phases = bench(tree, args.prefix, args.collision, log_path)
+        slow_calls = None
+    else:
+        # Seul le cœur mesuré est ralenti, pas la génération de l'arbre
+        with prefix_slowfs.SlowFS(slow) as fs:
+            phases = bench(tree, args.prefix, args.collision, log_path)
+        slow_calls = {"calls": fs.calls, "errors": fs.injected_errors, "injected_seconds": round(fs.slept, 6)}
+
+    shutil.rmtree(tree, ignore_errors=True)
+    log_path.unlink(missing_ok=True)
+
+    base = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "core": core_name,
+        "shape": shape,
+        "files": n_files,
+        "files_on_disk": created,
+        "seed": args.seed,
+        "collision": args.collision,
+        "generate_seconds": round(gen_seconds, 6),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    if slow is not None:
+        base["slowfs"] = {**slow.as_dict(), **slow_calls}
+    records = []
+    for phase in PHASES:
+        seconds, ops = phases[phase]
+        records.append({
+            **base,
+            "phase": phase,
+            "seconds": round(seconds, 6),
+            "ops": ops,
+            "ops_per_sec": round(ops / seconds, 1) if seconds > 0 else None,
+        })
+    return records
+
+
+def parse_sizes(s: str) -> list[int]:
+    """'10k,100k,5M' -> [10000, 100000, 5000000]"""
+    out = []
+    for part in s.split(","):
+        part = part.strip().lower()
+        mult = 1
+        if part.endswith("k"):
+            mult, part = 1_000, part[:-1]
+        elif part.endswith("m"):
+            mult, part = 1_000_000, part[:-1]
+        out.append(int(float(part) * mult))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark du renommeur sur des arborescences synthétiques (sortie JSON Lines)."
+    )
+    parser.add_argument("--sizes", default="10k", help="Tailles (ex: 10k,100k,1M,5M ; défaut: 10k)")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help=f"Formes parmi {', '.join(SHAPES)}")
+    parser.add_argument("--cores", default="cli,gui", help="Cœurs à mesurer : cli, gui (défaut: les deux)")
+    parser.add_argument("--collision", choices=["skip", "overwrite", "number"], default="number",
+                        help="Gestion collision utilisée pendant l'apply (défaut: number)")
+    parser.add_argument("--prefix", default="AI_", help="Préfixe (défaut: AI_)")
+    parser.add_argument("--match-ratio", type=float, default=0.3, help="Part des fichiers ciblés (défaut: 0.3)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du générateur (défaut: 42)")
+    parser.add_argument("--repeat", type=int, default=1, help="Nombre de répétitions par cas")
+    parser.add_argument("--workdir", default=None, help="Dossier de travail (défaut: dossier temporaire)")
+    parser.add_argument("--out", default=None, help="Fichier JSON Lines de sortie (défaut: stdout)")
+    prefix_slowfs.add_arguments(parser.add_argument_group("NAS simulé (prefix_slowfs)"), seed=False)
+    args = parser.parse_args()
+
+    # Les deux interfaces partagent prefix_renamer ; "cli" et "gui" désignent leurs points d'entrée
+    benches = {"cli": bench_cli_core, "gui": bench_gui_core}
+    cores = {}
+    for name in (c.strip() for c in args.cores.split(",")):
+        if name not in benches:
+            parser.error(f"Cœur inconnu: {name}")
+        cores[name] = benches[name]
+
+    shapes = [s.strip() for s in args.shapes.split(",")]
+    for s in shapes:
+        if s not in SHAPES:
+            parser.error(f"Forme inconnue: {s}")
+
+    out = open(args.out, "a", encoding="utf-8") if args.out else sys.stdout
+    tmp = None
+    if args.workdir:
+        workdir = Path(args.workdir)
+        workdir.mkdir(parents=True, exist_ok=True)
+    else:
+        tmp = tempfile.mkdtemp(prefix="prefix_bench_")
+        workdir = Path(tmp)
+
+    try:
+        for n in parse_sizes(args.sizes):
+            for shape in shapes:
+                for core_name, bench in cores.items():
+                    for run in range(args.repeat):
+                        for rec in run_case(core_name, bench, shape, n, args, workdir):
+                            rec["run"] = run
+                            out.write(json.dumps(rec) + "\n")
+                            print(
+                                f"{core_name:3} {shape:10} {n:>9} {rec['phase']:9} "
+                                f"{rec['seconds']:>10.4f}s {rec['ops_per_sec'] or 0:>12.0f} ops/s",
+                                file=sys.stderr,
+                            )
+                        out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+from time import monotonic
+from typing import Iterable, Iterator
+
+
+class ScanBudget:
+    """
+    Limites d'un parcours : nombre de fichiers, durée, profondeur.
+
+    - max_files / max_seconds : limit() arrête proprement l'itération (le parcours n'est plus
+      tiré, ses dossiers ouverts sont refermés) ; stopped et last disent où et pourquoi.
+      La durée est aussi vérifiée par les parcours avant chaque dossier (expired) : un arbre
+      de dossiers vides ne produit aucun fichier, limit() ne verrait jamais passer l'échéance
+    - max_depth : niveaux de sous-dossiers sous la racine (0 = racine seule), appliqué par
+      les fonctions de parcours elles-mêmes (iter_files_in_folder, iter_files_sorted)
+
+    0 / None = illimité. Le plan obtenu est alors partiel : voir marker().
+    """
+
+    def __init__(self, max_files: int = 0, max_seconds: float = 0.0, max_depth: int | None = None):
+        self.max_files = max_files
+        self.max_seconds = max_seconds
+        self.max_depth = max_depth
+        self.count = 0
+        self.stopped: str | None = None  # "max_files" | "max_seconds"
+        self.last = None
+        self._deadline: float | None = None
+
+    @property
+    def active(self) -> bool:
+        return bool(self.max_files or self.max_seconds)
+
+    @property
+    def partial(self) -> bool:
+        return self.stopped is not None
+
+    def limit(self, items: Iterable) -> Iterator:
+        """items tant que les limites le permettent ; la durée court à partir du premier tirage."""
+        max_files = self.max_files
+        self._deadline = monotonic() + self.max_seconds if self.max_seconds else None
+        for x in items:
+            if max_files and self.count >= max_files:
+                self.stopped = "max_files"
+                return
+            if self.expired():
+                return
+            self.count += 1
+            self.last = x
+            yield x
+
+    def expired(self) -> bool:
+        """Durée dépassée (False avant le premier tirage de limit()) ; renseigne stopped."""
+        if self._deadline is not None and monotonic() >= self._deadline:
+            self.stopped = "max_seconds"
+            return True
+        return False
+
+    def describe(self) -> str:
+        parts = []
+        if self.max_files:
+            parts.append(f"{self.max_files} fichier(s)")
+        if self.max_seconds:
+            parts.append(f"{self.max_seconds:g} s")
+        if self.max_depth is not None:
+            parts.append(f"profondeur {self.max_depth}")
+        return ", ".join(parts) or "aucune"
+
+    def marker(self) -> dict | None:
+        """Marqueur de plan partiel (None si le parcours est allé au bout)."""
+        if self.stopped is None:
+            return None
+        return {"partial": True, "reason": self.stopped, "files": self.count, "last": _show(self.last)}
+
+    def marker_text(self) -> str:
+        if self.stopped == "max_files":
+            why = f"limite de {self.max_files} fichier(s) atteinte"
+        elif self.stopped == "max_seconds":
+            why = f"limite de {self.max_seconds:g} s atteinte"
+        else:
+            return ""
+        if self.last is None:
+            return f"{why} ; aucun fichier vu"
+        return f"{why} ; dernier fichier vu : {_show(self.last)}"
+
+
+def _show(path) -> str:
+    # Chemins bytes (--bytes) : octets non décodables en \xNN, comme display_path
+    if isinstance(path, bytes):
+        return path.decode("utf-8", "backslashreplace")
+    return str(path)
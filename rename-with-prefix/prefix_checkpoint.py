@@ -0,0 +1,84 @@
+import json
+import os
+from datetime import datetime
+from time import monotonic
+from typing import Callable
+
+CHECKPOINT_FORMAT = "ai-prefix-checkpoint"
+CHECKPOINT_VERSION = 1
+DEFAULT_CHECKPOINT_EVERY = 5.0  # secondes entre deux écritures
+
+
+def load_checkpoint(path: str) -> dict:
+    """Relit un point de reprise ; ValueError s'il est illisible ou d'un autre format."""
+    with open(path, encoding="utf-8", errors="surrogateescape") as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"Point de reprise illisible: {path}") from e
+    if not isinstance(data, dict) or data.get("format") != CHECKPOINT_FORMAT:
+        raise ValueError(f"Pas un point de reprise: {path}")
+    if data.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Version de point de reprise non supportée: {data.get('version')}")
+    return data
+
+
+def mismatches(data: dict, meta: dict) -> list[str]:
+    """Réglages du run courant qui diffèrent de ceux du point de reprise."""
+    return [k for k, v in meta.items() if data.get("meta", {}).get(k) != v]
+
+
+class CheckpointWriter:
+    """
+    Point de reprise d'un parcours trié (iter_files_sorted) :
+    {"format", "version", "updated", "meta": {...}, "last": [composants], "counters": {...}}
+
+    - last : chemin (relatif à la racine, en composants) du dernier fichier entièrement traité ;
+      la reprise repart juste après, sans relister les sous-arbres déjà parcourus
+    - counters : compteurs cumulés jusqu'à last inclus
+
+    update() n'écrit qu'au plus une fois toutes les every_s secondes (counters() n'est appelé
+    qu'à l'écriture : rien n'est construit par fichier) ; écriture atomique
+    (fichier temporaire + os.replace) : un arrêt brutal laisse toujours un fichier complet.
+    """
+
+    def __init__(self, path: str, meta: dict, every_s: float = DEFAULT_CHECKPOINT_EVERY):
+        self.path = path
+        self.meta = meta
+        self.every_s = every_s
+        self.writes = 0
+        self._last: tuple[str, ...] | None = None
+        self._counters: Callable[[], dict[str, int]] = dict
+        self._next_write = monotonic() + every_s
+
+    def update(self, last: tuple[str, ...], counters: Callable[[], dict[str, int]]):
+        self._last = last
+        self._counters = counters
+        if monotonic() >= self._next_write:
+            self.flush()
+
+    def flush(self):
+        if self._last is None:
+            return
+        data = {
+            "format": CHECKPOINT_FORMAT,
+            "version": CHECKPOINT_VERSION,
+            "updated": datetime.now().isoformat(timespec="seconds"),
+            "meta": self.meta,
+            "last": list(self._last),
+            "counters": self._counters(),
+        }
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        # surrogateescape : un dernier fichier au nom non UTF-8 est réécrit octet pour octet
+        with open(tmp, "w", encoding="utf-8", errors="surrogateescape") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self.writes += 1
+        self._next_write = monotonic() + self.every_s
+
+    def remove(self):
+        """Run terminé : le point de reprise n'a plus lieu d'être."""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,224 @@
+"""
+Client minimal du démon de renommage (prefix_daemon.py), pour les actions de menu contextuel :
+
+    python prefix_client.py --prefix AI_ --pattern RAG fichier1 fichier2 ...
+
+Imports réduits au strict nécessaire (argparse, socket, json ; tempfile seulement sans
+$XDG_RUNTIME_DIR) : le travail est fait par le démon déjà chaud. S'il ne répond pas, le
+renommage est fait dans ce processus (prefix_renamer) ; --spawn démarre alors le démon en
+arrière-plan pour les clics suivants.
+
+Requêtes et réponses en JSON ASCII (\\uXXXX) : un nom non UTF-8 (surrogates de os.fsdecode)
+fait l'aller-retour sans perte, là où un encodage UTF-8 strict lèverait une erreur.
+"""
+import argparse
+import json
+import os
+import socket
+import stat
+import sys
+
+# Taille maximale d'une ligne de requête / réponse (JSON Lines)
+MAX_LINE = 64 * 1024 * 1024
+
+
+def private_dir() -> str:
+    """
+    Dossier propre à l'utilisateur dans le dossier temporaire partagé, créé en 0700.
+    S'il existe déjà, il doit appartenir à l'utilisateur et n'être ouvert à personne d'autre :
+    sinon un autre compte local aurait pu le créer pour y placer son propre socket.
+    Lève PermissionError si ce n'est pas le cas.
+    """
+    import tempfile
+
+    if hasattr(os, "getuid"):
+        uid, owner = os.getuid(), str(os.getuid())
+    else:
+        import getpass
+
+        uid, owner = None, getpass.getuser()
+    d = os.path.join(tempfile.gettempdir(), f"ai-prefix-renamer-{owner}")
+    try:
+        os.mkdir(d, 0o700)
+    except FileExistsError:
+        pass
+    if uid is not None:
+        st = os.lstat(d)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != uid or st.st_mode & 0o077:
+            raise PermissionError(f"Dossier du socket non sûr (propriétaire ou droits) : {d}")
+    return d
+
+
+def default_socket_path() -> str:
+    """
+    $XDG_RUNTIME_DIR (propre à l'utilisateur) si défini, sinon un dossier privé du dossier
+    temporaire (voir private_dir) ; jamais directement dans /tmp, où un autre utilisateur
+    pourrait créer le socket avant le démon et intercepter les requêtes.
+    """
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        uid = os.getuid() if hasattr(os, "getuid") else os.getpid()
+        return os.path.join(runtime, f"ai-prefix-renamer-{uid}.sock")
+    return os.path.join(private_dir(), "daemon.sock")
+
+
+def connect(sock_path: str, timeout: float | None = None) -> socket.socket:
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.settimeout(timeout)
+    try:
+        s.connect(sock_path)
+    except OSError:
+        s.close()
+        raise
+    return s
+
+
+def exchange(s: socket.socket, payload: dict) -> dict:
+    """Envoie une requête JSON (une ligne) et retourne la réponse (une ligne)."""
+    s.sendall(json.dumps(payload).encode("ascii") + b"\n")
+    with s.makefile("rb") as f:
+        line = f.readline(MAX_LINE)
+    if not line:
+        raise ConnectionError("Réponse vide du démon")
+    return json.loads(line)
+
+
+def request(sock_path: str, payload: dict, timeout: float | None = None) -> dict:
+    with connect(sock_path, timeout) as s:
+        return exchange(s, payload)
+
+
+def printable(text: str) -> str:
+    """Texte affichable : octets non UTF-8 d'un nom en \\xNN (comme prefix_renamer.display_path)."""
+    if text.isascii():
+        return text
+    return os.fsencode(text).decode("utf-8", "backslashreplace")
+
+
+def job_from_args(args) -> dict:
+    return {
+        "op": "rename",
+        "paths": [os.path.abspath(p) for p in args.paths],
+        "pattern": args.pattern,
+        "prefix": args.prefix,
+        "ignore_case": args.ignore_case,
+        "word_only": args.word_only,
+        "recursive": args.recursive,
+        "collision": args.collision,
+        "dry_run": args.dry_run,
+    }
+
+
+def run_local(job: dict) -> dict:
+    """Même traitement que le démon, dans ce processus (démon absent)."""
+    from prefix_renamer import apply, compile_rules, plan
+
+    rules = compile_rules(job["pattern"], job["prefix"], job["ignore_case"], job["word_only"])
+    results = []
+    for p in job["paths"]:
+        items = plan(p, rules, job["recursive"])
+        for r in apply(items, job["dry_run"], job["collision"]):
+            results.append({"path": str(r.path), "new_name": r.new_name, "status": r.status, "message": r.message})
+    return {"ok": True, "results": results, "batch_jobs": 1}
+
+
+def spawn_daemon(sock_path: str):
+    """Démarre prefix_daemon.py détaché (sans attendre)."""
+    import subprocess
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prefix_daemon.py")
+    subprocess.Popen(
+        [sys.executable, script, "--socket", sock_path],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Client du démon de renommage (menu contextuel).")
+    parser.add_argument("paths", nargs="*", help="Fichiers ou dossiers à traiter")
+    parser.add_argument("--pattern", default="RAG", help="Regex à rechercher dans le nom (défaut: RAG)")
+    parser.add_argument("--prefix", default="AI_", help="Préfixe à ajouter (défaut: AI_)")
+    parser.add_argument("--recursive", action="store_true", help="Scan récursif (dossiers)")
+    parser.add_argument("--dry-run", action="store_true", help="Simulation : n'applique pas le renommage")
+    parser.add_argument("--ignore-case", action="store_true", help="Ignore la casse")
+    parser.add_argument("--word-only", action="store_true", help="Mot isolé (\\b...\\b)")
+    parser.add_argument("--collision", choices=["skip", "overwrite", "number"], default="skip",
+                        help="Gestion collision si la cible existe déjà (défaut: skip)")
+    parser.add_argument("--socket", default=None, help="Socket du démon (défaut: propre à l'utilisateur)")
+    parser.add_argument("--spawn", action="store_true", help="Démarre le démon s'il ne tourne pas")
+    parser.add_argument("--no-fallback", action="store_true",
+                        help="Échoue si le démon est absent au lieu de traiter dans ce processus")
+    parser.add_argument("--ping", action="store_true", help="Vérifie que le démon répond")
+    parser.add_argument("--stats", action="store_true", help="Affiche les compteurs du démon")
+    parser.add_argument("--stop", action="store_true", help="Arrête le démon")
+    args = parser.parse_args()
+
+    has_unix = hasattr(socket, "AF_UNIX")
+    control = "ping" if args.ping else "stats" if args.stats else "shutdown" if args.stop else None
+    sock_path = args.socket
+    if sock_path is None and has_unix:
+        try:
+            sock_path = default_socket_path()
+        except OSError as e:
+            # Pas de socket sûr : contrôle impossible, mais le renommage peut se faire ici
+            if control or args.no_fallback:
+                print(f"{e} (indiquer --socket)")
+                sys.exit(2)
+            has_unix = False
+
+    if control:
+        if not has_unix:
+            print("Sockets Unix indisponibles sur ce système.")
+            sys.exit(2)
+        try:
+            resp = request(sock_path, {"op": control}, timeout=5)
+        except OSError as e:
+            print(f"Démon injoignable ({sock_path}) : {e}")
+            sys.exit(1)
+        print(printable(json.dumps(resp, ensure_ascii=False, indent=2)))
+        return
+
+    if not args.paths:
+        parser.error("Aucun fichier ou dossier indiqué")
+
+    job = job_from_args(args)
+    s = None
+    if has_unix:
+        try:
+            s = connect(sock_path)
+        except OSError as e:
+            if args.no_fallback:
+                print(f"Démon injoignable ({sock_path}) : {e}")
+                sys.exit(1)
+            if args.spawn:
+                spawn_daemon(sock_path)
+    if s is not None:
+        # Pas de repli local une fois la requête envoyée : le démon a pu déjà renommer
+        try:
+            with s:
+                resp = exchange(s, job)
+        except (OSError, ValueError) as e:
+            resp = {"ok": False, "error": f"Échange avec le démon interrompu : {e}"}
+    else:
+        try:
+            resp = run_local(job)
+        except Exception as e:
+            resp = {"ok": False, "error": str(e)}
+
+    if not resp.get("ok"):
+        print(printable(f"Erreur: {resp.get('error')}"))
+        sys.exit(2)
+
+    errors = 0
+    for r in resp["results"]:
+        print(printable(r["message"]))
+        errors += r["status"] == "ERROR"
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import sys
+from time import monotonic
+from typing import Callable, TextIO
+
+OUTPUT_MODES = ("lines", "progress", "summary", "quiet")
+
+DEFAULT_FLUSH_LINES = 512        # lignes accumulées avant écriture
+DEFAULT_FLUSH_INTERVAL = 0.25    # secondes max entre deux écritures
+DEFAULT_PROGRESS_INTERVAL = 0.2  # secondes entre deux rafraîchissements de la barre
+NON_TTY_PROGRESS_INTERVAL = 5.0  # sortie redirigée : une ligne de progression toutes les N s
+BAR_WIDTH = 24
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+
+def format_progress(done: int, total: int | None, elapsed: float, detail: str = "") -> str:
+    """Ligne de progression : barre + pourcentage si total connu, débit, ETA."""
+    rate = done / elapsed if elapsed > 0 else 0.0
+    if total:
+        frac = min(1.0, done / total)
+        filled = int(frac * BAR_WIDTH)
+        eta = format_duration(max(0, total - done) / rate) if rate > 0 else "--:--"
+        text = f"[{'#' * filled}{'-' * (BAR_WIDTH - filled)}] {frac:4.0%} {done:,}/{total:,}  {rate:,.0f} f/s  ETA {eta}"
+    else:
+        text = f"{done:,} fichier(s)  {rate:,.0f} f/s  {format_duration(elapsed)}"
+    return f"{text}  {detail}" if detail else text
+
+
+class Console:
+    """
+    Sortie console du CLI.
+
+    - lines    : une ligne par fichier (comportement historique), mais écrites par paquets
+                 (un write() pour DEFAULT_FLUSH_LINES lignes ou DEFAULT_FLUSH_INTERVAL s)
+    - progress : barre de progression (stderr) rafraîchie au plus toutes les 0,2 s, erreurs et résumé
+    - summary  : seulement les erreurs et le résumé
+    - quiet    : seulement les erreurs (ligne [ERR] par fichier en échec)
+
+    Sur une console Windows ou via SSH, un print() par fichier plafonne à quelques milliers
+    de fichiers/s : ici le coût console ne dépend plus du nombre de fichiers.
+    La barre est dessinée par un thread (progress) : item()/info() peuvent être appelés pendant.
+    """
+
+    def __init__(
+        self,
+        mode: str = "lines",
+        stream: TextIO | None = None,
+        progress_stream: TextIO | None = None,
+        flush_lines: int = DEFAULT_FLUSH_LINES,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Mode de sortie inconnu: {mode}")
+        self.mode = mode
+        self.stream = stream or sys.stdout
+        self.progress_stream = progress_stream or sys.stderr
+        self.flush_lines = flush_lines
+        self.flush_interval = flush_interval
+        self._buf: list[str] = []
+        self._next_flush = monotonic() + flush_interval
+        self._lock = None
+        self._progress_thread = None
+        self._progress_stop = None
+        self._bar_len = 0
+
+    # ---- écriture bufferisée ----
+
+    def _write(self, text: str):
+        # Avec la barre, son thread vide aussi le tampon (_draw) : ajout sous le même verrou
+        lock = self._lock
+        if lock is not None:
+            with lock:
+                self._buf.append(text)
+        else:
+            self._buf.append(text)
+        if len(self._buf) >= self.flush_lines or monotonic() >= self._next_flush:
+            self.flush()
+
+    def flush(self):
+        if self._lock is not None:
+            with self._lock:
+                self._flush_locked()
+        else:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buf:
+            self._clear_bar()
+            self.stream.write("".join(self._buf))
+            self._buf.clear()
+        self.stream.flush()
+        self._next_flush = monotonic() + self.flush_interval
+
+    def item(self, msg: str, is_error: bool = False):
+        """Message par fichier ([OK], [SKIP], [ERR]...)."""
+        if self.mode == "lines" or is_error:
+            self._write(msg + "\n")
+
+    def info(self, msg: str = ""):
+        """En-tête et résumé (pas en mode quiet)."""
+        if self.mode != "quiet":
+            self._write(msg + "\n")
+
+    def error(self, msg: str):
+        """Toujours affiché, tout de suite."""
+        self._write(msg + "\n")
+        self.flush()
+
+    # ---- barre de progression ----
+
+    def start_progress(self, snapshot: Callable[[], tuple[int, int | None, str]], interval: float = DEFAULT_PROGRESS_INTERVAL):
+        """
+        snapshot() -> (fichiers faits, total connu ou None, détail) ; appelé depuis le thread
+        de la barre, il doit seulement lire des compteurs.
+        """
+        if self.mode != "progress":
+            return
+        import threading
+
+        tty = self.progress_stream.isatty()
+        if not tty:
+            interval = max(interval, NON_TTY_PROGRESS_INTERVAL)
+        self._lock = threading.Lock()
+        self._progress_stop = threading.Event()
+        t0 = monotonic()
+
+        def run():
+            while not self._progress_stop.wait(interval):
+                self._draw(format_progress(*self._snapshot_args(snapshot, t0)), tty)
+
+        self._progress_thread = threading.Thread(target=run, name="progress", daemon=True)
+        self._progress_t0 = t0
+        self._progress_snapshot = snapshot
+        self._progress_tty = tty
+        self._progress_thread.start()
+
+    @staticmethod
+    def _snapshot_args(snapshot, t0: float):
+        done, total, detail = snapshot()
+        return done, total, monotonic() - t0, detail
+
+    def _draw(self, text: str, tty: bool):
+        with self._lock:
+            # Lignes en attente d'abord, pour ne pas les mêler à la barre
+            if self._buf:
+                self._flush_locked()
+            if tty:
+                pad = " " * max(0, self._bar_len - len(text))
+                self.progress_stream.write("\r" + text + pad)
+                self._bar_len = len(text)
+            else:
+                self.progress_stream.write(text + "\n")
+            self.progress_stream.flush()
+
+    def _clear_bar(self):
+        if self._bar_len:
+            self.progress_stream.write("\r" + " " * self._bar_len + "\r")
+            self.progress_stream.flush()
+            self._bar_len = 0
+
+    def stop_progress(self):
+        """Arrête la barre et laisse sa dernière valeur affichée."""
+        if self._progress_thread is None:
+            return
+        self._progress_stop.set()
+        self._progress_thread.join()
+        self._progress_thread = None
+        self._draw(format_progress(*self._snapshot_args(self._progress_snapshot, self._progress_t0)), self._progress_tty)
+        if self._progress_tty:
+            self.progress_stream.write("\n")
+            self._bar_len = 0
+
+    def close(self):
+        self.stop_progress()
+        self.flush()
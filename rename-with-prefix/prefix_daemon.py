@@ -0,0 +1,326 @@
+"""
+Démon de renommage résident, pour les actions de menu contextuel (Automator, Explorer...) :
+un seul interpréteur reste chaud au lieu d'un processus par fichier cliqué.
+
+    python prefix_daemon.py                      # socket par défaut (voir prefix_client.py)
+    python prefix_client.py --prefix AI_ f1 f2   # un job
+
+Protocole : une ligne JSON par requête, une ligne JSON par réponse, sur un socket Unix
+accessible au seul utilisateur (0600).
+- {"op": "rename", "paths": [...], "pattern", "prefix", "ignore_case", "word_only",
+   "recursive", "collision", "dry_run"} -> {"ok", "results": [...], "batch_jobs"}
+- {"op": "ping"} / {"op": "stats"} / {"op": "shutdown"}
+
+Les jobs arrivés dans la même fenêtre (--window-ms) sont traités en un seul lot :
+sélectionner 300 fichiers = 300 clients, mais quelques lots côté démon.
+Règles compilées et descripteurs de dossiers (DirHandleCache) restent en cache entre les lots.
+"""
+import argparse
+import functools
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+from prefix_client import MAX_LINE, default_socket_path
+from prefix_fsops import DEFAULT_DIR_HANDLES, DirHandleCache
+from prefix_renamer import COLLISION_MODES, compile_rules, plan, rename_file
+
+DEFAULT_WINDOW_MS = 50
+DEFAULT_MAX_BATCH = 1000   # jobs par lot
+DEFAULT_IDLE_TIMEOUT = 0   # secondes sans job avant arrêt (0 = jamais)
+
+
+@functools.lru_cache(maxsize=32)
+def cached_rules(pattern: str, prefix: str, ignore_case: bool, word_only: bool):
+    """Règles compilées une fois par combinaison (le démon voit souvent la même)."""
+    return compile_rules(pattern, prefix, ignore_case, word_only)
+
+
+_JOB_TYPES = {
+    "pattern": str,
+    "prefix": str,
+    "collision": str,
+    "ignore_case": bool,
+    "word_only": bool,
+    "recursive": bool,
+    "dry_run": bool,
+}
+
+
+def job_error(req: dict) -> str | None:
+    """Requête "rename" mal formée (message), ou None : vérifiée avant d'entrer dans la file."""
+    paths = req.get("paths")
+    if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+        return "paths doit être une liste de chemins (chaînes)"
+    for key, typ in _JOB_TYPES.items():
+        if key in req and not isinstance(req[key], typ):
+            return f"{key} : {typ.__name__} attendu"
+    return None
+
+
+class Job:
+    """Requête "rename" en attente : le handler attend done, le lot remplit response."""
+    __slots__ = ("req", "done", "response")
+
+    def __init__(self, req: dict):
+        self.req = req
+        self.done = threading.Event()
+        self.response: dict | None = None
+
+    def batch_key(self) -> tuple:
+        r = self.req
+        return (
+            r.get("pattern", "RAG"),
+            r.get("prefix", "AI_"),
+            bool(r.get("ignore_case")),
+            bool(r.get("word_only")),
+            bool(r.get("recursive")),
+            r.get("collision", "skip"),
+            bool(r.get("dry_run")),
+        )
+
+
+class Coalescer:
+    """
+    File de jobs traitée par un seul thread : après le premier job, on attend window_s
+    (au plus max_batch jobs) puis le lot est exécuté d'un bloc.
+    Un seul thread touche au système de fichiers : pas de course entre deux jobs
+    qui visent le même dossier (collisions "number" cohérentes).
+    """
+
+    def __init__(self, window_s: float, max_batch: int, dir_handles: int):
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self.dirs = DirHandleCache(dir_handles)
+        self._q: queue.Queue[Job] = queue.Queue()
+        self.last_activity = time.monotonic()
+        self.busy = False
+        self.counters = {"jobs": 0, "batches": 0, "files": 0, "renamed": 0, "dry_run": 0, "skipped": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._loop, name="prefix-coalescer", daemon=True)
+        self._thread.start()
+
+    def submit(self, req: dict) -> dict:
+        job = Job(req)
+        self._q.put(job)
+        job.done.wait()
+        return job.response
+
+    def _loop(self):
+        while True:
+            batch = [self._q.get()]
+            deadline = time.monotonic() + self.window_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.busy = True
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                # Le thread survit au lot : les jobs suivants ne doivent pas rester bloqués
+                for job in batch:
+                    job.response = {**(job.response or {}), "ok": False, "error": f"Lot interrompu : {e}"}
+            finally:
+                for job in batch:
+                    if job.response is None:
+                        job.response = {"ok": False, "error": "Lot interrompu"}
+                    job.done.set()
+                self.last_activity = time.monotonic()
+                self.busy = False
+
+    def _run_batch(self, batch: list[Job]):
+        self.counters["batches"] += 1
+        self.counters["jobs"] += len(batch)
+        # Le cache vit entre les lots : on écarte les dossiers renommés/supprimés depuis
+        self.dirs.prune_stale()
+
+        groups: dict[tuple, list[Job]] = {}
+        for job in batch:
+            groups.setdefault(job.batch_key(), []).append(job)
+
+        for key, jobs in groups.items():
+            pattern, prefix, ignore_case, word_only, recursive, collision, dry_run = key
+            if collision not in COLLISION_MODES:
+                for job in jobs:
+                    job.response = {"ok": False, "error": f"Gestion de collision inconnue: {collision}"}
+                continue
+            try:
+                rules = cached_rules(pattern, prefix, ignore_case, word_only)
+            except Exception as e:
+                for job in jobs:
+                    job.response = {"ok": False, "error": f"Règle invalide: {e}"}
+                continue
+
+            # Tous les fichiers du groupe, triés par dossier (descripteur réutilisé d'un fichier
+            # à l'autre) ; un fichier sélectionné par deux clients n'est traité qu'une fois
+            todo = []
+            seen = set()
+            for n, job in enumerate(jobs):
+                job.response = {"ok": True, "results": [], "batch_jobs": len(batch)}
+                for p in job.req.get("paths", []):
+                    # Tout échec d'un chemin (introuvable, octet nul, ...) devient une ligne ERROR
+                    try:
+                        for item in plan(p, rules, recursive):
+                            if item.path not in seen:
+                                seen.add(item.path)
+                                todo.append((str(item.path.parent), n, item))
+                    except Exception as e:
+                        job.response["results"].append(
+                            {"path": p, "new_name": "", "status": "ERROR", "message": f"[ERR]  {p} : {e}"}
+                        )
+                        self.counters["errors"] += 1
+            todo.sort(key=lambda t: t[0])
+
+            for _, n, item in todo:
+                r = rename_file(item.path, item.new_name, dry_run, collision, dirs=self.dirs)
+                jobs[n].response["results"].append(
+                    {"path": str(r.path), "new_name": r.new_name, "status": r.status, "message": r.message}
+                )
+                self.counters["files"] += 1
+                if r.status == "RENAMED":
+                    self.counters["renamed"] += 1
+                elif r.status == "DRY_RUN":
+                    self.counters["dry_run"] += 1
+                elif r.status == "SKIP":
+                    self.counters["skipped"] += 1
+                else:
+                    self.counters["errors"] += 1
+
+    def close(self):
+        self.dirs.close()
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server: "RenameServer" = self.server
+        line = self.rfile.readline(MAX_LINE)
+        if not line:
+            return
+        try:
+            req = json.loads(line)
+            op = req.get("op")
+        except (ValueError, AttributeError):
+            self._reply({"ok": False, "error": "Requête JSON invalide"})
+            return
+
+        if op == "rename":
+            error = job_error(req)
+            if error is not None:
+                self._reply({"ok": False, "error": f"Requête invalide : {error}"})
+            else:
+                self._reply(server.coalescer.submit(req))
+        elif op == "ping":
+            self._reply({"ok": True, "pid": os.getpid()})
+        elif op == "stats":
+            self._reply({
+                "ok": True,
+                "pid": os.getpid(),
+                "uptime_s": round(time.monotonic() - server.started, 1),
+                **server.coalescer.counters,
+                "rules_cache": cached_rules.cache_info()._asdict(),
+                "dir_handles": server.coalescer.dirs.summary(),
+            })
+        elif op == "shutdown":
+            self._reply({"ok": True})
+            threading.Thread(target=server.shutdown, daemon=True).start()
+        else:
+            self._reply({"ok": False, "error": f"Opération inconnue: {op}"})
+
+    def _reply(self, resp: dict):
+        # JSON ASCII : les chemins non UTF-8 (surrogates) passent en \uXXXX (voir prefix_client)
+        self.wfile.write(json.dumps(resp).encode("ascii") + b"\n")
+
+
+class RenameServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, sock_path: str, coalescer: Coalescer):
+        self.coalescer = coalescer
+        self.started = time.monotonic()
+        # Socket créé directement en 0600 (pas de fenêtre où un autre utilisateur pourrait s'y connecter)
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(sock_path, Handler)
+        finally:
+            os.umask(old_umask)
+
+
+def remove_stale_socket(sock_path: str) -> bool:
+    """Supprime un socket laissé par un démon mort ; False si un démon répond déjà."""
+    if not os.path.exists(sock_path):
+        return True
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(sock_path)
+            return False
+        except OSError:
+            pass
+    os.unlink(sock_path)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Démon de renommage sur socket Unix (jobs regroupés par lots).")
+    parser.add_argument("--socket", default=None, help="Chemin du socket (défaut: propre à l'utilisateur)")
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW_MS,
+                        help=f"Fenêtre de regroupement des jobs (défaut: {DEFAULT_WINDOW_MS} ms)")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help=f"Jobs au plus par lot (défaut: {DEFAULT_MAX_BATCH})")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help="Arrêt après N secondes sans job (défaut: 0 = jamais)")
+    parser.add_argument("--dir-handles", type=int, default=DEFAULT_DIR_HANDLES, metavar="N",
+                        help=f"Descripteurs de dossiers gardés ouverts (défaut: {DEFAULT_DIR_HANDLES})")
+    args = parser.parse_args()
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("Sockets Unix indisponibles sur ce système.")
+        sys.exit(2)
+
+    try:
+        sock_path = args.socket or default_socket_path()
+    except OSError as e:
+        print(f"{e} (indiquer --socket)")
+        sys.exit(2)
+    if not remove_stale_socket(sock_path):
+        print(f"Un démon tourne déjà sur {sock_path}")
+        sys.exit(1)
+
+    coalescer = Coalescer(args.window_ms / 1000, max(1, args.max_batch), args.dir_handles)
+    server = RenameServer(sock_path, coalescer)
+
+    if args.idle_timeout > 0:
+        def watch_idle():
+            while True:
+                time.sleep(min(args.idle_timeout, 5))
+                idle = time.monotonic() - coalescer.last_activity
+                if not coalescer.busy and idle >= args.idle_timeout:
+                    server.shutdown()
+                    return
+
+        threading.Thread(target=watch_idle, name="prefix-idle", daemon=True).start()
+
+    print(f"Démon prêt : {sock_path} (pid {os.getpid()}, fenêtre {args.window_ms:g} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        coalescer.close()
+        try:
+            os.unlink(sock_path)
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
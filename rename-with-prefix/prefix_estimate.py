@@ -0,0 +1,212 @@
+"""
+Estimation rapide (--estimate) du nombre de fichiers, de correspondances et de collisions
+sous un dossier, par descentes aléatoires, sans parcourir tout l'arbre.
+
+Estimateur de Knuth : une descente part de la racine et choisit à chaque niveau un
+sous-dossier au hasard ; chaque dossier traversé compte pour le produit des nombres de
+sous-dossiers de ses ancêtres (inverse de sa probabilité d'être tiré). La moyenne des
+descentes est sans biais ; l'intervalle de confiance (95 %) vient de leur dispersion.
+Les listages sont mis en cache : une descente qui repasse par un dossier ne le reliste pas.
+Si toutes les branches ont été listées avant la fin du budget, les comptes sont exacts.
+
+Les listages passent par les primitives du parcours (prefix_renamer.list_dir /
+split_entries) : même bridage, même filtre de chemin, mêmes doublons (dev, inode) écartés
+via Visited ; un lien symbolique qui reboucle (--follow-symlinks) n'est donc jamais redescendu.
+
+Arbres très déséquilibrés (un dossier énorme au fond d'une branche rare) : l'estimateur
+reste sans biais mais l'intervalle est large ; il faut alors plus de temps (--estimate-seconds).
+"""
+import os
+import random
+from math import sqrt
+from time import monotonic
+from typing import TYPE_CHECKING, NamedTuple
+
+from prefix_regexguard import RegexSkipped
+from prefix_renamer import Visited, list_dir, split_entries
+from prefix_throttle import NO_LIMIT, TokenBucket
+
+if TYPE_CHECKING:
+    from prefix_pathmatch import PathFilter
+    from prefix_renamer import Rules
+
+DEFAULT_ESTIMATE_SECONDS = 10.0
+Z_95 = 1.96
+
+METRICS = ("files", "matched", "collisions", "dirs")
+
+
+class Listing(NamedTuple):
+    files: int
+    matched: int
+    collisions: int
+    subdirs: list[tuple[str, int]]  # (chemin, périphérique)
+
+
+class Interval(NamedTuple):
+    value: float
+    low: float
+    high: float
+
+
+class EstimateResult(NamedTuple):
+    probes: int
+    dirs_listed: int
+    seconds: float
+    exact: bool
+    metrics: dict[str, Interval]
+
+
+class Estimator:
+    def __init__(
+        self,
+        root: str,
+        rules: "Rules",
+        list_limiter: TokenBucket = NO_LIMIT,
+        path_filter: "PathFilter | None" = None,
+        follow_symlinks: bool = False,
+        seed: int | None = None,
+        visited: Visited | None = None,
+        recursive: bool = True,
+    ):
+        self.root = root
+        self.root_len = len(os.path.join(root, ""))
+        self.rules = rules
+        self.list_limiter = list_limiter
+        self.path_filter = path_filter
+        self.follow_symlinks = follow_symlinks
+        self.recursive = recursive
+        self.rng = random.Random(seed)
+        self.cache: dict[str, Listing] = {}
+        self.discovered = {root}
+        # Comme le parcours : chaque dossier (dev, inode) n'est rattaché qu'à son premier parent
+        # listé ; les listages étant en cache, l'arbre échantillonné reste le même d'une descente
+        # à l'autre (estimateur sans biais sur cet arbre, sans boucle)
+        self.visited = visited if visited is not None else Visited()
+        st = os.stat(root)
+        self.visited.add_dir(st)
+        self.root_dev = st.st_dev
+
+    def listing(self, d: str, dev: int) -> Listing:
+        cached = self.cache.get(d)
+        if cached is not None:
+            return cached
+        matched = collisions = 0
+        try:
+            entries = list_dir(d, self.list_limiter)
+        except OSError:
+            entries = []
+        names = {e.name for e in entries}
+        pf = self.path_filter
+        files, subdirs = split_entries(
+            entries, dev, self.visited, self.recursive, self.follow_symlinks, pf, self.root_len
+        )
+        for e in files:
+            try:
+                new_name = self.rules.new_name(e.name)
+            except RegexSkipped:  # --regex-timeout ... skip : compté, jamais renommé
+                new_name = None
+            if new_name is not None and pf is not None and not pf.matches(e.path[self.root_len:]):
+                new_name = None
+            if new_name is not None:
+                matched += 1
+                # La liste du dossier est déjà là : collision sans stat supplémentaire
+                if new_name in names:
+                    collisions += 1
+        subdirs.sort()  # tirage reproductible avec une graine
+        self.discovered.update(sub for sub, _ in subdirs)
+        listing = self.cache[d] = Listing(len(files), matched, collisions, subdirs)
+        return listing
+
+    @property
+    def exhausted(self) -> bool:
+        """Toutes les branches découvertes ont été listées : les comptes sont exacts."""
+        return len(self.cache) == len(self.discovered)
+
+    def probe(self, recursive: bool) -> tuple[float, float, float, float]:
+        """Une descente aléatoire : estimation (fichiers, correspondances, collisions, dossiers)."""
+        weight = 1
+        files = matched = collisions = dirs = 0.0
+        d, dev = self.root, self.root_dev
+        while True:
+            lst = self.listing(d, dev)
+            files += weight * lst.files
+            matched += weight * lst.matched
+            collisions += weight * lst.collisions
+            dirs += weight
+            if not recursive or not lst.subdirs:
+                break
+            weight *= len(lst.subdirs)
+            d, dev = self.rng.choice(lst.subdirs)
+        return files, matched, collisions, dirs
+
+    def exact(self) -> dict[str, Interval]:
+        totals = [0, 0, 0, len(self.cache)]
+        for lst in self.cache.values():
+            totals[0] += lst.files
+            totals[1] += lst.matched
+            totals[2] += lst.collisions
+        return {m: Interval(t, t, t) for m, t in zip(METRICS, totals)}
+
+
+def _interval(values: list[float]) -> Interval:
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return Interval(mean, 0.0, float("inf"))
+    var = sum((v - mean) ** 2 for v in values) / (n - 1)
+    half = Z_95 * sqrt(var / n)
+    return Interval(mean, max(0.0, mean - half), mean + half)
+
+
+def estimate(
+    root: str,
+    rules: "Rules",
+    recursive: bool = True,
+    seconds: float = DEFAULT_ESTIMATE_SECONDS,
+    max_probes: int | None = None,
+    list_limiter: TokenBucket = NO_LIMIT,
+    path_filter: "PathFilter | None" = None,
+    follow_symlinks: bool = False,
+    seed: int | None = None,
+    visited: Visited | None = None,
+) -> EstimateResult:
+    """
+    Descentes aléatoires pendant `seconds` (ou max_probes), ou jusqu'à avoir tout listé.
+    visited : doublons (dev, inode), comme pour le parcours (Visited(files=True) = --dedup-files).
+    """
+    est = Estimator(str(root), rules, list_limiter, path_filter, follow_symlinks, seed, visited, recursive)
+    samples: list[tuple[float, float, float, float]] = []
+    t0 = monotonic()
+    deadline = t0 + seconds
+    while True:
+        samples.append(est.probe(recursive))
+        if not recursive or est.exhausted:
+            return EstimateResult(len(samples), len(est.cache), monotonic() - t0, True, est.exact())
+        if monotonic() >= deadline or (max_probes is not None and len(samples) >= max_probes):
+            break
+    metrics = {m: _interval([s[k] for s in samples]) for k, m in enumerate(METRICS)}
+    return EstimateResult(len(samples), len(est.cache), monotonic() - t0, False, metrics)
+
+
+def format_report(res: EstimateResult) -> list[str]:
+    lines = [
+        "=== Estimation (échantillonnage) ===",
+        f"Sondages          : {res.probes:,} descente(s), {res.dirs_listed:,} dossier(s) listé(s) en {res.seconds:.1f} s",
+    ]
+    labels = {"files": "Fichiers", "matched": "Correspondances", "collisions": "Collisions", "dirs": "Dossiers"}
+    files = res.metrics["files"].value
+    for m in METRICS:
+        iv = res.metrics[m]
+        label = f"{labels[m]:<17} : "
+        if res.exact:
+            text = f"{iv.value:,.0f}"
+        else:
+            high = "∞" if iv.high == float("inf") else f"{iv.high:,.0f}"
+            text = f"~{iv.value:,.0f}  (IC 95 % : {iv.low:,.0f} – {high})"
+        if m == "matched" and files:
+            text += f"  [{iv.value / files:.2%} des fichiers]"
+        lines.append(label + text)
+    lines.append("Comptes exacts (arbre entièrement listé)." if res.exact else
+                 "Estimation sans biais ; intervalle large = arbre déséquilibré, augmenter --estimate-seconds.")
+    return lines
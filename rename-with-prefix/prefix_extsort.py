@@ -0,0 +1,74 @@
+"""
+Tri externe (fusion de runs sur disque) : trier un très grand flux avec une mémoire bornée.
+
+    for rec in external_sort(records, chunk_size=200_000):
+        ...
+
+Les enregistrements sont lus par paquets de chunk_size, chaque paquet est trié en mémoire
+puis écrit dans un fichier temporaire (pickle par blocs) ; heapq.merge fusionne ensuite
+les runs en ne gardant qu'un bloc par run en mémoire. Tri stable, donc déterministe :
+à clé égale, l'ordre d'arrivée est conservé. Si tout tient dans un paquet, rien n'est écrit.
+"""
+import heapq
+import os
+import pickle
+import tempfile
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+DEFAULT_CHUNK = 200_000  # enregistrements triés en mémoire par run
+SPILL_BLOCK = 1024       # enregistrements par pickle.dump (lecture paresseuse des runs)
+
+
+def _write_run(records: list, tmp_dir: str | None) -> str:
+    fd, path = tempfile.mkstemp(prefix="ai-prefix-sort-", suffix=".run", dir=tmp_dir)
+    with os.fdopen(fd, "wb") as f:
+        for i in range(0, len(records), SPILL_BLOCK):
+            pickle.dump(records[i:i + SPILL_BLOCK], f, pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_run(path: str) -> Iterator:
+    with open(path, "rb") as f:
+        while True:
+            try:
+                block = pickle.load(f)
+            except EOFError:
+                return
+            yield from block
+
+
+def external_sort(
+    records: Iterable,
+    key: Callable | None = None,
+    chunk_size: int = DEFAULT_CHUNK,
+    tmp_dir: str | None = None,
+) -> Iterator:
+    """
+    Itère sur records triés par key. Les fichiers temporaires (dans tmp_dir, défaut : dossier
+    temporaire du système) sont supprimés à la fin de l'itération, même interrompue.
+    Les enregistrements (et clés) doivent être sérialisables par pickle.
+    """
+    it = iter(records)
+    first = sorted(islice(it, chunk_size), key=key)
+    if len(first) < chunk_size:
+        yield from first
+        return
+
+    runs = [_write_run(first, tmp_dir)]
+    del first
+    try:
+        while True:
+            chunk = sorted(islice(it, chunk_size), key=key)
+            if not chunk:
+                break
+            runs.append(_write_run(chunk, tmp_dir))
+            del chunk
+        # heapq.merge est stable entre runs (à égalité, le run le plus ancien sort d'abord)
+        yield from heapq.merge(*(_read_run(p) for p in runs), key=key)
+    finally:
+        for p in runs:
+            try:
+                os.unlink(p)
+            except OSError:
+                pass
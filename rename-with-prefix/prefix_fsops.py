@@ -0,0 +1,192 @@
+import errno
+import functools
+import os
+import sys
+from collections import OrderedDict
+
+# Renommage relatif à un descripteur de dossier (renameat) : POSIX uniquement
+HAS_DIR_FD = os.rename in os.supports_dir_fd and os.stat in os.supports_dir_fd and hasattr(os, "O_DIRECTORY")
+
+# O_PATH (Linux) suffit pour un dirfd et n'exige pas le droit de lecture sur le dossier
+_DIR_OPEN_FLAGS = (
+    getattr(os, "O_PATH", 0) or os.O_RDONLY
+) | getattr(os, "O_DIRECTORY", 0) | getattr(os, "O_CLOEXEC", 0)
+
+DEFAULT_DIR_HANDLES = 64
+
+# renameat2(..., RENAME_NOREPLACE) : renommage sans écrasement en un seul appel atomique (Linux >= 3.15, glibc >= 2.28)
+RENAME_NOREPLACE = 1
+AT_FDCWD = -100
+
+
+@functools.cache
+def _load_renameat2():
+    """Chargé au premier renommage sans écrasement : ctypes n'est pas importé au démarrage."""
+    if not sys.platform.startswith("linux"):
+        return None
+    import ctypes
+
+    try:
+        fn = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    fn.restype = ctypes.c_int
+    return fn
+
+
+def has_renameat2() -> bool:
+    return _load_renameat2() is not None
+
+
+def atomic_noreplace() -> bool:
+    """Windows : os.rename refuse déjà d'écraser une cible existante (atomique côté système)."""
+    return os.name == "nt" or has_renameat2()
+
+
+class DirHandleCache:
+    """
+    Descripteurs de dossiers ouverts une fois puis réutilisés (LRU borné par max_handles).
+    get() retourne None si les dirfd ne sont pas disponibles : l'appelant repasse alors
+    par les chemins complets.
+    """
+
+    def __init__(self, max_handles: int = DEFAULT_DIR_HANDLES):
+        self.max_handles = max_handles
+        self.enabled = HAS_DIR_FD and max_handles > 0
+        self._fds: OrderedDict[str, int] = OrderedDict()
+        self.opened = 0
+        self.hits = 0
+        self.failed = 0
+
+    def get(self, folder: str) -> int | None:
+        if not self.enabled:
+            return None
+        fd = self._fds.get(folder)
+        if fd is not None:
+            self._fds.move_to_end(folder)
+            self.hits += 1
+            return fd
+        try:
+            fd = os.open(folder, _DIR_OPEN_FLAGS)
+        except OSError:
+            self.failed += 1
+            return None
+        self.opened += 1
+        self._fds[folder] = fd
+        if len(self._fds) > self.max_handles:
+            _, old_fd = self._fds.popitem(last=False)
+            os.close(old_fd)
+        return fd
+
+    def prune_stale(self) -> int:
+        """
+        Ferme les descripteurs dont le chemin désigne maintenant un autre dossier (renommé,
+        supprimé, recréé). Indispensable si le cache vit longtemps (démon) : un dirfd suit le
+        dossier d'origine, pas le chemin. Retourne le nombre de descripteurs fermés.
+        """
+        stale = []
+        for folder, fd in self._fds.items():
+            try:
+                st, fst = os.stat(folder), os.fstat(fd)
+                if (st.st_dev, st.st_ino) == (fst.st_dev, fst.st_ino):
+                    continue
+            except OSError:
+                pass
+            stale.append(folder)
+        for folder in stale:
+            os.close(self._fds.pop(folder))
+        return len(stale)
+
+    def close(self):
+        while self._fds:
+            _, fd = self._fds.popitem()
+            os.close(fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def summary(self) -> str:
+        return f"{self.opened} ouverture(s), {self.hits} réutilisation(s), {self.failed} échec(s)"
+
+
+def exists_in_dir(dirs: DirHandleCache | None, folder: str, name: str) -> bool:
+    """Existence de folder/name (lstat : un lien cassé compte comme existant)."""
+    fd = dirs.get(folder) if dirs is not None else None
+    try:
+        if fd is None:
+            os.lstat(os.path.join(folder, name))
+        else:
+            os.stat(name, dir_fd=fd, follow_symlinks=False)
+        return True
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+
+def rename_in_dir(dirs: DirHandleCache | None, folder: str, old_name: str, new_name: str, replace: bool):
+    """
+    Renomme folder/old_name -> folder/new_name.
+    Avec un dirfd, le noyau ne résout plus le chemin complet à chaque appel (renameat).
+    replace=True : écrase la cible (os.replace), sinon os.rename.
+    """
+    op = os.replace if replace else os.rename
+    fd = dirs.get(folder) if dirs is not None else None
+    if fd is None:
+        op(os.path.join(folder, old_name), os.path.join(folder, new_name))
+    else:
+        op(old_name, new_name, src_dir_fd=fd, dst_dir_fd=fd)
+
+
+def rename_noreplace(dirs: DirHandleCache | None, folder: str, old_name: str, new_name: str):
+    """
+    Renomme folder/old_name -> folder/new_name sans jamais écraser : FileExistsError si la cible existe.
+    - Linux : renameat2(RENAME_NOREPLACE), un seul appel atomique (pas de fenêtre exists/rename)
+    - Windows : os.rename (n'écrase pas)
+    - Autres, ou FS sans support (EINVAL/ENOSYS) : test d'existence puis os.rename (non atomique)
+    """
+    renameat2 = _load_renameat2()
+    if renameat2 is not None:
+        fd = dirs.get(folder) if dirs is not None else None
+        if fd is None:
+            src, dst, fd = os.path.join(folder, old_name), os.path.join(folder, new_name), AT_FDCWD
+        else:
+            src, dst = old_name, new_name
+        if renameat2(fd, os.fsencode(src), fd, os.fsencode(dst), RENAME_NOREPLACE) == 0:
+            return
+        import ctypes  # déjà chargé par _load_renameat2
+
+        err = ctypes.get_errno()
+        if err not in (errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+            raise OSError(err, os.strerror(err), os.path.join(folder, old_name), None, os.path.join(folder, new_name))
+
+    if os.name != "nt" and exists_in_dir(dirs, folder, new_name):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), os.path.join(folder, new_name))
+    rename_in_dir(dirs, folder, old_name, new_name, replace=False)
+
+
+def numbered_names(desired_name: str | bytes):
+    """desired, puis "base (1).ext", "base (2).ext", ... (str ou bytes, comme desired_name)"""
+    yield desired_name
+    base, ext = os.path.splitext(desired_name)
+    fmt = b"%s (%d)%s" if isinstance(desired_name, bytes) else "%s (%d)%s"
+    n = 1
+    while True:
+        yield fmt % (base, n, ext)
+        n += 1
+
+
+def rename_numbered(dirs: DirHandleCache | None, folder, old_name, desired_name):
+    """
+    Mode "number" sans sondage préalable : tente desired, puis " (n)" tant que la cible existe.
+    Retourne le nom effectivement utilisé.
+    """
+    for candidate in numbered_names(desired_name):
+        try:
+            rename_noreplace(dirs, folder, old_name, candidate)
+            return candidate
+        except FileExistsError:
+            continue
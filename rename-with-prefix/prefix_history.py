@@ -0,0 +1,320 @@
+"""
+Historique central des renommages (SQLite), tous runs confondus :
+
+    python rename-with-prefix.py --path ./docs --recursive --yes --history   # enregistre
+    python prefix_history.py find ./docs/AI_rapport_RAG.pdf                  # où est passé ce fichier ?
+    python prefix_history.py runs
+    python prefix_history.py run 42
+    python prefix_history.py import ./docs/AI_prefix_rename_log_*.csv      # anciens logs CSV
+
+Tables runs (un run = une exécution) et ops (une ligne par fichier traité), indexées sur
+old_path, new_path, (inode, périphérique) et run_id : une recherche coûte quelques
+lectures d'index, quelle que soit la taille de l'historique.
+Pendant un run, les lignes sont insérées par lots (executemany, une transaction par lot).
+Les chemins sont stockés en texte affichable (display_path : octets non UTF-8 en \\xNN).
+"""
+import argparse
+import os
+import socket
+import sqlite3
+import sys
+from time import perf_counter, time
+
+from prefix_perf import NULL_STATS, PhaseStats
+from prefix_renamer import display_path
+
+SCHEMA_VERSION = 1
+DEFAULT_BATCH = 1000  # lignes par transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id        INTEGER PRIMARY KEY,
+    started   REAL NOT NULL,
+    finished  REAL,
+    outcome   TEXT,
+    source    TEXT NOT NULL,
+    host      TEXT,
+    root      TEXT,
+    pattern   TEXT,
+    prefix    TEXT,
+    collision TEXT,
+    dry_run   INTEGER
+);
+CREATE TABLE IF NOT EXISTS ops (
+    run_id   INTEGER NOT NULL REFERENCES runs(id),
+    ts       REAL NOT NULL,
+    status   TEXT NOT NULL,
+    old_path TEXT NOT NULL,
+    new_path TEXT NOT NULL,
+    reason   TEXT,
+    error    TEXT,
+    dev      INTEGER,
+    ino      INTEGER
+);
+CREATE INDEX IF NOT EXISTS ops_old_path ON ops(old_path);
+CREATE INDEX IF NOT EXISTS ops_new_path ON ops(new_path);
+CREATE INDEX IF NOT EXISTS ops_inode ON ops(ino, dev);
+CREATE INDEX IF NOT EXISTS ops_run ON ops(run_id);
+"""
+
+OP_COLUMNS = "run_id, ts, status, old_path, new_path, reason, error, dev, ino"
+
+
+def default_history_path() -> str:
+    """%LOCALAPPDATA% sous Windows, sinon $XDG_DATA_HOME (~/.local/share)."""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(base, "ai-prefix-renamer", "history.sqlite")
+
+
+def open_history(path: str) -> sqlite3.Connection:
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    # WAL : une requête peut lire pendant qu'un run écrit ; NORMAL suffit avec WAL
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version > SCHEMA_VERSION:
+        conn.close()
+        raise ValueError(f"Historique d'une version plus récente ({version}): {path}")
+    if version < SCHEMA_VERSION:
+        with conn:
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def file_id(path: "str | bytes | os.PathLike") -> tuple[int | None, int | None]:
+    """(périphérique, inode), ou (None, None) si le fichier n'existe plus."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, None
+    return st.st_dev, st.st_ino
+
+
+class HistoryWriter:
+    """
+    Enregistre un run : add() accumule, une transaction par lot de `batch` lignes.
+    À utiliser depuis un seul thread (record() du CLI, thread principal même en --pipeline).
+    """
+
+    def __init__(self, path: str, meta: dict, source: str = "cli", batch: int = DEFAULT_BATCH,
+                 stats: PhaseStats = NULL_STATS):
+        self.path = path
+        self.batch = batch
+        self.stats = stats
+        self.count = 0
+        self._rows: list[tuple] = []
+        self._conn = open_history(path)
+        with self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO runs (started, source, host, root, pattern, prefix, collision, dry_run)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    meta.get("started", time()),
+                    source,
+                    socket.gethostname(),
+                    display_path(meta["root"]) if meta.get("root") else None,
+                    meta.get("pattern"),
+                    meta.get("prefix"),
+                    meta.get("collision"),
+                    int(bool(meta.get("dry_run"))),
+                ),
+            )
+        self.run_id = cur.lastrowid
+
+    def add(self, old_path: "str | bytes | os.PathLike", new_path: "str | bytes | os.PathLike", status: str,
+            reason: str = "", error: str = "", ts: float | None = None,
+            fid: tuple[int | None, int | None] | None = None):
+        """
+        fid : (dev, inode) ; par défaut lu sur le fichier tel qu'il est après l'opération
+        (vrai chemin, avant sa conversion en texte affichable).
+        """
+        t0 = perf_counter()
+        if fid is None:
+            fid = file_id(new_path if status == "RENAMED" else old_path)
+        self._rows.append((self.run_id, ts or time(), status, display_path(old_path), display_path(new_path),
+                           reason, display_path(error), *fid))
+        if len(self._rows) >= self.batch:
+            self.flush()
+        self.stats.add("history", perf_counter() - t0)
+
+    def flush(self):
+        if not self._rows:
+            return
+        with self._conn:
+            self._conn.executemany(f"INSERT INTO ops ({OP_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", self._rows)
+        self.count += len(self._rows)
+        self._rows.clear()
+
+    def close(self, outcome: str = "ok"):
+        """outcome : "ok" ou "interrupted"."""
+        try:
+            self.flush()
+            with self._conn:
+                self._conn.execute("UPDATE runs SET finished = ?, outcome = ? WHERE id = ?", (time(), outcome, self.run_id))
+        finally:
+            self._conn.close()
+
+
+# -------------------------
+# Requêtes
+# -------------------------
+
+def find_ops(conn: sqlite3.Connection, path: str, by_inode: bool = True) -> list[sqlite3.Row]:
+    """Opérations où path est l'ancien ou le nouveau chemin (ou, s'il existe, le même inode)."""
+    sql = f"SELECT rowid, {OP_COLUMNS} FROM ops WHERE old_path = ? UNION SELECT rowid, {OP_COLUMNS} FROM ops WHERE new_path = ?"
+    text = display_path(path)
+    params: list = [text, text]
+    dev, ino = file_id(path) if by_inode else (None, None)
+    if ino is not None:
+        sql += f" UNION SELECT rowid, {OP_COLUMNS} FROM ops WHERE ino = ? AND dev = ?"
+        params += [ino, dev]
+    return conn.execute(f"SELECT * FROM ({sql}) ORDER BY ts, rowid", params).fetchall()
+
+
+def trace_forward(conn: sqlite3.Connection, path: str, max_hops: int = 100) -> list[str]:
+    """Suite des renommages effectifs à partir de path : [path, nom suivant, ...]."""
+    chain = [path]
+    seen = {path}
+    for _ in range(max_hops):
+        row = conn.execute(
+            "SELECT new_path FROM ops WHERE old_path = ? AND status = 'RENAMED' ORDER BY ts DESC LIMIT 1",
+            (chain[-1],),
+        ).fetchone()
+        if row is None or row[0] in seen:
+            break
+        chain.append(row[0])
+        seen.add(row[0])
+    return chain
+
+
+def import_csv(conn: sqlite3.Connection, csv_path: str, batch: int = DEFAULT_BATCH) -> int:
+    """Importe un log CSV (AI_prefix_rename_log_*.csv) comme un run ; retourne le nombre de lignes."""
+    import csv
+    from datetime import datetime
+
+    def ts_of(value: str) -> float:
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except (TypeError, ValueError):
+            return 0.0
+
+    # Le log CSV réécrit les noms non UTF-8 octet pour octet (surrogateescape)
+    with open(csv_path, newline="", encoding="utf-8", errors="surrogateescape") as f:
+        rows = list(csv.DictReader(f))
+    started = ts_of(rows[0].get("timestamp", "")) if rows else os.path.getmtime(csv_path)
+    with conn:
+        cur = conn.execute(
+            "INSERT INTO runs (started, finished, outcome, source, root) VALUES (?, ?, 'imported', ?, ?)",
+            (started, started, f"csv:{display_path(os.path.abspath(csv_path))}",
+             display_path(os.path.dirname(os.path.abspath(csv_path)))),
+        )
+        run_id = cur.lastrowid
+        for i in range(0, len(rows), batch):
+            conn.executemany(
+                f"INSERT INTO ops ({OP_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL)",
+                [
+                    (run_id, ts_of(r.get("timestamp", "")), r.get("status", ""), display_path(r.get("old_path", "")),
+                     display_path(r.get("new_path", "")), r.get("reason", ""), display_path(r.get("error", "")))
+                    for r in rows[i:i + batch]
+                ],
+            )
+    return len(rows)
+
+
+def _fmt_ts(ts: float | None) -> str:
+    if not ts:
+        return "-"
+    from datetime import datetime
+
+    return datetime.fromtimestamp(ts).isoformat(sep=" ", timespec="seconds")
+
+
+def _print_op(r: sqlite3.Row):
+    print(f"{_fmt_ts(r['ts'])}  run {r['run_id']:<5} {r['status']:<8} {r['old_path']} -> {r['new_path']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Historique SQLite des renommages (tous runs).")
+    parser.add_argument("--db", default=None, help="Base d'historique (défaut: propre à l'utilisateur)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_find = sub.add_parser("find", help="Opérations sur un chemin (ancien ou nouveau nom) et emplacement actuel")
+    p_find.add_argument("path")
+    p_find.add_argument("--no-inode", action="store_true", help="Ne cherche pas par inode si le fichier existe")
+
+    p_runs = sub.add_parser("runs", help="Derniers runs")
+    p_runs.add_argument("--limit", type=int, default=20)
+
+    p_run = sub.add_parser("run", help="Opérations d'un run")
+    p_run.add_argument("run_id", type=int)
+
+    p_import = sub.add_parser("import", help="Importe des logs CSV existants")
+    p_import.add_argument("csv", nargs="+")
+    args = parser.parse_args()
+
+    db = args.db or default_history_path()
+    if args.cmd != "import" and not os.path.exists(db):
+        print(f"Historique introuvable : {db}")
+        sys.exit(2)
+    try:
+        conn = open_history(db)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Historique illisible : {e}")
+        sys.exit(2)
+    conn.row_factory = sqlite3.Row
+
+    t0 = perf_counter()
+    try:
+        if args.cmd == "find":
+            path = os.path.abspath(args.path)
+            rows = find_ops(conn, path, by_inode=not args.no_inode)
+            for r in rows:
+                _print_op(r)
+            # Emplacement actuel : on suit les renommages à partir du plus ancien nom connu
+            if rows:
+                origin = rows[0]["old_path"]
+                chain = trace_forward(conn, origin)
+                if len(chain) > 1:
+                    print(f"\nChaîne   : {' -> '.join(chain)}")
+                where = chain[-1]
+                state = "présent" if os.path.exists(where) else "absent"
+                if state == "absent" and not args.no_inode and os.path.exists(path):
+                    # Déplacé hors de l'outil : retrouvé par son inode
+                    where, state = path, "présent, même inode"
+                print(f"Actuel   : {where} ({state})")
+            n = len(rows)
+        elif args.cmd == "runs":
+            rows = conn.execute(
+                "SELECT r.*, (SELECT count(*) FROM ops WHERE run_id = r.id) AS n FROM runs r ORDER BY r.id DESC LIMIT ?",
+                (args.limit,),
+            ).fetchall()
+            for r in rows:
+                mode = "dry-run" if r["dry_run"] else (r["outcome"] or "en cours")
+                print(f"{r['id']:<5} {_fmt_ts(r['started'])}  {r['n']:>8} op(s)  {mode:<11} {r['root'] or '-'}  ({r['source']})")
+            n = len(rows)
+        elif args.cmd == "run":
+            rows = conn.execute(f"SELECT {OP_COLUMNS} FROM ops WHERE run_id = ? ORDER BY ts, rowid", (args.run_id,)).fetchall()
+            for r in rows:
+                _print_op(r)
+            n = len(rows)
+        else:
+            n = 0
+            for csv_path in args.csv:
+                try:
+                    count = import_csv(conn, csv_path)
+                except (OSError, ValueError) as e:
+                    print(f"[ERR]  {csv_path} : {e}")
+                    continue
+                print(f"[OK]   {csv_path} : {count} ligne(s)")
+                n += count
+    finally:
+        conn.close()
+    print(f"\n{n} ligne(s) en {(perf_counter() - t0) * 1000:.1f} ms  ({db})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import os
+import re
+import time
+
+from prefix_perf import PhaseStats
+
+METRIC_PREFIX = "ai_prefix_renamer"
+
+_LABEL_NAME_RX = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+
+COUNTER_HELP = {
+    "files_scanned": "Fichiers analysés pendant le dernier run",
+    "files_matched": "Fichiers correspondant à la regex",
+    "files_renamed": "Fichiers renommés",
+    "files_dry_run": "Renommages simulés (dry-run)",
+    "files_skipped": "Fichiers ignorés (collision)",
+    "files_planned": "Renommages écrits dans un plan (--plan-out)",
+    "files_stale": "Entrées de plan ignorées car le fichier a changé",
+    "errors": "Erreurs de renommage",
+}
+
+
+def parse_labels(items: list[str] | None) -> dict[str, str]:
+    """["share=nas1", "job=rag"] -> {"share": "nas1", "job": "rag"} ; ValueError si invalide."""
+    labels: dict[str, str] = {}
+    for item in items or []:
+        key, sep, value = item.partition("=")
+        if not sep or not _LABEL_NAME_RX.match(key):
+            raise ValueError(f"Label invalide (attendu cle=valeur): {item}")
+        labels[key] = value
+    return labels
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def format_textfile(
+    counters: dict[str, int],
+    stats: PhaseStats,
+    run_seconds: float,
+    success: bool,
+    labels: dict[str, str] | None = None,
+) -> str:
+    """
+    Construit le contenu d'un fichier .prom pour le textfile collector de node-exporter.
+    Chaque run réécrit le fichier : les compteurs du run sont donc exposés en gauges.
+    """
+    labels = labels or {}
+    lines: list[str] = []
+
+    def metric(name: str, mtype: str, help_text: str, samples: list[tuple[dict[str, str], float]]):
+        full = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {full} {help_text}")
+        lines.append(f"# TYPE {full} {mtype}")
+        for extra, value in samples:
+            suffix = extra.pop("__suffix__", "")
+            lines.append(f"{full}{suffix}{_fmt_labels({**labels, **extra})} {value}")
+
+    for key, help_text in COUNTER_HELP.items():
+        metric(key, "gauge", help_text, [({}, counters.get(key, 0))])
+
+    metric("run_duration_seconds", "gauge", "Durée totale du dernier run", [({}, round(run_seconds, 6))])
+    metric("last_run_success", "gauge", "1 si le dernier run s'est terminé sans erreur", [({}, 1 if success else 0)])
+    metric("last_run_timestamp_seconds", "gauge", "Horodatage Unix de fin du dernier run", [({}, int(time.time()))])
+
+    phases = stats.phases()
+    if phases:
+        metric("phase_duration_seconds", "gauge", "Temps mur cumulé par phase",
+               [({"phase": p}, round(stats.seconds[p], 6)) for p in phases])
+        metric("phase_operations", "gauge", "Nombre d'opérations par phase",
+               [({"phase": p}, stats.ops[p]) for p in phases])
+
+    for phase, h in stats.histograms.items():
+        samples: list[tuple[dict[str, str], float]] = [
+            ({"__suffix__": "_bucket", "le": le}, n) for le, n in h.cumulative()
+        ]
+        samples.append(({"__suffix__": "_sum"}, round(h.sum, 6)))
+        samples.append(({"__suffix__": "_count"}, h.count))
+        metric(f"{phase}_latency_seconds", "histogram", f"Latence par appel de la phase {phase}", samples)
+
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: str, content: str):
+    """Écriture atomique (fichier temporaire + os.replace) : node-exporter ne lit jamais un fichier partiel."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
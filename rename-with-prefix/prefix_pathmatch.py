@@ -0,0 +1,181 @@
+"""
+Correspondance sur le chemin relatif à la racine (--path-pattern), avec élagage des sous-arbres.
+
+Le chemin testé utilise toujours "/" comme séparateur (ex: "clients/acme/RAG/note.pdf").
+Si la regex est ancrée (commence par ^), ses premiers composants servent à écarter, dès le
+parcours, les dossiers qui ne peuvent pas mener à une correspondance :
+
+    ^[^/]+/clients/[^/]+/RAG/      -> niveau 2 = "clients", niveau 4 = "RAG" ; le reste n'est pas listé
+
+Un composant n'est utilisé que s'il ne peut pas lui-même contenir de "/" (pas de ".", "\\S",
+"\\W", "\\D", classe niée sans "/", plage qui couvre "/", groupe contenant "/", lookaround,
+référence arrière, ni "/" écrit autrement : \\x2f, \\u002f, \\N{SOLIDUS}, \\057) :
+au premier composant douteux, l'élagage s'arrête là (jamais de faux négatif).
+Écrire [^/]+ plutôt que .* pour en profiter.
+"""
+import os
+import re
+
+# Seuls échappements alphanumériques qui ne peuvent jamais désigner "/" : classes \d \s \w,
+# assertions et caractères de contrôle. Tous les autres (\D \S \W, \x \u \U \N, octal,
+# références arrière, lettres inconnues) rendent le composant douteux.
+_SAFE_ESCAPES = set("dswbBAZntrfva")
+
+
+def _safe_escape(nxt: str) -> bool:
+    """\\<nxt> ne peut pas correspondre à "/" (ponctuation échappée, sauf "/" lui-même)."""
+    if nxt in _SAFE_ESCAPES:
+        return True
+    return nxt != "" and nxt != "/" and not nxt.isalnum()
+
+
+def _class_may_match_slash(inner: str, negated: bool) -> bool:
+    """inner : contenu d'une classe [...] sans les crochets ni le ^ de négation."""
+    if negated:
+        # [^/...] : sûr seulement si "/" est exclu explicitement et rien n'est douteux
+        return "/" not in inner or any("\\" + e in inner for e in "DSW")
+    prev = None  # dernier caractère littéral, borne basse d'une plage éventuelle
+    i = 0
+    n = len(inner)
+    while i < n:
+        c = inner[i]
+        if c == "\\":
+            nxt = inner[i + 1:i + 2]
+            if not _safe_escape(nxt):
+                return True
+            prev = None if nxt.isalnum() else nxt
+            i += 2
+            continue
+        if c == "/":
+            return True
+        if c == "-" and prev is not None and i + 1 < n:
+            hi = inner[i + 1]
+            if hi == "\\":
+                hi = inner[i + 2:i + 3]
+            if prev <= "/" <= hi:
+                return True  # plage qui couvre "/" (ex: [!-0])
+        prev = c
+        i += 1
+    return False
+
+
+def split_components(pattern: str) -> tuple[list[str], int, bool] | None:
+    """
+    Découpe une regex ancrée en composants de chemin (aux "/" de premier niveau).
+    Retourne (composants, nb de composants sûrs en tête, fin ancrée par $) ;
+    None si la regex n'est pas ancrée ou contient une alternative de premier niveau.
+    """
+    if not pattern.startswith("^"):
+        return None
+    comps: list[str] = []
+    safe: list[bool] = []
+    cur: list[str] = []
+    cur_safe = True
+    depth = 0
+    i = 1
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "\\":
+            nxt = pattern[i + 1] if i + 1 < n else ""
+            if not _safe_escape(nxt):
+                cur_safe = False
+            cur.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if c == "[":
+            # Classe : jusqu'au "]" fermant (un "]" en tête est littéral)
+            j = i + 1
+            negated = j < n and pattern[j] == "^"
+            if negated:
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 2 if pattern[j] == "\\" else 1
+            body = pattern[i:j + 1]
+            inner_start = i + 2 if negated else i + 1
+            if _class_may_match_slash(pattern[inner_start:j], negated):
+                cur_safe = False
+            cur.append(body)
+            i = j + 1
+            continue
+        if c == "(":
+            if pattern.startswith("(?", i) and not pattern.startswith("(?:", i):
+                cur_safe = False
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "|" and depth == 0:
+            return None
+        elif c == ".":
+            cur_safe = False
+        elif c == "/":
+            if depth > 0:
+                cur_safe = False
+            else:
+                comps.append("".join(cur))
+                safe.append(cur_safe)
+                cur, cur_safe = [], True
+                # "/" quantifié (/+, /?, /{2}) : la structure des composants n'est plus fixe
+                if i + 1 < n and pattern[i + 1] in "*+?{":
+                    safe[-1] = False
+                i += 1
+                continue
+        cur.append(c)
+        i += 1
+    last = "".join(cur)
+    ends_anchored = last.endswith("$") and not last.endswith("\\$")
+    comps.append(last)
+    safe.append(cur_safe)
+    n_safe = 0
+    for ok in safe:
+        if not ok:
+            break
+        n_safe += 1
+    return comps, n_safe, ends_anchored
+
+
+class PathFilter:
+    """
+    Filtre sur le chemin relatif : matches() pour les fichiers, keep_dir() pour le parcours.
+    pruned : dossiers écartés sans être listés.
+    """
+
+    def __init__(self, pattern: str, ignore_case: bool = False):
+        flags = re.UNICODE | (re.IGNORECASE if ignore_case else 0)
+        self.pattern = pattern
+        self.rx = re.compile(pattern, flags)
+        self.pruned = 0
+        # Composants de dossier utilisables : tous sauf le dernier (qui vise le fichier ou la suite)
+        self._dir_rx: list[re.Pattern] = []
+        self._max_dir_depth: int | None = None
+        split = split_components(pattern)
+        if split is not None:
+            comps, n_safe, ends_anchored = split
+            n_dirs = len(comps) - 1
+            self._dir_rx = [re.compile(f"(?:{c})", flags) for c in comps[:min(n_safe, n_dirs)]]
+            if ends_anchored and n_safe == len(comps):
+                # Fichier exactement au niveau n_dirs : inutile de descendre plus bas
+                self._max_dir_depth = n_dirs
+
+    @property
+    def prunes(self) -> bool:
+        return bool(self._dir_rx) or self._max_dir_depth is not None
+
+    def matches(self, rel: str) -> bool:
+        if os.sep != "/":
+            rel = rel.replace(os.sep, "/")
+        return self.rx.search(rel) is not None
+
+    def keep_dir(self, rel: str) -> bool:
+        """rel : chemin du dossier relatif à la racine (séparateur os.sep)."""
+        parts = rel.split(os.sep)
+        if self._max_dir_depth is not None and len(parts) > self._max_dir_depth:
+            self.pruned += 1
+            return False
+        for rx, part in zip(self._dir_rx, parts):
+            if rx.fullmatch(part) is None:
+                self.pruned += 1
+                return False
+        return True
@@ -0,0 +1,166 @@
+import bisect
+import time
+from time import perf_counter
+
+# Ordre d'affichage des phases connues (les autres suivent, par ordre d'apparition)
+PHASE_ORDER = (
+    "walk", "read", "match", "plan", "check", "collision", "rename", "log", "history",
+    "wait_source", "wait_1", "wait_2", "throttle_list", "throttle_rename",
+)
+
+PHASE_LABELS = {
+    "walk": "Parcours",
+    "read": "Lecture plan",
+    "match": "Correspondance",
+    "plan": "Écriture plan",
+    "check": "Empreintes",
+    "collision": "Collisions",
+    "rename": "Renommage",
+    "log": "Log CSV",
+    "history": "Historique",
+    "wait_source": "Attente file 1",
+    "wait_1": "Attente file 2",
+    "wait_2": "Attente file 3",
+    "throttle_list": "Bridage listage",
+    "throttle_rename": "Bridage renom.",
+}
+
+
+# Bornes (secondes) des histogrammes de latence, façon client Prometheus
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LatencyHistogram:
+    """Histogramme cumulatif à bornes fixes (compatible format Prometheus)."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # dernière case : +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """[(le, cumul), ...] jusqu'à "+Inf"."""
+        out, acc = [], 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            acc += n
+            out.append(("+Inf" if bound == float("inf") else repr(bound), acc))
+        return out
+
+
+class PhaseStats:
+    """
+    Temps mur (secondes) et nombre d'opérations cumulés par phase.
+    Dans les boucles chaudes, préférer add() avec perf_counter() à phase() (moins coûteux).
+
+    latency_phases: phases dont chaque appel à add() alimente aussi un histogramme de latence.
+    """
+
+    def __init__(self, latency_phases: tuple[str, ...] = ()):
+        self.seconds: dict[str, float] = {}
+        self.ops: dict[str, int] = {}
+        self.histograms: dict[str, LatencyHistogram] = {p: LatencyHistogram() for p in latency_phases}
+
+    def add(self, phase: str, seconds: float, ops: int = 1):
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+        self.ops[phase] = self.ops.get(phase, 0) + ops
+        h = self.histograms.get(phase)
+        if h is not None:
+            h.observe(seconds)
+
+    def phase(self, name: str, ops: int = 1) -> "_PhaseTimer":
+        """with stats.phase("log"): ..."""
+        return _PhaseTimer(self, name, ops)
+
+    def timed_iter(self, iterable, phase: str):
+        """Itère en comptant le temps passé dans chaque next() comme `phase`."""
+        it = iter(iterable)
+        while True:
+            t0 = perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.add(phase, perf_counter() - t0, 0)
+                return
+            self.add(phase, perf_counter() - t0)
+            yield item
+
+    def phases(self) -> list[str]:
+        known = [p for p in PHASE_ORDER if p in self.seconds]
+        return known + [p for p in self.seconds if p not in PHASE_ORDER]
+
+    def as_dict(self) -> dict[str, dict[str, float]]:
+        return {p: {"seconds": self.seconds[p], "ops": self.ops[p]} for p in self.phases()}
+
+    def summary_lines(self) -> list[str]:
+        """Lignes pour le bloc "=== Résumé ===" (CLI)."""
+        lines = []
+        for p in self.phases():
+            sec, ops = self.seconds[p], self.ops[p]
+            rate = f"{ops / sec:,.0f} op/s" if sec > 0 else "-"
+            label = PHASE_LABELS.get(p, p)
+            lines.append(f"  {label:<16}: {sec:8.3f} s  ({ops} op, {rate})")
+        return lines
+
+    def compact(self) -> str:
+        """Résumé sur une ligne (barre d'état GUI)."""
+        return " | ".join(f"{p} {self.seconds[p]:.2f}s/{self.ops[p]}" for p in self.phases())
+
+
+class NullStats(PhaseStats):
+    """Instrumentation désactivée : add() ne fait rien."""
+
+    def add(self, phase: str, seconds: float, ops: int = 1):
+        pass
+
+
+NULL_STATS = NullStats()
+
+
+class _PhaseTimer:
+    def __init__(self, stats: PhaseStats, name: str, ops: int):
+        self.stats = stats
+        self.name = name
+        self.ops = ops
+
+    def __enter__(self):
+        self._t0 = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add(self.name, perf_counter() - self._t0, self.ops)
+        return False
+
+
+class Profiler:
+    """
+    Profil cProfile optionnel : with Profiler(path): ...
+    path=None -> aucun profil. Le fichier pstats s'ouvre avec `python -m pstats <fichier>`.
+    Attention : cProfile ne profile que le thread courant.
+    """
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self._prof = None
+        self.wall_seconds = 0.0
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        if self.path:
+            import cProfile
+
+            self._prof = cProfile.Profile()
+            self._prof.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall_seconds = time.perf_counter() - self._t0
+        if self._prof is not None:
+            self._prof.disable()
+            self._prof.dump_stats(str(self.path))
+        return False
@@ -0,0 +1,126 @@
+from time import perf_counter
+from typing import Callable, Iterable
+
+# Marqueur de fin de flux (propagé d'étage en étage)
+_DONE = object()
+
+DEFAULT_QUEUE_SIZE = 16   # lots en attente entre deux étages
+DEFAULT_BATCH_SIZE = 64   # éléments par lot
+
+
+def run_pipeline(
+    source: Iterable,
+    stages: list[Callable],
+    sink: Callable,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    stats=None,
+):
+    """
+    Exécute source -> stages[0] -> stages[1] -> ... -> sink en flux.
+
+    - la source (ex: parcours du dossier) et chaque étage tournent dans leur propre thread ;
+      sink (affichage + log) tourne dans le thread appelant ;
+    - les étages communiquent par des files bornées (queue_size lots de batch_size éléments) :
+      un étage lent bloque les précédents (backpressure), la mémoire reste constante ;
+    - un étage qui retourne None filtre l'élément ;
+    - stats (PhaseStats) : reçoit le temps passé bloqué sur une file pleine, par étage ("wait_<n>").
+
+    La première exception (d'un étage ou du sink, Ctrl+C compris) arrête tout le pipeline
+    et est relancée ici.
+    """
+    # Importés ici : le CLI importe ce module pour DEFAULT_QUEUE_SIZE même sans --pipeline
+    import queue
+    import threading
+
+    stop = threading.Event()
+    errors: list[BaseException] = []
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in range(len(stages) + 1)]
+
+    def put(q: queue.Queue, item, wait_phase: str) -> bool:
+        try:
+            q.put_nowait(item)
+            return True
+        except queue.Full:
+            t0 = perf_counter()
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                if stats is not None:
+                    stats.add(wait_phase, perf_counter() - t0)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q: queue.Queue):
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    return _DONE
+
+    def produce():
+        try:
+            batch = []
+            for item in source:
+                if stop.is_set():
+                    return
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    if not put(queues[0], batch, "wait_source"):
+                        return
+                    batch = []
+            if batch:
+                put(queues[0], batch, "wait_source")
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(queues[0], _DONE, "wait_source")
+
+    def work(fn: Callable, q_in: queue.Queue, q_out: queue.Queue, wait_phase: str):
+        try:
+            while True:
+                batch = get(q_in)
+                if batch is _DONE:
+                    break
+                out = [r for r in map(fn, batch) if r is not None]
+                if out and not put(q_out, out, wait_phase):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(q_out, _DONE, wait_phase)
+
+    threads = [threading.Thread(target=produce, name="pipeline-source", daemon=True)]
+    for i, fn in enumerate(stages):
+        threads.append(threading.Thread(
+            target=work,
+            args=(fn, queues[i], queues[i + 1], f"wait_{i + 1}"),
+            name=f"pipeline-stage-{i + 1}",
+            daemon=True,
+        ))
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            batch = get(queues[-1])
+            if batch is _DONE:
+                break
+            for item in batch:
+                sink(item)
+    except BaseException as e:
+        errors.append(e)
+    finally:
+        # Débloque les étages encore en attente (arrêt sur erreur ou Ctrl+C)
+        if errors:
+            stop.set()
+        for t in threads:
+            t.join()
+
+    if errors:
+        raise errors[0]
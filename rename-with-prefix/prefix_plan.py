@@ -0,0 +1,375 @@
+import heapq
+import json
+import os
+from array import array
+from enum import IntEnum
+from pathlib import Path
+from typing import NamedTuple
+
+PLAN_FORMAT = "ai-prefix-plan"
+PLAN_VERSION = 1
+DEFAULT_CHUNK = 200_000  # éléments triés en mémoire par run (export trié)
+
+
+class Fingerprint(NamedTuple):
+    """Empreinte stat d'un fichier au moment du plan."""
+    dev: int
+    ino: int
+    size: int
+    mtime_ns: int
+
+
+class PlanEntry(NamedTuple):
+    folder: str
+    old_name: str
+    new_name: str
+    fp: Fingerprint
+
+    @property
+    def path(self) -> Path:
+        return Path(self.folder, self.old_name)
+
+
+def fingerprint(st: os.stat_result) -> Fingerprint:
+    return Fingerprint(st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def is_unchanged(path: str | Path, fp: Fingerprint) -> bool:
+    """Un seul stat : False si le fichier a disparu, été remplacé ou modifié depuis le plan."""
+    try:
+        st = os.stat(path, follow_symlinks=False)
+    except OSError:
+        return False
+    return fingerprint(st) == fp
+
+
+def _open(path: str | Path, mode: str):
+    # surrogateescape : les noms non UTF-8 (os.fsdecode) sont écrits et relus octet pour octet
+    if str(path).endswith(".gz"):
+        import gzip
+
+        return gzip.open(path, mode + "t", encoding="utf-8", errors="surrogateescape", newline="\n")
+    return open(path, mode, encoding="utf-8", errors="surrogateescape", newline="\n")
+
+
+class PlanWriter:
+    """
+    Écrit un plan de renommage en JSON Lines (gzip si le nom finit par .gz).
+
+    Ligne 1 : en-tête {"format", "version", "created", ...meta}
+    ["D", id, dossier]                                    : dossier interné (écrit une seule fois)
+    ["R", id, ancien, nouveau, dev, ino, taille, mtime_ns] : renommage prévu
+    ["P", {"partial", "reason", "files", "last"}]          : dernière ligne d'un plan partiel
+                                                            (parcours arrêté par une limite,
+                                                            ou interrompu : reason "interrupted")
+    """
+
+    def __init__(self, path: str | Path, meta: dict):
+        self.path = Path(path)
+        self.count = 0
+        self._dirs: dict[str, int] = {}
+        from datetime import datetime
+
+        self._f = _open(self.path, "w")
+        header = {
+            "format": PLAN_FORMAT,
+            "version": PLAN_VERSION,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            **meta,
+        }
+        self._f.write(json.dumps(header, ensure_ascii=False) + "\n")
+
+    def add(self, path: Path, new_name: str, st: os.stat_result | None = None):
+        """Ajoute une entrée ; st évite un stat si l'appelant l'a déjà."""
+        if st is None:
+            st = os.stat(path, follow_symlinks=False)
+        folder = str(path.parent)
+        dir_id = self._dirs.get(folder)
+        if dir_id is None:
+            dir_id = self._dirs[folder] = len(self._dirs)
+            self._f.write(json.dumps(["D", dir_id, folder], ensure_ascii=False) + "\n")
+        fp = fingerprint(st)
+        self._f.write(json.dumps(["R", dir_id, path.name, new_name, *fp], ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def close(self, partial: dict | None = None):
+        """partial : marqueur de parcours incomplet (ScanBudget.marker), écrit en fin de plan."""
+        if partial:
+            self._f.write(json.dumps(["P", partial], ensure_ascii=False) + "\n")
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Sortie sur exception : le plan est incomplet, on le dit
+        self.close({"partial": True, "reason": "interrupted", "files": self.count} if exc_type else None)
+        return False
+
+
+class PlanReader:
+    """
+    Relit un plan : .meta (en-tête) puis itération sur des PlanEntry, en flux.
+    .partial : marqueur de plan partiel, connu une fois l'itération terminée.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.partial: dict | None = None
+        self._f = _open(self.path, "r")
+        try:
+            self.meta: dict = json.loads(self._f.readline())
+        except ValueError as e:
+            self._f.close()
+            raise ValueError(f"Plan illisible: {path}") from e
+        if self.meta.get("format") != PLAN_FORMAT:
+            self._f.close()
+            raise ValueError(f"Pas un fichier de plan: {path}")
+        if self.meta.get("version") != PLAN_VERSION:
+            self._f.close()
+            raise ValueError(f"Version de plan non supportée: {self.meta.get('version')}")
+
+    def __iter__(self):
+        dirs: dict[int, str] = {}
+        for lineno, line in enumerate(self._f, 2):
+            try:
+                rec = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"Plan illisible: {self.path}, ligne {lineno} (fichier tronqué ?)") from e
+            if rec[0] == "D":
+                dirs[rec[1]] = rec[2]
+            elif rec[0] == "R":
+                _, dir_id, old_name, new_name, dev, ino, size, mtime_ns = rec
+                yield PlanEntry(dirs[dir_id], old_name, new_name, Fingerprint(dev, ino, size, mtime_ns))
+            elif rec[0] == "P":
+                self.partial = rec[1]
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# -------------------------
+# Plan en mémoire (GUI)
+# -------------------------
+
+class RenameItem(NamedTuple):
+    """Élément d'aperçu GUI (NamedTuple : plus léger à importer qu'une dataclass)."""
+    old_path: str
+    old_name: str
+    new_name: str
+    reason: str
+    will_rename: bool
+
+
+class Reason(IntEnum):
+    """Raisons d'un plan, stockées sur 1 octet (l'ordre sert aussi au tri de l'aperçu)."""
+    MATCH = 0
+    MATCH_NUMBERED = 1
+    MATCH_OVERWRITE = 2
+    ALREADY_PREFIXED = 3
+    COLLISION_SKIP = 4
+    NO_MATCH = 5
+    REGEX_TIMEOUT = 6
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+    @property
+    def will_rename(self) -> bool:
+        return self <= Reason.MATCH_OVERWRITE
+
+
+REASON_BY_LABEL = {r.label: r for r in Reason}
+
+
+class PlanStore:
+    """
+    Stockage colonnaire compact des RenameItem d'un scan.
+
+    - dossiers internés (un id par dossier au lieu du chemin complet par fichier)
+    - noms concaténés dans un bytearray (utf-8 + surrogateescape) avec un tableau d'offsets
+    - raison sur 1 octet ; le nouveau nom n'est stocké que pour "match_numbered"
+      (sinon il vaut prefix + ancien nom, ou l'ancien nom)
+    - keep_unmatched=False : les "no_match" sont seulement comptés (dropped), pas stockés
+
+    Les RenameItem sont recréés à la demande (indexation / itération).
+    """
+
+    def __init__(self, prefix: str, keep_unmatched: bool = True):
+        self.prefix = prefix
+        self.keep_unmatched = keep_unmatched
+        self.dirs: list[str] = []
+        self._dir_ids: dict[str, int] = {}
+        self._dir = array("I")
+        self._reason = array("B")
+        self._names = bytearray()
+        self._offs = array("Q", [0])
+        self._numbered: dict[int, str] = {}
+        self.dropped = 0
+        self.will_count = 0
+        self.partial: dict | None = None  # marqueur d'aperçu borné (ScanBudget.marker)
+        self._dirs_sent = 0
+
+    def append(self, item: RenameItem):
+        reason = REASON_BY_LABEL[item.reason]
+        if reason is Reason.NO_MATCH and not self.keep_unmatched:
+            self.dropped += 1
+            return
+
+        folder = os.path.dirname(item.old_path)
+        dir_id = self._dir_ids.get(folder)
+        if dir_id is None:
+            dir_id = self._dir_ids[folder] = len(self.dirs)
+            self.dirs.append(folder)
+
+        if reason is Reason.MATCH_NUMBERED:
+            self._numbered[len(self._reason)] = item.new_name
+        self._dir.append(dir_id)
+        self._reason.append(reason)
+        self._names += item.old_name.encode("utf-8", "surrogateescape")
+        self._offs.append(len(self._names))
+        if reason.will_rename:
+            self.will_count += 1
+
+    def extend(self, items):
+        for it in items:
+            self.append(it)
+
+    @property
+    def total(self) -> int:
+        """Fichiers analysés, y compris les non-correspondances non conservées."""
+        return len(self._reason) + self.dropped
+
+    def __len__(self) -> int:
+        return len(self._reason)
+
+    def old_name(self, i: int) -> str:
+        return self._names[self._offs[i]:self._offs[i + 1]].decode("utf-8", "surrogateescape")
+
+    def reason(self, i: int) -> Reason:
+        return Reason(self._reason[i])
+
+    def __getitem__(self, i: int) -> RenameItem:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        reason = Reason(self._reason[i])
+        name = self.old_name(i)
+        if reason is Reason.MATCH_NUMBERED:
+            new_name = self._numbered[i]
+        elif reason in (Reason.ALREADY_PREFIXED, Reason.NO_MATCH, Reason.REGEX_TIMEOUT):
+            new_name = name
+        else:
+            new_name = self.prefix + name
+        path = os.path.join(self.dirs[self._dir[i]], name)
+        return RenameItem(path, name, new_name, reason.label, reason.will_rename)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    # Ordre de l'aperçu : raison (ordre de Reason = à renommer d'abord, puis libellé),
+    # puis nom sans casse, puis ordre du scan
+
+    def _sort_key(self, i: int) -> str:
+        return self.old_name(i).lower()
+
+    def preview(self, limit: int) -> list[RenameItem]:
+        """
+        Les `limit` premiers éléments dans l'ordre de l'aperçu, sans trier tout le plan :
+        les raisons qui tiennent entièrement sont triées, celle qui déborde passe par une
+        sélection partielle (heapq.nsmallest) ; mémoire en O(limit), une seule clé en
+        minuscules vivante par élément parcouru.
+        """
+        out: list[RenameItem] = []
+        for reason in Reason:
+            room = limit - len(out)
+            if room <= 0:
+                break
+            count = self._reason.count(reason)
+            if not count:
+                continue
+            idx = (i for i, r in enumerate(self._reason) if r == reason)
+            if count <= room:
+                chosen = sorted(idx, key=self._sort_key)
+            else:
+                chosen = heapq.nsmallest(room, idx, key=self._sort_key)
+            out.extend(self[i] for i in chosen)
+        return out
+
+    def iter_sorted(self, chunk_size: int = DEFAULT_CHUNK, tmp_dir: str | None = None):
+        """Tous les éléments dans l'ordre de l'aperçu (export) : tri externe, mémoire bornée."""
+        from prefix_extsort import external_sort
+
+        keys = ((r, self._sort_key(i), i) for i, r in enumerate(self._reason))
+        for _, _, i in external_sort(keys, chunk_size=chunk_size, tmp_dir=tmp_dir):
+            yield self[i]
+
+    def iter_will_rename(self):
+        """Seulement les éléments à renommer (sans recréer les autres)."""
+        for i, r in enumerate(self._reason):
+            if r <= Reason.MATCH_OVERWRITE:
+                yield self[i]
+
+    # Transfert par lots entre processus (scan GUI dans un processus fils) : colonnes brutes,
+    # sans recréer de RenameItem ni repasser par les chaînes
+
+    def take_batch(self) -> tuple:
+        """
+        Retire les éléments accumulés et les retourne sous forme colonnaire (picklable), avec les
+        dossiers apparus depuis le lot précédent. L'internement des dossiers est conservé :
+        les identifiants restent valides côté réception (extend_batch, même ordre).
+        """
+        batch = (
+            self.dirs[self._dirs_sent:],
+            self._dir.tobytes(),
+            self._reason.tobytes(),
+            bytes(self._names),
+            self._offs[1:].tobytes(),
+            self._numbered,
+            self.dropped,
+        )
+        self._dirs_sent = len(self.dirs)
+        self._dir = array("I")
+        self._reason = array("B")
+        self._names = bytearray()
+        self._offs = array("Q", [0])
+        self._numbered = {}
+        return batch
+
+    def extend_batch(self, batch: tuple):
+        """Ajoute un lot produit par take_batch (lots reçus dans l'ordre d'envoi)."""
+        dirs, dir_ids, reasons, names, offs, numbered, dropped = batch
+        start = len(self._reason)
+        for folder in dirs:
+            self._dir_ids[folder] = len(self.dirs)
+            self.dirs.append(folder)
+        self._dir.frombytes(dir_ids)
+        self._reason.frombytes(reasons)
+        base = len(self._names)
+        self._names += names
+        rel = array("Q")
+        rel.frombytes(offs)
+        self._offs.extend(o + base for o in rel)
+        for i, new_name in numbered.items():
+            self._numbered[start + i] = new_name
+        self.dropped = dropped
+        self.will_count += sum(reasons.count(r) for r in (Reason.MATCH, Reason.MATCH_NUMBERED, Reason.MATCH_OVERWRITE))
+
+    def nbytes(self) -> int:
+        """Taille approximative des colonnes (hors liste des dossiers)."""
+        return (
+            self._dir.itemsize * len(self._dir)
+            + len(self._reason)
+            + len(self._names)
+            + self._offs.itemsize * len(self._offs)
+        )
@@ -0,0 +1,216 @@
+"""
+Garde-fous contre le backtracking catastrophique des regex saisies (--pattern, champ GUI).
+
+- analyze(pattern) : repère, sans exécuter la regex, les formes exponentielles classiques
+  (quantificateur dans un groupe répété : (a+)+, (\\w+\\s?)* ; alternative répétée dont les
+  branches peuvent commencer par le même caractère : (\\w|\\d\\d)+). C'est un avertissement :
+  (\\d+_)+ est signalé alors qu'il est sans danger. Groupes atomiques et quantificateurs
+  possessifs (Python 3.11+) ne sont pas signalés : ils ne reviennent pas en arrière.
+- TimedPattern(rx, budget) : search() avec un budget de temps par nom ; au dépassement,
+  RegexTimeout (échec du run) ou RegexSkipped (le nom est écarté, on continue).
+
+Le budget repose sur SIGALRM : thread principal seulement (pas les étages de --pipeline),
+et pas sous Windows (analyse seule).
+L'analyse lit l'arbre du parseur interne de re ; s'il n'est pas importable (autre
+implémentation de Python), analyze() ne signale rien.
+"""
+import re
+from _thread import get_ident
+from time import perf_counter
+
+try:
+    from re import _constants as _c, _parser as _p  # Python 3.11+
+except ImportError:
+    try:  # Python 3.10
+        import sre_constants as _c
+        import sre_parse as _p
+    except ImportError:  # internes de re indisponibles : pas d'analyse statique
+        _c = _p = None
+
+ON_TIMEOUT = ("fail", "skip")
+
+_REPEATS = {_c.MAX_REPEAT, _c.MIN_REPEAT} if _c is not None else set()
+_ANY = None  # premier caractère indéterminé (classe, ".", \w...)
+
+
+class RegexTimeout(Exception):
+    """Une recherche a dépassé le budget de temps (run arrêté)."""
+
+    def __init__(self, name: str, budget: float):
+        super().__init__(f"regex trop lente : plus de {budget * 1000:g} ms sur le nom {name!r}")
+        self.name = name
+        self.budget = budget
+        self.path = None  # chemin complet, renseigné par prefix_renamer.plan
+
+
+class RegexSkipped(RegexTimeout):
+    """Dépassement en mode skip : le nom est écarté, le run continue."""
+
+
+# -------------------------
+# Analyse statique
+# -------------------------
+
+def _first_chars(items, ignore_case: bool):
+    """Caractères par lesquels une séquence peut commencer ; _ANY si indéterminé, set() si vide."""
+    for op, av in items:
+        if op is _c.AT:
+            continue
+        if op is _c.LITERAL:
+            ch = chr(av)
+            return {ch.lower()} if ignore_case else {ch}
+        if op is _c.IN:
+            chars = set()
+            for sub_op, sub_av in av:
+                if sub_op is _c.LITERAL:
+                    chars.add(chr(sub_av).lower() if ignore_case else chr(sub_av))
+                elif sub_op is _c.RANGE and sub_av[1] - sub_av[0] < 256:
+                    chars.update(chr(c).lower() if ignore_case else chr(c) for c in range(sub_av[0], sub_av[1] + 1))
+                else:
+                    return _ANY  # NEGATE, CATEGORY, grande plage
+            return chars
+        if op is _c.SUBPATTERN:
+            return _first_chars(av[-1], ignore_case)
+        if op is _c.BRANCH:
+            out = set()
+            for branch in av[1]:
+                first = _first_chars(branch, ignore_case)
+                if first is _ANY:
+                    return _ANY
+                out |= first
+            return out
+        if op in _REPEATS and av[0] > 0:
+            return _first_chars(av[2], ignore_case)
+        return _ANY  # ANY, NOT_LITERAL, répétition optionnelle, lookaround...
+    return set()
+
+
+def _overlaps(branches, ignore_case: bool) -> bool:
+    seen: set[str] = set()
+    for branch in branches:
+        if not branch:
+            continue  # (a|) : simple option, pas d'ambiguïté exponentielle
+        first = _first_chars(branch, ignore_case)
+        if first is _ANY or first & seen:
+            return True
+        seen |= first
+    return False
+
+
+def _walk(items, in_repeat: bool, ignore_case: bool, found: set[str]):
+    for op, av in items:
+        if op in _REPEATS:
+            lo, hi, body = av
+            repeats = hi > 1
+            if repeats and in_repeat:
+                found.add("quantificateur imbriqué dans un groupe répété (ex: (a+)+)")
+            _walk(body, in_repeat or repeats, ignore_case, found)
+        elif op is _c.BRANCH:
+            if in_repeat and _overlaps(av[1], ignore_case):
+                found.add("alternative répétée dont les branches se recouvrent (ex: (\\w|\\d\\d)+)")
+            for branch in av[1]:
+                _walk(branch, in_repeat, ignore_case, found)
+        elif op is _c.SUBPATTERN:
+            _walk(av[-1], in_repeat, ignore_case, found)
+        elif op in (_c.ASSERT, _c.ASSERT_NOT):
+            _walk(av[1], in_repeat, ignore_case, found)
+        elif op is _c.GROUPREF_EXISTS:
+            for branch in av[1:]:
+                if branch is not None:
+                    _walk(branch, in_repeat, ignore_case, found)
+        # ATOMIC_GROUP, POSSESSIVE_REPEAT : pas de retour arrière, rien à signaler
+
+
+def analyze(pattern: str, ignore_case: bool = False) -> list[str]:
+    """Risques de backtracking catastrophique (liste vide si rien de suspect). Lève re.error."""
+    if _p is None:
+        re.compile(pattern)  # re.error pour un motif invalide, comme avec l'analyse
+        return []
+    flags = re.UNICODE | (re.IGNORECASE if ignore_case else 0)
+    found: set[str] = set()
+    _walk(_p.parse(pattern, flags), False, ignore_case, found)
+    return sorted(found)
+
+
+# -------------------------
+# Budget de temps par nom
+# -------------------------
+
+def timeout_supported() -> bool:
+    """Budget de temps disponible (minuterie setitimer : Linux, macOS ; pas Windows)."""
+    import signal
+
+    return hasattr(signal, "setitimer")
+
+
+class TimedPattern:
+    """
+    Enveloppe de re.Pattern : search() avec un budget (secondes) par appel.
+
+    Le moteur re garde le GIL pendant toute une recherche : aucun thread Python ne peut la
+    surveiller. On arme donc une minuterie système (SIGALRM toutes les budget/4, entre 1 et
+    50 ms) ; le moteur vérifie les signaux en cours de recherche, et le gestionnaire lève
+    l'exception si la recherche en cours a dépassé le budget. Coût par nom : une lecture
+    d'horloge. Tout se passe dans le thread principal (création, search, close).
+    timeouts : noms écartés (mode skip).
+    """
+
+    def __init__(self, rx: re.Pattern, budget: float, on_timeout: str = "fail"):
+        import signal
+        import threading
+
+        if on_timeout not in ON_TIMEOUT:
+            raise ValueError(f"on_timeout: {on_timeout}")
+        if not timeout_supported():
+            raise RuntimeError("budget de temps regex indisponible sur ce système (pas de setitimer)")
+        self._main_ident = threading.main_thread().ident
+        if get_ident() != self._main_ident:
+            raise RuntimeError("TimedPattern doit être créé dans le thread principal")
+        self.rx = rx
+        self.pattern = rx.pattern
+        self.budget = budget
+        self.on_timeout = on_timeout
+        self.timeouts: list[str] = []
+        self._busy = False
+        self._started = 0.0
+        self._name = ""
+        self._prev_handler = signal.signal(signal.SIGALRM, self._on_tick)
+        period = min(max(budget / 4, 0.001), 0.05)
+        signal.setitimer(signal.ITIMER_REAL, period, period)
+        self._closed = False
+
+    def search(self, string: str, *args):
+        if get_ident() != self._main_ident:
+            raise RuntimeError("TimedPattern.search hors du thread principal (signal impossible)")
+        self._name = string
+        self._started = perf_counter()
+        self._busy = True
+        try:
+            return self.rx.search(string, *args)
+        except RegexSkipped:
+            self.timeouts.append(string)
+            raise
+        finally:
+            self._busy = False
+
+    def _on_tick(self, signum, frame):
+        if self._busy and perf_counter() - self._started > self.budget:
+            self._busy = False  # une seule exception par recherche
+            cls = RegexSkipped if self.on_timeout == "skip" else RegexTimeout
+            raise cls(self._name, self.budget)
+
+    def close(self):
+        import signal
+
+        if self._closed:
+            return
+        self._closed = True
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, self._prev_handler)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,900 @@
+"""
+Bibliothèque du renommeur : le CLI (rename-with-prefix.py), la GUI (test3.py) et
+prefix_async.py n'en sont que des enveloppes.
+
+    from prefix_renamer import compile_rules, plan, apply
+
+    rules = compile_rules("RAG", "AI_", ignore_case=True)
+    for r in apply(plan("/data/in", rules, recursive=True), collision="number"):
+        print(r.status, r.path, "->", r.new_name)
+
+plan() et apply() sont des itérateurs paresseux : rien n'est chargé en mémoire d'avance,
+et un appel dans le même processus coûte quelques microsecondes par fichier
+(pas de démarrage d'interpréteur ni d'analyse d'arguments).
+"""
+import bisect
+import os
+import re
+from contextlib import nullcontext
+from operator import attrgetter
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, NamedTuple
+
+from prefix_fsops import (
+    DEFAULT_DIR_HANDLES,
+    DirHandleCache,
+    exists_in_dir,
+    numbered_names,
+    rename_in_dir,
+    rename_noreplace,
+    rename_numbered,
+)
+from prefix_perf import NULL_STATS, PhaseStats
+from prefix_regexguard import RegexSkipped, RegexTimeout
+from prefix_throttle import NO_LIMIT, TokenBucket
+
+# prefix_plan (dataclasses, enum, json...) ne sert qu'à la GUI : importé à la demande
+# pour garder un démarrage rapide du CLI (voir prefix_startup.py)
+if TYPE_CHECKING:
+    from prefix_budget import ScanBudget
+    from prefix_pathmatch import PathFilter
+    from prefix_plan import PlanStore, RenameItem
+
+COLLISION_MODES = ("skip", "overwrite", "number")
+LOG_FIELDNAMES = ["timestamp", "status", "old_path", "new_path", "reason", "error"]
+
+
+# -------------------------
+# Règles
+# -------------------------
+
+class Rules(NamedTuple):
+    """Règle compilée : regex + préfixe (voir compile_rules)."""
+    rx: re.Pattern
+    prefix: str
+    skip_already_prefixed: bool = True
+
+    def new_name(self, name: str) -> str | None:
+        """Nouveau nom si le fichier doit être renommé, sinon None."""
+        if self.skip_already_prefixed and name.startswith(self.prefix):
+            return None
+        if self.rx.search(name):
+            return self.prefix + name
+        return None
+
+
+def build_regex(pattern: str, ignore_case: bool, word_only: bool, as_bytes: bool = False) -> re.Pattern:
+    """
+    as_bytes : regex sur octets (noms bruts, voir iter_files_in_folder) ; le motif est encodé
+    comme les noms (os.fsencode). \\w, \\b et ignore_case ne connaissent alors que l'ASCII.
+    """
+    flags = 0 if as_bytes else re.UNICODE
+    if ignore_case:
+        flags |= re.IGNORECASE
+    if word_only and pattern:
+        pattern = r"\b" + pattern + r"\b"
+    if as_bytes:
+        pattern = os.fsencode(pattern)
+    return re.compile(pattern, flags)
+
+
+def compile_rules(
+    pattern: str,
+    prefix: str,
+    ignore_case: bool = False,
+    word_only: bool = False,
+    skip_already_prefixed: bool = True,
+    as_bytes: bool = False,
+) -> Rules:
+    """
+    Compile une règle ; lève re.error si la regex est invalide, ValueError si le préfixe est vide.
+    as_bytes : regex et préfixe en octets, new_name() prend et rend des noms bytes.
+    """
+    if not prefix:
+        raise ValueError("Le préfixe ne peut pas être vide.")
+    rx = build_regex(pattern, ignore_case, word_only, as_bytes)
+    return Rules(rx, os.fsencode(prefix) if as_bytes else prefix, skip_already_prefixed)
+
+
+def display_path(path: "str | bytes | Path") -> str:
+    """
+    Chemin affichable : octets non décodables en \\xNN (jamais de surrogate vers la console,
+    ni vers SQLite ou un JSON UTF-8 strict), qu'ils viennent d'un chemin bytes ou d'un str
+    décodé par os.fsdecode (surrogateescape).
+    """
+    if isinstance(path, bytes):
+        return path.decode("utf-8", "backslashreplace")
+    text = str(path)
+    if text.isascii():
+        return text
+    return os.fsencode(text).decode("utf-8", "backslashreplace")
+
+
+def compute_new_name(name: str, rx: re.Pattern, prefix: str) -> str | None:
+    """
+    Retourne le nouveau nom (avec préfixe) si le fichier doit être modifié, sinon None.
+    - Ajoute prefix si la regex matche le nom et que le nom ne commence pas déjà par prefix.
+    """
+    if name.startswith(prefix):
+        return None
+    if rx.search(name):
+        return prefix + name
+    return None
+
+
+# -------------------------
+# Parcours / collisions / renommage
+# -------------------------
+
+class Visited:
+    """
+    (périphérique, inode) déjà vus pendant un parcours : un set d'inodes par périphérique
+    (un int par entrée, pas de tuple), quelques dizaines d'octets par dossier.
+
+    Les dossiers sont toujours suivis : un montage bind ou un lien symbolique suivi
+    (follow_symlinks) qui ramène vers un dossier déjà parcouru est écarté, ce qui coupe
+    aussi les boucles. files=True suit aussi les fichiers : un fichier vu sous un autre
+    nom (lien physique) n'est traité qu'une fois ; ses autres noms ne sont donc pas renommés.
+    """
+    __slots__ = ("files", "dup_dirs", "dup_files", "unreadable_dirs", "_seen")
+
+    def __init__(self, files: bool = False):
+        self.files = files
+        self.dup_dirs = 0
+        self.dup_files = 0
+        self.unreadable_dirs = 0  # sous-dossiers ignorés : listage en échec (EACCES, ESTALE...)
+        self._seen: dict[int, set[int]] = {}
+
+    def add(self, dev: int, ino: int) -> bool:
+        """False si déjà vu."""
+        seen = self._seen.get(dev)
+        if seen is None:
+            seen = self._seen[dev] = set()
+        elif ino in seen:
+            return False
+        seen.add(ino)
+        return True
+
+    def add_dir(self, st: os.stat_result) -> bool:
+        if self.add(st.st_dev, st.st_ino):
+            return True
+        self.dup_dirs += 1
+        return False
+
+    def add_file(self, e: os.DirEntry, dev: int) -> bool:
+        # Fichier ordinaire : d_ino (sans stat) et le périphérique de son dossier
+        if e.is_symlink():
+            st = e.stat()
+            dev, ino = st.st_dev, st.st_ino
+        else:
+            ino = e.inode()
+        if self.add(dev, ino):
+            return True
+        self.dup_files += 1
+        return False
+
+    def summary(self) -> str:
+        return f"{self.dup_dirs} dossier(s), {self.dup_files} fichier(s)"
+
+
+class Excluded(NamedTuple):
+    """Fichiers écartés dès le parcours (voir excluded())."""
+    names: frozenset
+    paths: frozenset
+
+    def __contains__(self, e: os.DirEntry) -> bool:
+        # Nom d'abord : un abspath seulement pour un homonyme
+        return e.name in self.names and os.path.abspath(e.path) in self.paths
+
+
+def excluded(paths: Iterable) -> Excluded | None:
+    """
+    Fichiers que le parcours ne doit jamais produire : log CSV ou plan écrits dans le dossier
+    parcouru. Écartés avant tout comptage (limites --max-files comprises). None si aucun.
+    Chemins str, ou bytes pour un parcours as_bytes.
+    """
+    paths = [os.path.abspath(os.fspath(p)) for p in paths if p is not None]
+    if not paths:
+        return None
+    return Excluded(frozenset(os.path.basename(p) for p in paths), frozenset(paths))
+
+
+def list_dir(d: "str | bytes", list_limiter: TokenBucket = NO_LIMIT) -> list[os.DirEntry]:
+    """Un listage de dossier (un jeton de list_limiter) ; lève OSError si illisible."""
+    list_limiter.acquire()
+    with os.scandir(d) as it:
+        return list(it)
+
+
+def split_entries(
+    entries: list[os.DirEntry],
+    dev: int,
+    visited: Visited,
+    descend: bool,
+    follow_symlinks: bool = False,
+    dir_filter: "PathFilter | None" = None,
+    root_len: int = 0,
+    exclude: Excluded | None = None,
+) -> tuple[list[os.DirEntry], list[tuple]]:
+    """
+    Tri d'un listage : (fichiers retenus, sous-dossiers à parcourir [(chemin, périphérique)]).
+    Fichiers doublons écartés si visited.files ; sous-dossiers seulement si descend, filtrés par
+    dir_filter (chemin relatif : e.path[root_len:]) puis par visited (un stat chacun : montages
+    bind, boucles de liens). exclude : fichiers jamais retenus (voir excluded()).
+    Entrées illisibles ignorées.
+    """
+    files = []
+    subdirs = []
+    for e in entries:
+        try:
+            if e.is_file():
+                if exclude is not None and e in exclude:
+                    continue
+                if not visited.files or visited.add_file(e, dev):
+                    files.append(e)
+            elif descend and e.is_dir(follow_symlinks=follow_symlinks):
+                if dir_filter is not None and not dir_filter.keep_dir(e.path[root_len:]):
+                    continue
+                st = e.stat(follow_symlinks=follow_symlinks)
+                if visited.add_dir(st):
+                    subdirs.append((e.path, st.st_dev))
+        except OSError:
+            continue
+    return files, subdirs
+
+
+def iter_files_in_folder(
+    folder: Path,
+    recursive: bool,
+    list_limiter: TokenBucket = NO_LIMIT,
+    follow_symlinks: bool = False,
+    visited: Visited | None = None,
+    dir_filter: "PathFilter | None" = None,
+    max_depth: int | None = None,
+    as_bytes: bool = False,
+    exclude: Excluded | None = None,
+    stop: Callable[[], bool] | None = None,
+):
+    """
+    Itère sur les fichiers d'un dossier (récursif ou non).
+    Un os.scandir par dossier (type d'entrée sans stat supplémentaire) ; list_limiter
+    borne le nombre de listages par seconde. Sous-dossiers illisibles (toute OSError du
+    listage) ignorés et comptés dans visited.unreadable_dirs ; liens vers
+    des dossiers suivis seulement avec follow_symlinks.
+    visited : dossiers (et fichiers si visited.files) déjà vus, un stat par sous-dossier
+    (voir Visited) ; créé ici si absent.
+    dir_filter : sous-dossiers écartés sans être listés (voir prefix_pathmatch.PathFilter).
+    max_depth : niveaux de sous-dossiers parcourus sous folder (0 = folder seul, None = tous).
+    as_bytes : chemins bytes bruts tels que rendus par le système (pas de décodage ni de
+    Path par fichier) au lieu de Path ; dir_filter doit alors être None.
+    exclude : fichiers jamais produits (voir excluded()).
+    stop : appelé avant chaque listage de dossier ; True arrête le parcours (ScanBudget.expired :
+    --max-seconds tient aussi sur un arbre de dossiers sans fichiers, où rien n'est produit).
+    """
+    if visited is None:
+        visited = Visited()
+    root = os.fsencode(folder) if as_bytes else str(folder)
+    root_len = len(os.path.join(root, root[:0]))  # root[:0] : "" ou b""
+    dev = 0
+    if recursive or visited.files:
+        st = os.stat(root)
+        visited.add_dir(st)
+        dev = st.st_dev
+    stack = [(root, dev, 0)]
+    while stack:
+        if stop is not None and stop():
+            return
+        d, dev, depth = stack.pop()
+        descend = recursive and (max_depth is None or depth < max_depth)
+        try:
+            entries = list_dir(d, list_limiter)
+        except OSError:
+            if d == root:
+                raise
+            visited.unreadable_dirs += 1
+            continue
+        files, subdirs = split_entries(entries, dev, visited, descend, follow_symlinks, dir_filter, root_len, exclude)
+        if as_bytes:
+            for e in files:
+                yield e.path
+        else:
+            for e in files:
+                yield Path(e.path)
+        for sub, sub_dev in subdirs:
+            stack.append((sub, sub_dev, depth + 1))
+
+
+def _sorted_entries(d: str, list_limiter: TokenBucket) -> list[os.DirEntry]:
+    list_limiter.acquire()
+    with os.scandir(d) as it:
+        return sorted(it, key=lambda e: e.name)
+
+
+def iter_files_sorted(
+    folder: Path,
+    recursive: bool,
+    list_limiter: TokenBucket = NO_LIMIT,
+    start_after: tuple[str, ...] = (),
+    follow_symlinks: bool = False,
+    visited: Visited | None = None,
+    dir_filter: "PathFilter | None" = None,
+    max_depth: int | None = None,
+    exclude: Excluded | None = None,
+    stop: Callable[[], bool] | None = None,
+):
+    """
+    Parcours déterministe : fichiers dans l'ordre lexicographique de leurs chemins relatifs
+    (composant par composant, fichiers et dossiers mêlés par nom).
+
+    start_after : composants du dernier fichier traité (point de reprise). On redescend
+    seulement le long de ce chemin et on saute, à chaque niveau, les entrées qui le précèdent :
+    les sous-arbres déjà parcourus ne sont jamais relistés (travail en O(restant)).
+    Leurs inodes ne sont donc pas dans visited : un doublon (montage bind) d'un sous-arbre
+    traité avant l'interruption est reparcouru.
+    stop : voir iter_files_in_folder.
+    """
+    if visited is None:
+        visited = Visited()
+    # Pile (itérateur, périphérique) par niveau ; le sommet est le dossier en cours
+    stack = []
+    d = str(folder)
+    root_len = len(os.path.join(d, ""))
+    for depth, comp in enumerate(start_after):
+        try:
+            st = os.stat(d)
+            entries = _sorted_entries(d, list_limiter)
+        except OSError:
+            if depth == 0:
+                raise
+            # Dossier de la position de reprise devenu illisible : on repart de son parent
+            visited.unreadable_dirs += 1
+            break
+        visited.add_dir(st)
+        i = bisect.bisect_right([e.name for e in entries], comp)
+        stack.append((iter(entries[i:]), st.st_dev))
+        child = os.path.join(d, comp)
+        if not recursive or depth == len(start_after) - 1 or not os.path.isdir(child):
+            break
+        if max_depth is not None and depth >= max_depth:
+            break
+        if os.path.islink(child) and not follow_symlinks:
+            break
+        d = child
+    if not start_after:
+        st = os.stat(d)
+        visited.add_dir(st)
+        stack.append((iter(_sorted_entries(d, list_limiter)), st.st_dev))
+
+    while stack:
+        it, dev = stack[-1]
+        e = next(it, None)
+        if e is None:
+            stack.pop()
+            continue
+        try:
+            if e.is_file():
+                if exclude is not None and e in exclude:
+                    continue
+                if not visited.files or visited.add_file(e, dev):
+                    yield Path(e.path)
+            elif recursive and e.is_dir(follow_symlinks=follow_symlinks):
+                # Le sommet de pile liste un dossier de profondeur len(stack) - 1
+                if max_depth is not None and len(stack) > max_depth:
+                    continue
+                if dir_filter is not None and not dir_filter.keep_dir(e.path[root_len:]):
+                    continue
+                st = e.stat(follow_symlinks=follow_symlinks)
+                if not visited.add_dir(st):
+                    continue
+                if stop is not None and stop():
+                    return
+                try:
+                    stack.append((iter(_sorted_entries(e.path, list_limiter)), st.st_dev))
+                except OSError:
+                    visited.unreadable_dirs += 1
+                    continue
+        except OSError:
+            continue
+
+
+def make_unique_name(
+    folder: str | bytes | Path,
+    desired_name: str | bytes,
+    dirs: DirHandleCache | None = None,
+    reserved: set | None = None,
+):
+    """
+    Génère un nom unique dans le dossier en ajoutant " (n)" avant l'extension.
+    Exemple : AI_file.txt -> AI_file (1).txt (noms str, ou bytes avec un dossier bytes)
+    reserved : noms déjà promis dans ce dossier, traités comme existants.
+    """
+    folder = folder if isinstance(folder, bytes) else str(folder)
+    for candidate in numbered_names(desired_name):
+        if reserved is not None and candidate in reserved:
+            continue
+        if not exists_in_dir(dirs, folder, candidate):
+            return candidate
+
+
+class PlannedRename(NamedTuple):
+    path: Path | bytes
+    new_name: str | bytes | None
+    reason: str = "match"   # "match" | "no_match" | "regex_timeout" | "stale" : seul "match" est renommé
+    message: str = ""       # pour les autres raisons (voir held_result)
+
+
+class RenameResult(NamedTuple):
+    path: Path | bytes
+    new_name: str | bytes | None   # nom final (ajusté en mode "number")
+    status: str     # "DRY_RUN" | "RENAMED" | "SKIP" | "ERROR" | "NOMATCH"
+    message: str
+    reason: str = "match"   # raison du PlannedRename d'origine (colonne reason du log)
+
+
+# Éléments du plan non renommés : statut de leur résultat
+_HELD_STATUS = {"no_match": "NOMATCH", "regex_timeout": "ERROR", "stale": "SKIP"}
+
+
+def rename_file(
+    path: Path | bytes,
+    new_name: str | bytes,
+    dry_run: bool,
+    collision: str,
+    stats: PhaseStats = NULL_STATS,
+    dirs: DirHandleCache | None = None,
+    reserved: set | None = None,
+) -> RenameResult:
+    """
+    Renomme un fichier vers new_name dans le même dossier.
+    status ∈ {"DRY_RUN","RENAMED","SKIP","ERROR"}
+
+    collision:
+      - skip      : ignore si la cible existe
+      - overwrite : remplace la cible existante
+      - number    : rend le nom unique (AI_x (1).ext)
+
+    stats: reçoit les temps des phases "collision" (sondage) et "rename" (appel système).
+    dirs : descripteurs de dossiers réutilisés (renameat relatif) ; None = chemins complets.
+    path bytes (mode octets) : new_name bytes aussi, rien n'est décodé sauf pour les messages.
+    reserved (dry-run) : noms déjà promis dans ce dossier par d'autres simulations, traités
+    comme existants ; le nom retenu y est ajouté (voir prefix_async, lots en parallèle).
+
+    Hors dry-run, skip/number ne sondent pas la cible : le renommage sans écrasement
+    (renameat2 RENAME_NOREPLACE sous Linux) échoue en EEXIST, ce qui déclenche le skip
+    ou le nom suivant. Pas de fenêtre entre exists() et rename() où un fichier apparu
+    entre-temps serait écrasé.
+    """
+    if isinstance(path, bytes):
+        folder, name = os.path.split(path)
+        show = display_path
+    else:
+        folder, name = str(path.parent), path.name
+        show = str
+
+    if dry_run:
+        # Collision : en simulation on sonde pour afficher le nom final
+        t0 = perf_counter()
+        try:
+            if (reserved is not None and new_name in reserved) or exists_in_dir(dirs, folder, new_name):
+                if collision == "skip":
+                    return RenameResult(path, new_name, "SKIP", f"[SKIP] Cible existe déjà: {show(os.path.join(folder, new_name))}")
+                if collision == "number":
+                    new_name = make_unique_name(folder, new_name, dirs, reserved)
+                # overwrite : on garde le même nom cible
+        except OSError as e:
+            # Sondage en échec (EACCES, ESTALE...) : erreur de ce fichier, la simulation continue
+            return RenameResult(path, new_name, "ERROR", f"[ERR]  {show(path)} : {e}")
+        finally:
+            stats.add("collision", perf_counter() - t0)
+        if reserved is not None:
+            reserved.add(new_name)
+        # En dry-run, on affiche le target final (y compris si "number" a modifié le nom)
+        return RenameResult(path, new_name, "DRY_RUN", f"[DRY]  {show(name)} -> {show(new_name)}")
+
+    t0 = perf_counter()
+    try:
+        if collision == "overwrite":
+            # os.replace remplace si existe (comportement “overwrite”)
+            rename_in_dir(dirs, folder, name, new_name, replace=True)
+        elif collision == "number":
+            new_name = rename_numbered(dirs, folder, name, new_name)
+        else:
+            rename_noreplace(dirs, folder, name, new_name)
+        return RenameResult(path, new_name, "RENAMED", f"[OK]   {show(name)} -> {show(new_name)}")
+    except FileExistsError:
+        return RenameResult(path, new_name, "SKIP", f"[SKIP] Cible existe déjà: {show(os.path.join(folder, new_name))}")
+    except Exception as e:
+        return RenameResult(path, new_name, "ERROR", f"[ERR]  {show(path)} : {e}")
+    finally:
+        stats.add("rename", perf_counter() - t0)
+
+
+def rename_path(
+    path: Path,
+    new_name: str,
+    dry_run: bool,
+    collision: str,
+    stats: PhaseStats = NULL_STATS,
+    dirs: DirHandleCache | None = None,
+) -> tuple[str, str]:
+    """Comme rename_file, mais retourne seulement (status, message)."""
+    r = rename_file(path, new_name, dry_run, collision, stats, dirs)
+    return r.status, r.message
+
+
+# -------------------------
+# API : plan / apply
+# -------------------------
+
+def walk_files(
+    root: str | bytes | Path,
+    recursive: bool = False,
+    stats: PhaseStats = NULL_STATS,
+    list_limiter: TokenBucket = NO_LIMIT,
+    follow_symlinks: bool = False,
+    visited: Visited | None = None,
+    path_filter: "PathFilter | None" = None,
+    budget: "ScanBudget | None" = None,
+    exclude: Excluded | None = None,
+    ordered: bool = False,
+    start_after: tuple[str, ...] = (),
+    as_bytes: bool = False,
+) -> Iterator[Path | bytes]:
+    """
+    Fichiers examinés par plan() sous root (dossier ou fichier unique) : son premier étage,
+    séparable de la correspondance (matcher) pour faire tourner chacun dans son thread.
+    Options : voir plan().
+    """
+    root = os.fsencode(root) if as_bytes else Path(root)
+    if os.path.isfile(root):
+        return iter((root,))
+    max_depth = budget.max_depth if budget is not None else None
+    stop = budget.expired if budget is not None and budget.max_seconds else None
+    if ordered:
+        walk = iter_files_sorted(
+            root, recursive, list_limiter, start_after, follow_symlinks, visited, path_filter, max_depth, exclude,
+            stop,
+        )
+    else:
+        walk = iter_files_in_folder(
+            root, recursive, list_limiter, follow_symlinks, visited, path_filter, max_depth, as_bytes, exclude,
+            stop,
+        )
+    files = stats.timed_iter(walk, "walk")
+    if budget is not None and budget.active:
+        files = budget.limit(files)
+    return files
+
+
+def matcher(
+    root: str | bytes | Path,
+    rules: Rules,
+    stats: PhaseStats = NULL_STATS,
+    path_filter: "PathFilter | None" = None,
+    keep_unmatched: bool = False,
+    on_unmatched: Callable | None = None,
+    as_bytes: bool = False,
+) -> Callable[[Path | bytes], PlannedRename | None]:
+    """
+    Second étage de plan() : match(p) teste un fichier de walk_files(root, ...) et retourne
+    son PlannedRename, ou None pour un fichier écarté (on_unmatched(p) appelé).
+    Utilisable seul comme étage (ex: --pipeline du CLI). Options : voir plan().
+    """
+    if as_bytes:
+        root = os.fsencode(root)
+        name_of = os.path.basename
+    else:
+        root = Path(root)
+        name_of = attrgetter("name")
+    if path_filter is not None and os.path.isfile(root):
+        path_filter = None
+    root_s = os.fspath(root)
+    root_len = len(os.path.join(root_s, root_s[:0]))
+    new_name_of = rules.new_name
+
+    def match(p):
+        name = name_of(p)
+        t0 = perf_counter()
+        try:
+            new_name = new_name_of(name)
+        except RegexSkipped as e:
+            stats.add("match", perf_counter() - t0)
+            return PlannedRename(p, name, "regex_timeout", f"[ERR] Regex trop lente (> {e.budget * 1000:g} ms), "
+                                 f"fichier ignoré : {display_path(p)}")
+        except RegexTimeout as e:
+            e.path = p
+            raise
+        if new_name is not None and path_filter is not None and not path_filter.matches(str(p)[root_len:]):
+            new_name = None
+        stats.add("match", perf_counter() - t0)
+        if new_name is not None:
+            return PlannedRename(p, new_name)
+        if keep_unmatched:
+            return PlannedRename(p, None, "no_match")
+        if on_unmatched is not None:
+            on_unmatched(p)
+        return None
+
+    return match
+
+
+def plan(
+    root: str | bytes | Path,
+    rules: Rules,
+    recursive: bool = False,
+    stats: PhaseStats = NULL_STATS,
+    list_limiter: TokenBucket = NO_LIMIT,
+    follow_symlinks: bool = False,
+    visited: Visited | None = None,
+    path_filter: "PathFilter | None" = None,
+    budget: "ScanBudget | None" = None,
+    exclude: Excluded | None = None,
+    ordered: bool = False,
+    start_after: tuple[str, ...] = (),
+    keep_unmatched: bool = False,
+    on_unmatched: Callable | None = None,
+    as_bytes: bool = False,
+) -> Iterator[PlannedRename]:
+    """
+    Renommages prévus sous root (dossier ou fichier unique), au fil du parcours :
+    walk_files() puis matcher(), dans le même thread.
+    visited : voir Visited (doublons écartés lisibles après le parcours).
+    path_filter : condition en plus sur le chemin relatif à root (dossier), avec élagage.
+    budget : limites de fichiers / durée / profondeur (budget.partial après coup).
+    exclude : fichiers jamais produits ni comptés par le budget (voir excluded()).
+    ordered : parcours trié (iter_files_sorted), repris après start_after (point de reprise).
+    keep_unmatched : produit aussi les fichiers non retenus (reason "no_match", new_name None) ;
+    sinon on_unmatched(path), si fourni, est appelé pour chacun (comptage).
+    as_bytes : chemins et noms bytes (rules compilées avec as_bytes).
+
+    Nom dont la regex dépasse son budget (RegexSkipped, voir TimedPattern) : reason
+    "regex_timeout". RegexTimeout (mode fail) remonte, avec le chemin en cause dans e.path.
+    """
+    match = matcher(root, rules, stats, path_filter, keep_unmatched, on_unmatched, as_bytes)
+    for p in walk_files(
+        root, recursive, stats, list_limiter, follow_symlinks, visited, path_filter, budget, exclude,
+        ordered, start_after, as_bytes,
+    ):
+        item = match(p)
+        if item is not None:
+            yield item
+
+
+def held_result(item: PlannedRename) -> RenameResult:
+    """Résultat d'un élément du plan qui n'est pas à renommer (reason autre que "match")."""
+    return RenameResult(item.path, item.new_name, _HELD_STATUS[item.reason], item.message, item.reason)
+
+
+def apply_one(
+    item: PlannedRename,
+    dry_run: bool = False,
+    collision: str = "skip",
+    stats: PhaseStats = NULL_STATS,
+    dirs: DirHandleCache | None = None,
+    rename_limiter: TokenBucket = NO_LIMIT,
+    reserved: set | None = None,
+) -> RenameResult:
+    """
+    Un élément de apply(), utilisable seul comme étage (ex: --pipeline du CLI).
+    reserved : voir rename_file (simulations en parallèle, prefix_async).
+    """
+    if item.reason != "match":
+        return held_result(item)
+    if not dry_run:
+        rename_limiter.acquire()
+    return rename_file(item.path, item.new_name, dry_run, collision, stats, dirs, reserved)
+
+
+def apply(
+    items: Iterable[PlannedRename],
+    dry_run: bool = False,
+    collision: str = "skip",
+    stats: PhaseStats = NULL_STATS,
+    dir_handles: int = DEFAULT_DIR_HANDLES,
+    rename_limiter: TokenBucket = NO_LIMIT,
+    dirs: DirHandleCache | None = None,
+) -> Iterator[RenameResult]:
+    """
+    Applique des renommages (ex: plan(...)) et produit un RenameResult par élément
+    (ceux qui ne sont pas à renommer passent par held_result).
+    rename_limiter : borne les renommages par seconde (ignoré en dry-run).
+    dirs : cache de dossiers de l'appelant ; sinon un cache de dir_handles descripteurs.
+    """
+    if collision not in COLLISION_MODES:
+        raise ValueError(f"Gestion de collision inconnue: {collision}")
+    with nullcontext(dirs) if dirs is not None else DirHandleCache(dir_handles) as dirs:
+        for item in items:
+            yield apply_one(item, dry_run, collision, stats, dirs, rename_limiter)
+
+
+# -------------------------
+# Plan détaillé (aperçu GUI)
+# -------------------------
+
+def plan_rename_for_path(
+    path: str,
+    rx: re.Pattern,
+    prefix: str,
+    skip_already_prefixed: bool,
+    collision_mode: str,  # "skip" | "overwrite" | "number"
+    stats: PhaseStats = NULL_STATS,
+) -> "RenameItem":
+    from prefix_plan import RenameItem
+
+    name = os.path.basename(path)
+
+    if skip_already_prefixed and name.startswith(prefix):
+        return RenameItem(path, name, name, "already_prefixed", False)
+
+    t0 = perf_counter()
+    try:
+        matched = rx.search(name)
+    except RegexSkipped:  # TimedPattern en mode skip : nom écarté, signalé dans l'aperçu
+        return RenameItem(path, name, name, "regex_timeout", False)
+    finally:
+        stats.add("match", perf_counter() - t0)
+
+    if matched:
+        desired = prefix + name
+        folder = os.path.dirname(path)
+        new_name = desired
+
+        t0 = perf_counter()
+        try:
+            if exists_in_dir(None, folder, new_name):
+                if collision_mode == "skip":
+                    return RenameItem(path, name, new_name, "collision_skip", False)
+                if collision_mode == "overwrite":
+                    return RenameItem(path, name, new_name, "match_overwrite", True)
+                if collision_mode == "number":
+                    unique = make_unique_name(folder, desired)
+                    return RenameItem(path, name, unique, "match_numbered", True)
+        finally:
+            stats.add("collision", perf_counter() - t0)
+
+        return RenameItem(path, name, new_name, "match", True)
+
+    return RenameItem(path, name, name, "no_match", False)
+
+
+def scan_folder(
+    folder: str,
+    rx: re.Pattern,
+    prefix: str,
+    recursive: bool,
+    skip_already_prefixed: bool,
+    collision_mode: str,
+    stats: PhaseStats = NULL_STATS,
+    keep_unmatched: bool = True,
+    list_limiter: TokenBucket = NO_LIMIT,
+    visited: Visited | None = None,
+    budget: "ScanBudget | None" = None,
+    items: "PlanStore | None" = None,
+) -> "PlanStore":
+    """
+    budget : aperçu borné (fichiers / durée / profondeur) ; items.partial dit où il s'est arrêté.
+    items : PlanStore à remplir (défaut : un nouveau), ex. un store qui envoie ses lots à la GUI.
+    """
+    from prefix_plan import PlanStore
+
+    if items is None:
+        items = PlanStore(prefix, keep_unmatched)
+    if recursive:
+        # Même parcours que le CLI : dossiers déjà vus (montage bind, boucle) écartés
+        max_depth = budget.max_depth if budget is not None else None
+        stop = budget.expired if budget is not None and budget.max_seconds else None
+        walk = iter_files_in_folder(Path(folder), True, list_limiter, visited=visited, max_depth=max_depth, stop=stop)
+        paths = (str(p) for p in stats.timed_iter(walk, "walk"))
+    else:
+        def listdir_files():
+            list_limiter.acquire()
+            for f in stats.timed_iter(os.listdir(folder), "walk"):
+                p = os.path.join(folder, f)
+                t0 = perf_counter()
+                is_file = os.path.isfile(p)
+                stats.add("walk", perf_counter() - t0, 0)
+                if is_file:
+                    yield p
+
+        paths = listdir_files()
+    if budget is not None and budget.active:
+        paths = budget.limit(paths)
+    for p in paths:
+        items.append(plan_rename_for_path(p, rx, prefix, skip_already_prefixed, collision_mode, stats))
+    if budget is not None:
+        items.partial = budget.marker()
+    return items
+
+
+def scan_files(
+    files: list[str],
+    rx: re.Pattern,
+    prefix: str,
+    skip_already_prefixed: bool,
+    collision_mode: str,
+    stats: PhaseStats = NULL_STATS,
+    keep_unmatched: bool = True,
+    items: "PlanStore | None" = None,
+) -> "PlanStore":
+    from prefix_plan import PlanStore
+
+    if items is None:
+        items = PlanStore(prefix, keep_unmatched)
+    for p in files:
+        if os.path.isfile(p):
+            items.append(plan_rename_for_path(p, rx, prefix, skip_already_prefixed, collision_mode, stats))
+    return items
+
+
+def rename_item(
+    dirs: DirHandleCache | None,
+    it: "RenameItem",
+    collision_mode: str,
+    prefix: str,
+) -> tuple[str, str, str]:
+    """
+    Exécute un RenameItem planifié (GUI). Retourne (status, nouveau nom final, erreur).
+    Une cible apparue depuis la prévisualisation n'est jamais écrasée (sauf overwrite) :
+    skip -> "SKIP", number -> nom " (n)" suivant.
+    """
+    folder = os.path.dirname(it.old_path)
+    try:
+        if collision_mode == "overwrite":
+            rename_in_dir(dirs, folder, it.old_name, it.new_name, replace=True)
+            return "RENAMED", it.new_name, ""
+        try:
+            rename_noreplace(dirs, folder, it.old_name, it.new_name)
+            return "RENAMED", it.new_name, ""
+        except FileExistsError:
+            if collision_mode != "number":
+                return "SKIP", it.new_name, "Cible apparue depuis la prévisualisation"
+            return "RENAMED", rename_numbered(dirs, folder, it.old_name, prefix + it.old_name), ""
+    except Exception as e:
+        return "ERROR", it.new_name, str(e)
+
+
+# -------------------------
+# Log CSV
+# -------------------------
+
+def write_csv_log(log_path: str | Path, rows: list[dict]):
+    """Écrit un log CSV (UTF-8 ; noms non décodables réécrits octet pour octet)."""
+    folder = os.path.dirname(log_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    import csv
+
+    with open(log_path, "w", newline="", encoding="utf-8", errors="surrogateescape") as f:
+        w = csv.DictWriter(f, fieldnames=LOG_FIELDNAMES)
+        w.writeheader()
+        for r in rows:
+            w.writerow(r)
+
+
+class CsvLogStream:
+    """
+    Log CSV écrit au fil de l'eau (mode --pipeline) : même interface que la liste log_rows
+    (append / len), mais mémoire constante.
+    """
+
+    def __init__(self, log_path: Path, stats: PhaseStats = NULL_STATS):
+        import csv
+
+        self.stats = stats
+        self.count = 0
+        self._f = open(log_path, "w", newline="", encoding="utf-8", errors="surrogateescape")
+        self._w = csv.DictWriter(self._f, fieldnames=LOG_FIELDNAMES)
+        self._w.writeheader()
+
+    def append(self, row: dict):
+        t0 = perf_counter()
+        self._w.writerow(row)
+        self.stats.add("log", perf_counter() - t0)
+        self.count += 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        self._f.close()
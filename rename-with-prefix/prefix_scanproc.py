@@ -0,0 +1,202 @@
+"""
+Scan et planification de la GUI dans un processus fils.
+
+Le matching regex (plan_rename_for_path) est du calcul pur : dans un thread, il dispute le GIL
+à Tk et la fenêtre saccade. Ici le fils parcourt et planifie, et renvoie le plan par lots
+colonnaires compacts (PlanStore.take_batch : octets bruts, un dossier envoyé une seule fois)
+sur un Pipe ; la GUI les intègre par petites tranches depuis after(), sans jamais bloquer.
+
+    proc = ScanProcess(request)
+    ...                          # dans une boucle after()
+    if proc.poll():
+        items, result, error = proc.items, proc.result, proc.error
+
+Le fils ne garde qu'un lot en mémoire : le plan complet n'existe que côté GUI.
+"""
+from time import perf_counter
+from typing import NamedTuple
+
+from prefix_plan import PlanStore, RenameItem
+
+BATCH_ITEMS = 20_000   # éléments par lot au plus
+BATCH_SECONDS = 0.2    # ... ou un lot au moins toutes les 0,2 s (progression fluide)
+CHECK_EVERY = 1024     # fréquence du test de taille / durée, pour ne pas lire l'horloge à chaque fichier
+
+
+class ScanRequest(NamedTuple):
+    """Paramètres d'un scan (picklable : envoyés au fils tels quels)."""
+    folder: str | None          # mode dossier ; None = mode fichiers
+    files: list[str]
+    pattern: str
+    ignore_case: bool
+    word_only: bool
+    prefix: str
+    recursive: bool
+    skip_prefixed: bool
+    collision_mode: str
+    keep_unmatched: bool
+    max_listings: float = 0.0
+    max_files: int = 0
+    max_seconds: float = 0.0
+    max_depth: int | None = None
+    profile_path: str | None = None
+    regex_timeout: float = 0.0  # budget par nom en secondes (0 = illimité ; dépassement = nom écarté)
+
+
+# -------------------------
+# Côté fils
+# -------------------------
+
+class _PipeStore(PlanStore):
+    """PlanStore qui envoie ses éléments par lots au lieu de les garder."""
+
+    def __init__(self, conn, prefix: str, keep_unmatched: bool):
+        super().__init__(prefix, keep_unmatched)
+        self.conn = conn
+        self.scanned = 0
+        self._next_check = CHECK_EVERY
+        self._last_send = perf_counter()
+
+    def append(self, item: RenameItem):
+        super().append(item)
+        self.scanned += 1
+        if self.scanned >= self._next_check:
+            self._next_check = self.scanned + CHECK_EVERY
+            if len(self) >= BATCH_ITEMS or perf_counter() - self._last_send >= BATCH_SECONDS:
+                self.send()
+
+    def send(self):
+        self.conn.send(("batch", self.take_batch()))
+        self._last_send = perf_counter()
+
+
+def _scan(req: ScanRequest, conn) -> dict:
+    from prefix_budget import ScanBudget
+    from prefix_perf import PhaseStats, Profiler
+    from prefix_renamer import Visited, build_regex, scan_files, scan_folder
+    from prefix_throttle import make_bucket
+
+    rx = build_regex(req.pattern, req.ignore_case, req.word_only)
+    stats = PhaseStats()
+    list_limiter = make_bucket(req.max_listings, stats, "throttle_list")
+    visited = Visited()
+    budget = ScanBudget(req.max_files, req.max_seconds, req.max_depth)
+    store = _PipeStore(conn, req.prefix, req.keep_unmatched)
+    timed_rx = None
+    if req.regex_timeout:
+        from prefix_regexguard import TimedPattern
+
+        # Le scan tourne dans le thread principal du fils : la minuterie peut l'interrompre
+        rx = timed_rx = TimedPattern(rx, req.regex_timeout, "skip")
+
+    # cProfile ne suit que le processus courant : le profil est démarré ici, dans le fils
+    try:
+        with Profiler(req.profile_path):
+            if req.folder is not None:
+                scan_folder(
+                    folder=req.folder,
+                    rx=rx,
+                    prefix=req.prefix,
+                    recursive=req.recursive,
+                    skip_already_prefixed=req.skip_prefixed,
+                    collision_mode=req.collision_mode,
+                    stats=stats,
+                    keep_unmatched=req.keep_unmatched,
+                    list_limiter=list_limiter,
+                    visited=visited,
+                    budget=budget,
+                    items=store,
+                )
+            else:
+                scan_files(
+                    files=req.files,
+                    rx=rx,
+                    prefix=req.prefix,
+                    skip_already_prefixed=req.skip_prefixed,
+                    collision_mode=req.collision_mode,
+                    stats=stats,
+                    keep_unmatched=req.keep_unmatched,
+                    items=store,
+                )
+    finally:
+        if timed_rx is not None:
+            timed_rx.close()
+    store.send()
+    return {
+        "stats": stats.compact(),
+        "throttled": list_limiter.throttled_seconds,
+        "dup_dirs": visited.dup_dirs,
+        "unreadable_dirs": visited.unreadable_dirs,
+        "partial": store.partial,
+        "partial_text": budget.marker_text(),
+        "regex_timeouts": len(timed_rx.timeouts) if timed_rx is not None else 0,
+    }
+
+
+def _child_main(req: ScanRequest, conn):
+    try:
+        result = _scan(req, conn)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    else:
+        conn.send(("done", result))
+    finally:
+        conn.close()
+
+
+# -------------------------
+# Côté GUI
+# -------------------------
+
+class ScanProcess:
+    """
+    Lance le scan dans un processus fils ; poll() intègre les lots reçus dans items.
+    Après la fin : result (dict de _scan) ou error (message), jamais les deux.
+    """
+
+    def __init__(self, req: ScanRequest):
+        import multiprocessing
+
+        # spawn : fork après Tk n'est pas sûr (et c'est le seul mode sous Windows)
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe(duplex=False)
+        self.proc = ctx.Process(target=_child_main, args=(req, child_conn), daemon=True)
+        self.proc.start()
+        child_conn.close()  # sinon la fin du fils ne serait jamais vue (EOF)
+        self.items = PlanStore(req.prefix, req.keep_unmatched)
+        self.result: dict | None = None
+        self.error: str | None = None
+        self.done = False
+
+    def poll(self, max_seconds: float = 0.015) -> bool:
+        """Intègre les lots disponibles, au plus max_seconds ; True quand le scan est terminé."""
+        deadline = perf_counter() + max_seconds
+        while not self.done and self._conn.poll():
+            try:
+                msg, payload = self._conn.recv()
+            except EOFError:
+                self.error = f"le processus de scan s'est arrêté (code {self.proc.exitcode})"
+                self._finish()
+                break
+            if msg == "batch":
+                self.items.extend_batch(payload)
+            elif msg == "done":
+                self.result = payload
+                self.items.partial = payload["partial"]
+                self._finish()
+            elif msg == "error":
+                self.error = payload
+                self._finish()
+            if perf_counter() >= deadline:
+                break
+        return self.done
+
+    def cancel(self):
+        if not self.done:
+            self.proc.terminate()
+            self._finish()
+
+    def _finish(self):
+        self.done = True
+        self._conn.close()
+        self.proc.join(timeout=2)
@@ -0,0 +1,205 @@
+"""
+Système de fichiers « lent » pour les tests et benchmarks : latence, gigue et erreurs
+(EBUSY, ESTALE...) injectées dans les appels os utilisés par le CLI et la GUI, pour mesurer
+sur un portable le comportement face à un NAS.
+
+    python prefix_slowfs.py --latency-ms 2 --jitter-ms 1 -- rename-with-prefix.py --path ./t --recursive --dry-run --yes
+    python prefix_slowfs.py --list-latency-ms 20 --error-rate 0.01 -- test3.py
+
+    with SlowFS(SlowFSConfig(latency_ms=2)) as fs:     # dans un script / prefix_bench.py
+        ...
+    print(fs.summary())
+
+Appels couverts (pathlib et os.path passent par eux) :
+- list   : os.scandir, os.listdir (donc os.walk) — une latence par listage
+- meta   : os.stat, os.lstat, os.fstat, os.open (descripteurs de dossiers)
+- rename : os.rename, os.replace, renameat2 (prefix_fsops)
+Les méthodes des DirEntry (is_file, stat) ne sont pas ralenties : sur un NAS, le type vient
+avec le listage. Même graine -> même suite de latences et d'erreurs (à ordre d'appels égal).
+"""
+import argparse
+import errno
+import os
+import random
+import runpy
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+import prefix_fsops
+
+OPS = ("list", "meta", "rename")
+ERRORS = {
+    "EBUSY": errno.EBUSY,
+    "ESTALE": getattr(errno, "ESTALE", 116),
+    "EIO": errno.EIO,
+    "EAGAIN": errno.EAGAIN,
+}
+
+_PATCHED = {
+    "list": ("scandir", "listdir"),
+    "meta": ("stat", "lstat", "fstat", "open"),
+    "rename": ("rename", "replace"),
+}
+
+
+class SlowFSConfig(NamedTuple):
+    latency_ms: float = 0.0                    # latence par appel (toutes catégories)
+    jitter_ms: float = 0.0                     # + uniforme [0, jitter]
+    list_latency_ms: float | None = None       # remplace latency_ms pour "list"
+    meta_latency_ms: float | None = None
+    rename_latency_ms: float | None = None
+    error_rate: float = 0.0                    # probabilité d'erreur par appel
+    errors: tuple[str, ...] = ("EBUSY", "ESTALE")
+    error_ops: tuple[str, ...] = ("rename",)   # catégories où injecter les erreurs
+    seed: int = 42
+
+    def latency_s(self, op: str) -> float:
+        specific = getattr(self, f"{op}_latency_ms")
+        return (self.latency_ms if specific is None else specific) / 1000
+
+    def as_dict(self) -> dict:
+        return {k: (list(v) if isinstance(v, tuple) else v) for k, v in self._asdict().items()}
+
+
+class SlowFS:
+    """Remplace les fonctions de os le temps du with ; compteurs par catégorie."""
+
+    def __init__(self, config: SlowFSConfig):
+        self.config = config
+        self.calls = dict.fromkeys(OPS, 0)
+        self.injected_errors = dict.fromkeys(OPS, 0)
+        self.slept = 0.0
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._saved: dict[str, object] = {}
+        self._saved_renameat2 = None
+        for name in config.errors:
+            if name not in ERRORS:
+                raise ValueError(f"Erreur inconnue: {name} (parmi {', '.join(ERRORS)})")
+        for op in config.error_ops:
+            if op not in OPS:
+                raise ValueError(f"Catégorie inconnue: {op} (parmi {', '.join(OPS)})")
+
+    def _before(self, op: str, path=None):
+        cfg = self.config
+        with self._lock:
+            delay = cfg.latency_s(op)
+            if cfg.jitter_ms:
+                delay += self._rng.random() * cfg.jitter_ms / 1000
+            fail = None
+            if cfg.error_rate and op in cfg.error_ops and self._rng.random() < cfg.error_rate:
+                fail = ERRORS[self._rng.choice(cfg.errors)]
+                self.injected_errors[op] += 1
+            self.calls[op] += 1
+            self.slept += delay
+        if delay > 0:
+            time.sleep(delay)  # relâche le GIL : les threads (--pipeline) se recouvrent comme sur un NAS
+        if fail is not None:
+            raise OSError(fail, os.strerror(fail), path)
+
+    def _wrap(self, op: str, func):
+        def slow(*args, **kwargs):
+            self._before(op, args[0] if args and isinstance(args[0], (str, bytes, os.PathLike)) else None)
+            return func(*args, **kwargs)
+
+        slow.__wrapped__ = func
+        return slow
+
+    def install(self):
+        for op, names in _PATCHED.items():
+            for name in names:
+                orig = getattr(os, name)
+                self._saved[name] = orig
+                setattr(os, name, self._wrap(op, orig))
+        # renameat2 passe par ctypes, pas par os : on enveloppe la fonction chargée
+        self._saved_renameat2 = prefix_fsops._load_renameat2
+        real = prefix_fsops._load_renameat2()
+        if real is not None:
+            slow = self._wrap("rename", real)
+            prefix_fsops._load_renameat2 = lambda: slow
+
+    def uninstall(self):
+        for name, orig in self._saved.items():
+            setattr(os, name, orig)
+        self._saved.clear()
+        if self._saved_renameat2 is not None:
+            prefix_fsops._load_renameat2 = self._saved_renameat2
+            self._saved_renameat2 = None
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc):
+        self.uninstall()
+        return False
+
+    def summary(self) -> str:
+        calls = ", ".join(f"{op} {self.calls[op]}" for op in OPS)
+        errs = sum(self.injected_errors.values())
+        return f"appels : {calls} ; latence injectée {self.slept:.2f} s ; erreurs injectées {errs}"
+
+
+def config_from_args(args) -> SlowFSConfig | None:
+    """Configuration issue des options ; None si aucune latence ni erreur n'est demandée."""
+    if not (args.latency_ms or args.jitter_ms or args.list_latency_ms or args.meta_latency_ms
+            or args.rename_latency_ms or args.error_rate):
+        return None
+    return SlowFSConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        list_latency_ms=args.list_latency_ms,
+        meta_latency_ms=args.meta_latency_ms,
+        rename_latency_ms=args.rename_latency_ms,
+        error_rate=args.error_rate,
+        errors=tuple(e.strip().upper() for e in args.errors.split(",") if e.strip()),
+        error_ops=tuple(o.strip() for o in args.error_ops.split(",") if o.strip()),
+        seed=args.seed,
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser, seed: bool = True):
+    """Options de simulation, partagées avec prefix_bench.py (qui a déjà sa propre --seed)."""
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latence par appel (défaut: 0)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Gigue ajoutée, uniforme sur [0, N] ms")
+    parser.add_argument("--list-latency-ms", type=float, default=None, help="Latence des listages (remplace --latency-ms)")
+    parser.add_argument("--meta-latency-ms", type=float, default=None, help="Latence des stat/open (remplace --latency-ms)")
+    parser.add_argument("--rename-latency-ms", type=float, default=None, help="Latence des renommages (remplace --latency-ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilité d'erreur par appel (ex: 0.01)")
+    parser.add_argument("--errors", default="EBUSY,ESTALE", help=f"Erreurs injectées parmi {','.join(ERRORS)}")
+    parser.add_argument("--error-ops", default="rename", help=f"Catégories où injecter les erreurs parmi {','.join(OPS)}")
+    if seed:
+        parser.add_argument("--seed", type=int, default=42, help="Graine (latences et erreurs reproductibles)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Lance un script (CLI, GUI...) avec une latence et des erreurs de NAS simulées."
+    )
+    add_arguments(parser)
+    parser.add_argument("script", help="Script à lancer (ex: rename-with-prefix.py)")
+    parser.add_argument("script_args", nargs=argparse.REMAINDER, help="Arguments du script")
+    args = parser.parse_args()
+
+    try:
+        fs = SlowFS(config_from_args(args) or SlowFSConfig())
+    except ValueError as e:
+        parser.error(str(e))
+
+    script_args = args.script_args[1:] if args.script_args[:1] == ["--"] else args.script_args
+    sys.argv = [args.script, *script_args]
+    t0 = time.perf_counter()
+    code = 0
+    with fs:
+        try:
+            runpy.run_path(args.script, run_name="__main__")
+        except SystemExit as e:
+            code = e.code
+    print(f"\n[slowfs] {fs.summary()} ; durée {time.perf_counter() - t0:.2f} s", file=sys.stderr)
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import compileall
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+CLI_SCRIPT = HERE / "rename-with-prefix.py"
+
+# Modules qui ne doivent jamais être importés au démarrage de ces cas (import paresseux).
+# Contrairement aux millisecondes, ce contrôle ne dépend pas de la machine.
+CLI_FORBIDDEN = {
+    "csv", "datetime", "ctypes", "cProfile", "json", "gzip", "dataclasses", "inspect",
+    "threading", "queue", "tkinter", "prefix_plan", "prefix_metrics",
+}
+GUI_FORBIDDEN = {"csv", "datetime", "ctypes", "cProfile", "gzip"}
+
+# Budget en ms pour les imports propres au script (hors imports de l'interpréteur seul)
+SCENARIOS = {
+    "cli-help": {"budget_ms": 40.0, "forbidden": CLI_FORBIDDEN},
+    "cli-file": {"budget_ms": 40.0, "forbidden": CLI_FORBIDDEN},
+    "gui-import": {"budget_ms": 80.0, "forbidden": GUI_FORBIDDEN},
+}
+
+
+def scenario_argv(name: str, sample_file: Path) -> list[str]:
+    if name == "cli-help":
+        return [str(CLI_SCRIPT), "--help"]
+    if name == "cli-file":
+        # Cas type "action du gestionnaire de fichiers" : un seul fichier, sans question
+        return [str(CLI_SCRIPT), "--path", str(sample_file), "--dry-run", "--yes"]
+    if name == "gui-import":
+        return ["-c", "import test3"]
+    raise ValueError(name)
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """Lignes `import time: self | cumulative | module` -> {module: self en µs}."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # ligne d'en-tête
+        modules[fields[2].strip()] = int(fields[0])
+    return modules
+
+
+def run_once(argv: list[str]) -> tuple[dict[str, int], float]:
+    """Lance python -X importtime ... ; retourne (imports, durée murale en ms)."""
+    env = dict(os.environ, PYTHONPROFILEIMPORTTIME="1")
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *argv],
+        cwd=HERE,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - t0) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} : code {proc.returncode}\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr), wall_ms
+
+
+def measure(name: str, argv: list[str], baseline: set[str], repeat: int, top: int) -> dict:
+    import_ms, wall_ms = [], []
+    extra: dict[str, int] = {}
+    for _ in range(repeat):
+        modules, wall = run_once(argv)
+        extra = {m: us for m, us in modules.items() if m not in baseline}
+        import_ms.append(sum(extra.values()) / 1000)
+        wall_ms.append(wall)
+
+    budget = SCENARIOS[name]
+    forbidden = sorted(m for m in extra if m.split(".")[0] in budget["forbidden"])
+    median_import = statistics.median(import_ms)
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "scenario": name,
+        "import_ms": round(median_import, 3),
+        "wall_ms": round(statistics.median(wall_ms), 3),
+        "modules": len(extra),
+        "budget_ms": budget["budget_ms"],
+        "forbidden": forbidden,
+        "top": sorted(extra.items(), key=lambda kv: kv[1], reverse=True)[:top],
+        "ok": median_import <= budget["budget_ms"] and not forbidden,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mesure du démarrage à froid (python -X importtime) avec budget de régression."
+    )
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Cas parmi {', '.join(SCENARIOS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="Lancements par cas, la médiane est retenue (défaut: 5)")
+    parser.add_argument("--budget-factor", type=float, default=1.0,
+                        help="Multiplie les budgets en ms (machine lente, ex: 2)")
+    parser.add_argument("--top", type=int, default=8, help="Modules les plus coûteux affichés par cas (défaut: 8)")
+    parser.add_argument("--no-compile", action="store_true",
+                        help="Ne précompile pas les .pyc avant la mesure (mesure aussi la compilation)")
+    parser.add_argument("--out", default=None, help="Fichier JSON Lines de sortie (défaut: stdout)")
+    args = parser.parse_args()
+
+    names = [s.strip() for s in args.scenarios.split(",")]
+    for name in names:
+        if name not in SCENARIOS:
+            parser.error(f"Cas inconnu: {name}")
+    for spec in SCENARIOS.values():
+        spec["budget_ms"] *= args.budget_factor
+
+    if not args.no_compile:
+        # Un .pyc absent ou périmé fausserait la mesure (compilation à chaque lancement)
+        compileall.compile_dir(HERE, maxlevels=0, quiet=1)
+
+    baseline, _ = run_once(["-c", "pass"])
+
+    out = open(args.out, "a", encoding="utf-8") if args.out else sys.stdout
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="prefix_startup_") as tmp:
+        sample_file = Path(tmp, "notes_RAG.txt")
+        sample_file.touch()
+        try:
+            for name in names:
+                if name == "gui-import":
+                    try:
+                        import tkinter  # noqa: F401
+                    except ImportError:
+                        print(f"[WARN] tkinter indisponible : cas {name} ignoré", file=sys.stderr)
+                        continue
+                rec = measure(name, scenario_argv(name, sample_file), set(baseline), args.repeat, args.top)
+                out.write(json.dumps(rec) + "\n")
+                out.flush()
+
+                verdict = "OK" if rec["ok"] else "HORS BUDGET"
+                print(
+                    f"{name:10} imports {rec['import_ms']:>8.2f} ms / {rec['budget_ms']:.0f} ms  "
+                    f"mur {rec['wall_ms']:>8.2f} ms  {rec['modules']:>4} modules  {verdict}",
+                    file=sys.stderr,
+                )
+                for mod, us in rec["top"]:
+                    print(f"    {us / 1000:>8.2f} ms  {mod}", file=sys.stderr)
+                if rec["forbidden"]:
+                    print(f"    importés à tort : {', '.join(rec['forbidden'])}", file=sys.stderr)
+                failed |= not rec["ok"]
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
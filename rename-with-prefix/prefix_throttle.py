@@ -0,0 +1,67 @@
+from time import monotonic, perf_counter, sleep
+
+from prefix_perf import NULL_STATS, PhaseStats
+
+
+class TokenBucket:
+    """
+    Limiteur de débit (seau à jetons) : au plus `rate` opérations par seconde en régime
+    établi, avec des rafales d'au plus `burst` opérations (défaut : une seconde de débit).
+
+    acquire() dort le temps nécessaire ; le temps passé bridé est cumulé dans
+    throttled_seconds et envoyé à stats sous `phase`. Utilisable depuis plusieurs threads
+    (mode --pipeline) : chaque appel réserve ses jetons sous verrou, puis dort hors verrou.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None, stats: PhaseStats = NULL_STATS, phase: str = "throttle"):
+        if rate <= 0:
+            raise ValueError("Le débit doit être > 0")
+        import threading  # ici : pas de threading au démarrage si aucune limite n'est posée
+
+        self.rate = rate
+        self.burst = burst if burst else max(1.0, rate)
+        self.stats = stats
+        self.phase = phase
+        self.throttled_seconds = 0.0
+        self.waits = 0
+        self._tokens = self.burst
+        self._last = monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: float = 1.0):
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= n
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            t0 = perf_counter()
+            sleep(wait)
+            slept = perf_counter() - t0
+            with self._lock:
+                self.throttled_seconds += slept
+                self.waits += 1
+            self.stats.add(self.phase, slept)
+
+
+class NullBucket(TokenBucket):
+    """Pas de limite : acquire() ne fait rien."""
+
+    def __init__(self):
+        self.rate = 0.0
+        self.throttled_seconds = 0.0
+        self.waits = 0
+
+    def acquire(self, n: float = 1.0):
+        pass
+
+
+NO_LIMIT = NullBucket()
+
+
+def make_bucket(rate: float | None, stats: PhaseStats = NULL_STATS, phase: str = "throttle") -> TokenBucket:
+    """rate None ou <= 0 -> NO_LIMIT."""
+    if not rate or rate <= 0:
+        return NO_LIMIT
+    return TokenBucket(rate, stats=stats, phase=phase)
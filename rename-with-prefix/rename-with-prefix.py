@@ -1,84 +1,47 @@
 import argparse
-import csv
 import os
 import re
 import sys
-from datetime import datetime
+from functools import partial
 from pathlib import Path
-
-
-def iter_files_in_folder(folder: Path, recursive: bool):
-    """Itère sur les fichiers d'un dossier (récursif ou non)."""
-    if recursive:
-        yield from (p for p in folder.rglob("*") if p.is_file())
-    else:
-        yield from (p for p in folder.iterdir() if p.is_file())
-
-
-def compute_new_name(name: str, rx: re.Pattern, prefix: str) -> str | None:
-    """
-    Retourne le nouveau nom (avec préfixe) si le fichier doit être modifié, sinon None.
-    - Ajoute prefix si la regex matche le nom et que le nom ne commence pas déjà par prefix.
-    """
-    if name.startswith(prefix):
-        return None
-    if rx.search(name):
-        return prefix + name
-    return None
-
-
-def make_unique_name(folder: Path, desired_name: str) -> str:
-    """
-    Génère un nom unique dans le dossier en ajoutant " (n)" avant l'extension.
-    Exemple : AI_file.txt -> AI_file (1).txt
-    """
-    base, ext = os.path.splitext(desired_name)
-    candidate = desired_name
-    n = 1
-    while (folder / candidate).exists():
-        candidate = f"{base} ({n}){ext}"
-        n += 1
-    return candidate
-
-
-def rename_path(path: Path, new_name: str, dry_run: bool, collision: str) -> tuple[str, str]:
-    """
-    Renomme un fichier vers new_name dans le même dossier.
-    Retourne (status, message).
-    status ∈ {"DRY_RUN","RENAMED","SKIP","ERROR"}
-
-    collision:
-      - skip      : ignore si la cible existe
-      - overwrite : remplace la cible existante
-      - number    : rend le nom unique (AI_x (1).ext)
-    """
-    target = path.with_name(new_name)
-
-    # Collision
-    if target.exists():
-        if collision == "skip":
-            return "SKIP", f"[SKIP] Cible existe déjà: {target}"
-        if collision == "overwrite":
-            # On garde le même nom cible; on remplacera avec os.replace
-            pass
-        if collision == "number":
-            unique_name = make_unique_name(path.parent, new_name)
-            target = path.with_name(unique_name)
-            new_name = unique_name
-
-    if dry_run:
-        # En dry-run, on affiche le target final (y compris si "number" a modifié le nom)
-        return "DRY_RUN", f"[DRY]  {path.name} -> {new_name}"
-
-    try:
-        if collision == "overwrite":
-            # os.replace remplace si existe (comportement “overwrite”)
-            os.replace(str(path), str(target))
-        else:
-            path.rename(target)
-        return "RENAMED", f"[OK]   {path.name} -> {new_name}"
-    except Exception as e:
-        return "ERROR", f"[ERR]  {path} : {e}"
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+# Démarrage rapide (script lancé très souvent depuis le gestionnaire de fichiers) :
+# seuls les modules du chemin commun sont importés ici. Plan, pipeline, métriques,
+# CSV et datetime ne sont importés que par les options qui s'en servent.
+# Budget vérifié par prefix_startup.py.
+from prefix_budget import ScanBudget
+from prefix_console import Console
+from prefix_fsops import DEFAULT_DIR_HANDLES, DirHandleCache, atomic_noreplace
+from prefix_perf import PhaseStats, Profiler
+from prefix_pipeline import DEFAULT_QUEUE_SIZE
+from prefix_regexguard import RegexTimeout, analyze
+from prefix_throttle import make_bucket
+# Cœur (parcours, règles, renommage) dans prefix_renamer
+from prefix_renamer import (
+    CsvLogStream,
+    PlannedRename,
+    RenameResult,
+    Visited,
+    apply,
+    apply_one,
+    compile_rules,
+    display_path,
+    excluded,
+    held_result,
+    matcher,
+    walk_files,
+    write_csv_log,
+)
+
+if TYPE_CHECKING:
+    from prefix_checkpoint import CheckpointWriter
+    from prefix_history import HistoryWriter
+    from prefix_pathmatch import PathFilter
+    from prefix_plan import PlanEntry, PlanReader, PlanWriter
+    from prefix_regexguard import TimedPattern
+    from prefix_renamer import Rules
 
 
 def ask_choice() -> str:
@@ -113,17 +76,7 @@ def ask_yes_no(prompt: str) -> bool:
         print("Réponds par oui/non (o/n).")
 
 
-def write_csv_log(log_path: Path, rows: list[dict]):
-    """Écrit un log CSV (UTF-8)."""
-    fieldnames = ["timestamp", "status", "old_path", "new_path", "reason", "error"]
-    with open(log_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
-
-
-def main():
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Ajoute un préfixe au nom des fichiers si une regex est trouvée dans le nom."
     )
@@ -133,6 +86,13 @@ def main():
     parser.add_argument("--dry-run", action="store_true", help="Simulation : n'applique pas le renommage")
     parser.add_argument("--ignore-case", action="store_true", help="Ignore la casse (RAG = rag, RaG...)")
     parser.add_argument("--word-only", action="store_true", help="Mot isolé (entoure la regex par \\b...\\b)")
+    parser.add_argument(
+        "--path-pattern",
+        default=None,
+        metavar="REGEX",
+        help="Regex en plus sur le chemin relatif au dossier (séparateur /) ; ancrée par ^, "
+             "les sous-dossiers qui ne peuvent pas correspondre ne sont pas parcourus.",
+    )
 
     # ✅ 3 options demandées
     parser.add_argument(
@@ -151,125 +111,896 @@ def main():
         action="store_true",
         help="Génère un log CSV des opérations (dans le dossier cible).",
     )
+    parser.add_argument(
+        "--profile",
+        metavar="FICHIER",
+        default=None,
+        help="Écrit un profil cProfile (pstats) de toute l'exécution dans FICHIER.",
+    )
+    parser.add_argument(
+        "--path",
+        default=None,
+        help="Dossier ou fichier à traiter (évite les questions interactives, ex: cron).",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        metavar="FICHIER.prom",
+        default=None,
+        help="Écrit compteurs et histogrammes au format textfile node-exporter (Prometheus).",
+    )
+    parser.add_argument(
+        "--metrics-label",
+        action="append",
+        metavar="CLE=VALEUR",
+        help="Label ajouté à toutes les métriques (répétable, ex: share=nas1).",
+    )
+    parser.add_argument(
+        "--plan-out",
+        metavar="PLAN",
+        default=None,
+        help="Écrit le plan de renommage dans PLAN (JSON Lines, .gz possible) sans rien renommer.",
+    )
+    parser.add_argument(
+        "--apply",
+        metavar="PLAN",
+        default=None,
+        help="Applique un plan écrit par --plan-out, sans rescanner (fichiers modifiés ignorés).",
+    )
+    parser.add_argument(
+        "--dir-handles",
+        type=int,
+        default=DEFAULT_DIR_HANDLES,
+        metavar="N",
+        help=f"Descripteurs de dossiers gardés ouverts pour les renommages relatifs (défaut: {DEFAULT_DIR_HANDLES}, 0 = chemins complets).",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Mode flux : parcours, correspondance, renommage et log dans des étages séparés (files bornées).",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        metavar="N",
+        help=f"Mode --pipeline : lots en attente entre deux étages (défaut: {DEFAULT_QUEUE_SIZE}).",
+    )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--max-listings",
+        type=float,
+        default=0,
+        metavar="N",
+        help="Au plus N listages de dossiers par seconde (ménage le serveur de métadonnées du NAS ; 0 = illimité).",
+    )
+    parser.add_argument(
+        "--max-renames",
+        type=float,
+        default=0,
+        metavar="N",
+        help="Au plus N renommages par seconde (0 = illimité).",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="FICHIER",
+        default=None,
+        help="Parcours trié + point de reprise écrit régulièrement dans FICHIER (supprimé en fin de run).",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=float,
+        default=5.0,
+        metavar="S",
+        help="Secondes entre deux écritures du point de reprise (défaut: 5).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reprend un run interrompu après le dernier fichier du point de reprise (--checkpoint).",
+    )
+    parser.add_argument(
+        "--max-files",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Arrête le parcours après N fichiers analysés (plan / log partiels, marqués comme tels ; 0 = illimité).",
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=0,
+        metavar="S",
+        help="Arrête le parcours après S secondes (0 = illimité).",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Niveaux de sous-dossiers parcourus en récursif (0 = dossier seul ; défaut: tous).",
+    )
+    parser.add_argument(
+        "--estimate",
+        action="store_true",
+        help="Estime en quelques secondes fichiers, correspondances et collisions (descentes aléatoires), sans renommer.",
+    )
+    parser.add_argument(
+        "--estimate-seconds",
+        type=float,
+        default=10.0,
+        metavar="S",
+        help="Budget de temps de --estimate (défaut: 10).",
+    )
+    parser.add_argument(
+        "--history",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="BASE",
+        help="Enregistre chaque opération dans l'historique SQLite central (défaut: base propre à "
+             "l'utilisateur ; requêtes avec prefix_history.py).",
+    )
+    parser.add_argument(
+        "--follow-symlinks",
+        action="store_true",
+        help="Suit les liens symboliques vers des dossiers (boucles coupées : dossiers déjà vus ignorés).",
+    )
+    parser.add_argument(
+        "--dedup-files",
+        action="store_true",
+        help="Un fichier vu sous plusieurs noms (lien physique, montage bind) n'est traité qu'une fois.",
+    )
+    parser.add_argument(
+        "--regex-timeout",
+        type=float,
+        default=0,
+        metavar="MS",
+        help="Budget de temps de la regex par nom de fichier, en ms (0 = illimité ; Linux/macOS, hors --pipeline).",
+    )
+    parser.add_argument(
+        "--on-regex-timeout",
+        choices=["fail", "skip"],
+        default="fail",
+        help="Dépassement du budget : arrêter le run (fail, défaut) ou ignorer le fichier en erreur (skip).",
+    )
+    parser.add_argument(
+        "--bytes",
+        action="store_true",
+        help="Noms traités en octets bruts de bout en bout (noms non décodables, archives en ancien "
+             "encodage ; regex sur octets : \\w et --ignore-case limités à l'ASCII).",
+    )
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument(
+        "--progress",
+        dest="output",
+        action="store_const",
+        const="progress",
+        help="Barre de progression (débit, ETA si le total est connu) au lieu d'une ligne par fichier.",
+    )
+    output.add_argument(
+        "--summary-only",
+        dest="output",
+        action="store_const",
+        const="summary",
+        help="N'affiche que les erreurs et le résumé.",
+    )
+    output.add_argument(
+        "-q",
+        "--quiet",
+        dest="output",
+        action="store_const",
+        const="quiet",
+        help="N'affiche que les erreurs.",
+    )
+    parser.set_defaults(output="lines")
+    return parser
+
+
+def check_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> dict[str, str]:
+    """Options incompatibles ou hors bornes (parser.error) ; renvoie les labels de --metrics-label."""
+    if args.max_listings < 0 or args.max_renames < 0:
+        parser.error("--max-listings / --max-renames doivent être >= 0")
+    if args.max_files < 0 or args.max_seconds < 0 or (args.max_depth is not None and args.max_depth < 0):
+        parser.error("--max-files / --max-seconds / --max-depth doivent être >= 0")
+    if args.plan_out and args.apply:
+        parser.error("--plan-out et --apply sont incompatibles")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume demande --checkpoint FICHIER")
+    if args.checkpoint and (args.plan_out or args.apply):
+        parser.error("--checkpoint est incompatible avec --plan-out / --apply")
+    if args.estimate and (args.apply or args.plan_out or args.checkpoint):
+        parser.error("--estimate est incompatible avec --apply / --plan-out / --checkpoint")
+    if args.path_pattern and args.apply:
+        parser.error("--path-pattern est incompatible avec --apply (le plan est déjà filtré)")
+    if args.bytes and (args.apply or args.plan_out or args.checkpoint or args.path_pattern or args.estimate):
+        parser.error("--bytes est incompatible avec --apply / --plan-out / --checkpoint / --path-pattern / --estimate")
+    if args.bytes and os.name == "nt":
+        parser.error("--bytes n'est pas disponible sous Windows (noms natifs en UTF-16)")
+    if args.regex_timeout < 0:
+        parser.error("--regex-timeout doit être >= 0")
+    if args.regex_timeout:
+        from prefix_regexguard import timeout_supported
+
+        if args.pipeline:
+            parser.error("--regex-timeout est incompatible avec --pipeline (la regex tourne hors du thread principal)")
+        if not timeout_supported():
+            parser.error("--regex-timeout n'est pas disponible sur ce système (pas de setitimer)")
+
+    if args.metrics_file or args.metrics_label:
+        from prefix_metrics import parse_labels
 
-    # Compile regex
+        try:
+            return parse_labels(args.metrics_label)
+        except ValueError as e:
+            parser.error(str(e))
+    return {}
+
+
+def compile_patterns(args: argparse.Namespace) -> tuple["Rules", "PathFilter | None"]:
+    """Regex du nom (et --path-pattern) ; quitte (code 2) si elles sont invalides."""
+    path_filter: "PathFilter | None" = None
     try:
-        flags = re.UNICODE | (re.IGNORECASE if args.ignore_case else 0)
-        pattern = args.pattern
-        if args.word_only and pattern:
-            pattern = r"\b" + pattern + r"\b"
-        rx = re.compile(pattern, flags)
+        rules = compile_rules(args.pattern, args.prefix, args.ignore_case, args.word_only, as_bytes=args.bytes)
+        if args.path_pattern:
+            from prefix_pathmatch import PathFilter
+
+            path_filter = PathFilter(args.path_pattern, args.ignore_case)
     except re.error as e:
         print(f"Regex invalide: {e}")
         sys.exit(2)
+    except ValueError as e:
+        print(e)
+        sys.exit(2)
+    return rules, path_filter
 
-    print("=== AI Prefix Renamer (CLI) ===")
-    print(f"Regex      : {args.pattern}")
-    print(f"Préfixe    : {args.prefix}")
-    print(f"Récursif   : {args.recursive}")
-    print(f"Dry-run    : {args.dry_run}")
-    print(f"Collision  : {args.collision}")
-    print(f"IgnoreCase : {args.ignore_case}")
-    print(f"WordOnly   : {args.word_only}")
-    print(f"Log CSV    : {args.log_csv}")
-    print()
-
-    kind = ask_choice()
-    target_path = ask_path(kind)
-
-    # Confirmation (sauf --yes ou dry-run)
-    if not args.yes and not args.dry_run:
-        if kind == "F":
-            confirm_msg = f"Confirmer le renommage du fichier ?\n{target_path}\n(o/n) : "
-        else:
-            confirm_msg = f"Confirmer le renommage dans le dossier ?\n{target_path}\n(o/n) : "
-        if not ask_yes_no(confirm_msg):
-            print("Annulé.")
-            sys.exit(0)
-
-    # Prépare log CSV si demandé
-    log_rows: list[dict] = []
-    log_path: Path | None = None
-    if args.log_csv:
-        base_dir = target_path if kind == "D" else target_path.parent
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_path = base_dir / f"AI_prefix_rename_log_{ts}.csv"
-
-    total = 0
-    matched = 0
-    renamed = 0
-    dry = 0
-    skipped = 0
-    errors = 0
-
-    def process_file(p: Path):
-        nonlocal total, matched, renamed, dry, skipped, errors
-
-        total += 1
-        new_name = compute_new_name(p.name, rx, args.prefix)
-        if new_name is None:
-            return
 
-        matched += 1
+def open_plan_in(args: argparse.Namespace) -> "PlanReader | None":
+    """Plan à appliquer (--apply) : il fixe la gestion de collision et le dossier de base."""
+    if not args.apply:
+        return None
+    from prefix_plan import PlanReader
+
+    try:
+        return PlanReader(args.apply)
+    except (OSError, ValueError) as e:
+        print(f"Plan invalide: {e}")
+        sys.exit(2)
+
+
+def print_header(out: Console, args: argparse.Namespace, collision: str, budget: ScanBudget,
+                 path_filter: "PathFilter | None", plan_in: "PlanReader | None"):
+    # Formes à backtracking catastrophique (avertissement : la regex reste utilisée)
+    regex_risks = analyze(args.pattern, args.ignore_case)
+    if args.path_pattern:
+        regex_risks += [f"{r} [--path-pattern]" for r in analyze(args.path_pattern, args.ignore_case)]
+
+    out.info("=== AI Prefix Renamer (CLI) ===")
+    out.info(f"Regex      : {args.pattern}")
+    out.info(f"Préfixe    : {args.prefix}")
+    out.info(f"Récursif   : {args.recursive}")
+    out.info(f"Dry-run    : {args.dry_run}")
+    out.info(f"Collision  : {collision}")
+    out.info(f"IgnoreCase : {args.ignore_case}")
+    out.info(f"WordOnly   : {args.word_only}")
+    for risk in regex_risks:
+        out.error(f"Attention  : {risk} : risque de backtracking catastrophique"
+                  + ("" if args.regex_timeout else " (voir --regex-timeout)"))
+    if args.regex_timeout:
+        out.info(f"Budget re  : {args.regex_timeout:g} ms par nom ({args.on_regex_timeout})")
+    if path_filter is not None:
+        pruning = "élagage des sous-dossiers" if path_filter.prunes else "sans élagage : ancrer par ^, [^/]+ plutôt que .*"
+        out.info(f"Chemin     : {args.path_pattern}  ({pruning})")
+    out.info(f"Log CSV    : {args.log_csv}")
+    out.info(f"Profil     : {args.profile or '-'}")
+    out.info(f"Pipeline   : {args.pipeline}")
+    if args.bytes:
+        out.info("Noms       : octets bruts (--bytes)")
+    if budget.active or budget.max_depth is not None:
+        out.info(f"Limites    : {budget.describe()}")
+    if args.max_listings or args.max_renames:
+        out.info(f"Débit max  : {args.max_listings or '∞'} listage(s)/s, {args.max_renames or '∞'} renommage(s)/s")
+    if args.plan_out:
+        out.info(f"Plan (out) : {args.plan_out}")
+    if plan_in is not None:
+        out.info(f"Plan (in)  : {args.apply}  (créé {plan_in.meta.get('created', '?')})")
+    out.info()
+    out.flush()  # avant les questions interactives
+
+
+def choose_target(args: argparse.Namespace, plan_in: "PlanReader | None",
+                  path_filter: "PathFilter | None") -> tuple[str, Path]:
+    """(kind, chemin) : "P" plan à appliquer, "D" dossier, "F" fichier ; demandé si --path est absent."""
+    if plan_in is not None:
+        return "P", Path(plan_in.meta.get("root") or Path(args.apply).resolve().parent)
+    if not args.path:
+        kind = ask_choice()
+        return kind, ask_path(kind)
+    target_path = Path(args.path)
+    if target_path.is_dir():
+        return "D", target_path
+    if target_path.is_file():
+        if path_filter is not None:
+            print("--path-pattern ne s'applique qu'à un dossier.")
+            sys.exit(2)
+        return "F", target_path
+    print(f"Chemin invalide (introuvable): {target_path}")
+    sys.exit(2)
+
+
+def timed_rules(args: argparse.Namespace, kind: str, rules: "Rules") -> tuple["TimedPattern | None", "Rules"]:
+    """
+    Budget de temps par nom : la regex est enveloppée (minuterie SIGALRM, thread principal).
+    Appelé juste avant le parcours : la minuterie périodique ne tourne jamais pendant une saisie.
+    """
+    if not args.regex_timeout or kind == "P":
+        return None, rules
+    from prefix_regexguard import TimedPattern
+
+    timed = TimedPattern(rules.rx, args.regex_timeout / 1000, args.on_regex_timeout)
+    return timed, rules._replace(rx=timed)
+
+
+def run_estimate(out: Console, args: argparse.Namespace, kind: str, target_path: Path,
+                 rules: "Rules", path_filter: "PathFilter | None"):
+    """--estimate : descentes aléatoires, rapport, rien n'est renommé."""
+    from prefix_estimate import estimate, format_report
+
+    if kind != "D":
+        print("--estimate ne s'applique qu'à un dossier.")
+        sys.exit(2)
+    timed_rx, rules = timed_rules(args, kind, rules)
+    try:
+        res = estimate(
+            str(target_path),
+            rules,
+            args.recursive,
+            args.estimate_seconds,
+            list_limiter=make_bucket(args.max_listings),
+            path_filter=path_filter,
+            follow_symlinks=args.follow_symlinks,
+            visited=Visited(files=args.dedup_files),
+        )
+    except RegexTimeout as e:
+        raise SystemExit(f"\nErreur : {e}\n(--on-regex-timeout skip pour l'ignorer et continuer)")
+    finally:
+        if timed_rx is not None:
+            timed_rx.close()
+    for line in format_report(res):
+        out.info(line)
+    out.close()
+
+
+def open_checkpoint(out: Console, args: argparse.Namespace, kind: str, target_path: Path,
+                    collision: str) -> tuple["CheckpointWriter", tuple[str, ...], dict[str, int]]:
+    """
+    Point de reprise (--checkpoint) : parcours trié, position = dernier fichier traité (chemin
+    relatif à target_path, déjà résolu). Avec --resume : (point de reprise, position, compteurs).
+    """
+    from prefix_checkpoint import CheckpointWriter, load_checkpoint, mismatches
+
+    if kind != "D":
+        print("--checkpoint ne s'applique qu'à un dossier.")
+        sys.exit(2)
+    ck_meta = {
+        "root": str(target_path),
+        "recursive": args.recursive,
+        "pattern": args.pattern,
+        "prefix": args.prefix,
+        "ignore_case": args.ignore_case,
+        "word_only": args.word_only,
+        "collision": collision,
+        "follow_symlinks": args.follow_symlinks,
+        "dedup_files": args.dedup_files,
+        "path_pattern": args.path_pattern,
+        "max_depth": args.max_depth,
+    }
+    start_after: tuple[str, ...] = ()
+    base_counters: dict[str, int] = {}
+    if args.resume:
+        try:
+            ck_data = load_checkpoint(args.checkpoint)
+        except (OSError, ValueError) as e:
+            print(f"Reprise impossible : {e}")
+            sys.exit(2)
+        diff = mismatches(ck_data, ck_meta)
+        if diff:
+            print(f"Reprise impossible : réglages différents du point de reprise ({', '.join(diff)})")
+            sys.exit(2)
+        start_after = tuple(ck_data["last"])
+        base_counters = ck_data.get("counters", {})
+        out.info(f"Reprise    : après {Path(*start_after)} ({base_counters.get('total', 0)} fichier(s) déjà traité(s))")
+        out.flush()
+    return CheckpointWriter(args.checkpoint, ck_meta, args.checkpoint_every), start_after, base_counters
+
+
+def confirm(args: argparse.Namespace, kind: str, target_path: Path):
+    """Confirmation (sauf --yes, dry-run ou simple écriture de plan) ; quitte si refusée."""
+    if args.yes or args.dry_run or args.plan_out:
+        return
+    if kind == "P":
+        confirm_msg = f"Confirmer l'application du plan ?\n{args.apply}\n(o/n) : "
+    elif kind == "F":
+        confirm_msg = f"Confirmer le renommage du fichier ?\n{target_path}\n(o/n) : "
+    else:
+        confirm_msg = f"Confirmer le renommage dans le dossier ?\n{target_path}\n(o/n) : "
+    if not ask_yes_no(confirm_msg):
+        print("Annulé.")
+        sys.exit(0)
+
+
+def open_history(args: argparse.Namespace, kind: str, target_path: Path, collision: str,
+                 stats: PhaseStats) -> "HistoryWriter":
+    from prefix_history import HistoryWriter, default_history_path
+
+    try:
+        return HistoryWriter(
+            args.history or default_history_path(),
+            {
+                "root": str(target_path if kind != "F" else target_path.parent),
+                "pattern": args.pattern,
+                "prefix": args.prefix,
+                "collision": collision,
+                "dry_run": args.dry_run,
+            },
+            stats=stats,
+        )
+    except Exception as e:
+        print(f"Impossible d'ouvrir l'historique : {e}")
+        sys.exit(2)
+
 
-        status, msg = rename_path(p, new_name, args.dry_run, args.collision)
-        print(msg)
+def open_plan_out(args: argparse.Namespace, kind: str, target_path: Path, collision: str) -> "PlanWriter":
+    from prefix_plan import PlanWriter
+
+    plan_meta = {
+        "root": str(target_path if kind == "D" else target_path.parent),
+        "pattern": args.pattern,
+        "prefix": args.prefix,
+        "collision": collision,
+        "ignore_case": args.ignore_case,
+        "word_only": args.word_only,
+    }
+    try:
+        return PlanWriter(args.plan_out, plan_meta)
+    except OSError as e:
+        print(f"Impossible d'écrire le plan : {e}")
+        sys.exit(2)
+
+
+def _with_name(p: Path, new_name: str) -> Path:
+    return p.with_name(new_name)
+
+
+def _with_name_bytes(p: bytes, new_name: bytes) -> bytes:
+    return os.path.join(os.path.dirname(p), new_name)
+
+
+class Run:
+    """
+    Compteurs et sorties d'un renommage (log CSV, historique, point de reprise, plan écrit).
+
+    Chaque fichier suit le chemin de prefix_renamer, étage par étage : walk_files() ->
+    matcher() (les deux étages de plan() ; avec --apply : lecture du plan -> check_entry)
+    -> apply_one() -> record(). Chaque compteur n'est modifié que par un étage (un thread en
+    mode --pipeline) : total par la source (walked), matched et unmatched par la
+    correspondance (counted), le reste par record(), dans le thread principal.
+    Mode --bytes : p est le chemin bytes du parcours, jamais décodé ni converti en Path ;
+    le log CSV reçoit os.fsdecode (réécrit octet pour octet), l'affichage display_path.
+    """
+
+    def __init__(self, out: Console, kind: str, target_path: Path, stats: PhaseStats, as_bytes: bool,
+                 base_counters: dict[str, int]):
+        self.show = out.item
+        self.kind = kind
+        self.root_depth = len(target_path.parts)
+        self.stats = stats
+        self.with_name = _with_name_bytes if as_bytes else _with_name
+        self.log_text = os.fsdecode if as_bytes else str
+        # En reprise, les compteurs repartent des valeurs du point de reprise
+        self.base_counters = base_counters
+        self.total = base_counters.get("total", 0)
+        self.matched = base_counters.get("matched", 0)
+        self.renamed = base_counters.get("renamed", 0)
+        self.dry = base_counters.get("dry_run", 0)
+        self.skipped = base_counters.get("skipped", 0)
+        self.errors = base_counters.get("errors", 0)
+        self.planned = 0
+        self.last_planned: str | None = None
+        self.stale = 0
+        self.unmatched = 0
+        self.recorded = 0
+        # Vus par record() (le parcours peut être en avance en mode --pipeline) : servent au point de reprise
+        self.done_total = self.total
+        self.done_matched = self.matched
+        self.walk_done = kind == "F"
+
+        self.log_path: Path | None = None
+        self.log_rows: list[dict] | CsvLogStream = []
+        self.history: "HistoryWriter | None" = None
+        self.checkpoint: "CheckpointWriter | None" = None
+        self.plan_out: "PlanWriter | None" = None
+
+    def open_log(self, base_dir: Path, stream: bool):
+        """Log CSV daté dans base_dir ; écrit au fil de l'eau si stream, sinon en fin de run."""
+        from datetime import datetime
+
+        self._now = datetime.now
+        self.log_path = base_dir / f"AI_prefix_rename_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        if stream:
+            try:
+                self.log_rows = CsvLogStream(self.log_path, self.stats)
+            except OSError as e:
+                print(f"Impossible d'écrire le log CSV : {e}")
+                sys.exit(2)
+
+    # ---- étages ----
+
+    def walked(self, paths):
+        for p in paths:
+            self.total += 1
+            yield p
+        self.walk_done = True
+
+    def count_unmatched(self, p):
+        self.unmatched += 1
+
+    def counted(self, match):
+        def match_counted(x):
+            try:
+                item = match(x)
+            except RegexTimeout as e:
+                raise SystemExit(
+                    f"\nErreur : {e}\nFichier : {display_path(e.path)}\n(--on-regex-timeout skip pour l'ignorer et continuer)"
+                )
+            if item is not None and (item.reason == "match" or item.reason == "stale"):
+                self.matched += 1
+            return item
+
+        return match_counted
+
+    def write_plan(self, item: PlannedRename) -> RenameResult:
+        # --plan-out : l'étage d'exécution écrit le plan au lieu de renommer
+        if item.reason != "match":
+            return held_result(item)
+        with self.stats.phase("plan"):
+            self.plan_out.add(item.path, item.new_name)
+        return RenameResult(item.path, item.new_name, "PLAN", f"[PLAN] {item.path.name} -> {item.new_name}")
+
+    # ---- résultats (thread principal) ----
+
+    def checkpoint_counters(self) -> dict[str, int]:
+        return {
+            "total": self.done_total,
+            "matched": self.done_matched,
+            "renamed": self.renamed,
+            "dry_run": self.dry,
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
+
+    def checkpoint_done(self, p: Path, status: str):
+        self.done_total += 1
+        if status != "NOMATCH":
+            self.done_matched += 1
+        self.checkpoint.update(p.parts[self.root_depth:], self.checkpoint_counters)
+
+    def record(self, item: RenameResult):
+        self.recorded += 1
+        p, new_name, status, msg, reason = item
+        if status == "NOMATCH":
+            self.checkpoint_done(p, status)
+            return
+        self.show(msg, status == "ERROR")
+
+        if status == "PLAN":
+            self.planned += 1
+            self.last_planned = str(p)
+            return
 
         # Comptage
         if status == "RENAMED":
-            renamed += 1
+            self.renamed += 1
         elif status == "DRY_RUN":
-            dry += 1
+            self.dry += 1
         elif status == "SKIP":
-            skipped += 1
+            if reason == "stale":
+                self.stale += 1
+            else:
+                self.skipped += 1
         elif status == "ERROR":
-            errors += 1
+            self.errors += 1
 
         # Log
-        if log_path is not None:
-            # new_path réel (attention: en collision number, new_name a été ajusté dans rename_path seulement)
-            # Ici, on reconstruit le new_path "attendu" au mieux :
-            # - Pour DRY_RUN / RENAMED / SKIP: on peut déduire la cible. Pour number en dry-run, rename_path a ajusté le nom.
-            # On encode le new_path selon le message (plus fiable) serait overkill ; on reconstruit simplement:
-            #   - Si rename succeeded or dry: on utilise p.with_name(...) MAIS si number modifie, on ne l’a pas ici.
-            # Donc on stocke au minimum old_path + new_name initial; la ligne est tout de même utile.
-            new_path = str(p.with_name(new_name))
-            err = "" if status != "ERROR" else msg
-
-            log_rows.append({
-                "timestamp": datetime.now().isoformat(timespec="seconds"),
+        if self.log_path is not None:
+            # new_name est le nom final (ajusté par rename_file en collision number)
+            self.log_rows.append({
+                "timestamp": self._now().isoformat(timespec="seconds"),
                 "status": status,
-                "old_path": str(p),
-                "new_path": new_path,
-                "reason": "match",
-                "error": err,
+                "old_path": self.log_text(p),
+                "new_path": self.log_text(self.with_name(p, new_name)),
+                "reason": reason,
+                "error": "" if status != "ERROR" else msg,
             })
 
-    if kind == "F":
-        process_file(target_path)
-    else:
-        for p in iter_files_in_folder(target_path, args.recursive):
-            process_file(p)
+        if self.history is not None:
+            # Vrai chemin (str ou bytes) : HistoryWriter lit (dev, inode) puis stocke le texte affichable
+            self.history.add(p, self.with_name(p, new_name), status, reason, msg if status == "ERROR" else "")
+
+        if self.checkpoint is not None:
+            self.checkpoint_done(p, status)
+
+    def progress_snapshot(self, dry_run: bool):
+        # Total connu pour un fichier seul, ou (mode flux) dès que le parcours, en avance sur
+        # l'étage d'exécution, est terminé ; sinon débit seul
+        done = self.recorded + self.unmatched
+        known = None
+        if self.walk_done:
+            known = 1 if self.kind == "F" else self.total - self.base_counters.get("total", 0)
+        if self.plan_out is not None:
+            detail = f"planifiés {self.planned}"
+        elif dry_run:
+            detail = f"simulés {self.dry}"
+        else:
+            detail = f"renommés {self.renamed}"
+        return done, known, f"| {detail}, erreurs {self.errors}"
+
 
-    if log_path is not None:
+def plan_stages(plan_in: "PlanReader", budget: ScanBudget, stats: PhaseStats):
+    """--apply : (source, correspondance) = lecture du plan -> check_entry (une stat par entrée)."""
+    from prefix_plan import is_unchanged
+
+    def read_plan():
         try:
-            write_csv_log(log_path, log_rows)
-            print(f"\nLog CSV écrit : {log_path}")
-        except Exception as e:
-            print(f"\nImpossible d'écrire le log CSV : {e}")
-
-    print("\n=== Résumé ===")
-    print(f"Fichiers analysés : {total}")
-    print(f"Correspondances   : {matched}")
-    if args.dry_run:
-        print(f"Simulés           : {dry}")
+            yield from stats.timed_iter(plan_in, "read")
+        except ValueError as e:
+            # Ligne corrompue ou plan tronqué : les entrées précédentes sont déjà traitées
+            raise SystemExit(f"\n{e}")
+
+    def check_entry(entry: "PlanEntry") -> PlannedRename:
+        # Une seule vérification stat au lieu d'un nouveau parcours
+        t0 = perf_counter()
+        unchanged = is_unchanged(entry.path, entry.fp)
+        stats.add("check", perf_counter() - t0)
+        if unchanged:
+            return PlannedRename(entry.path, entry.new_name)
+        return PlannedRename(entry.path, entry.new_name, "stale", f"[SKIP] Modifié depuis le plan: {display_path(entry.path)}")
+
+    source = read_plan()
+    return (budget.limit(source) if budget.active else source), check_entry
+
+
+def execute(args: argparse.Namespace, run: Run, source, match, stage, apply_items):
+    """
+    --pipeline : parcours, correspondance et exécution dans leur thread chacun (run_pipeline),
+    record dans le thread principal. Sinon tout s'enchaîne ici ; apply_items(items) est
+    l'étage d'exécution par lots (apply, ou write_plan élément par élément).
+    """
+    if args.pipeline:
+        from prefix_pipeline import run_pipeline
+
+        # cProfile ne voit que le thread principal (record) dans ce mode
+        run_pipeline(source, [match, stage], run.record, queue_size=args.queue_size, stats=run.stats)
+    else:
+        for r in apply_items(filter(None, map(match, source))):
+            run.record(r)
+
+
+def print_summary(out: Console, args: argparse.Namespace, run: Run, collision: str, budget: ScanBudget,
+                  plan_in: "PlanReader | None", start_after: tuple[str, ...], timed_rx: "TimedPattern | None",
+                  prof: Profiler, list_limiter, rename_limiter, path_filter: "PathFilter | None",
+                  visited: Visited, dirs: DirHandleCache):
+    out.info("\n=== Résumé ===")
+    out.info(f"Fichiers analysés : {run.total}")
+    out.info(f"Correspondances   : {run.matched}")
+    if run.plan_out is not None:
+        out.info(f"Planifiés         : {run.planned}")
+    elif args.dry_run:
+        out.info(f"Simulés           : {run.dry}")
     else:
-        print(f"Renommés          : {renamed}")
-    print(f"Skips (collision) : {skipped}")
-    print(f"Erreurs           : {errors}")
+        out.info(f"Renommés          : {run.renamed}")
+    out.info(f"Skips (collision) : {run.skipped}")
+    if plan_in is not None:
+        out.info(f"Périmés (plan)    : {run.stale}")
+    if budget.partial:
+        out.info(f"Arrêt anticipé    : {budget.marker_text()}")
+    if plan_in is not None and plan_in.partial:
+        out.info(f"Plan partiel      : parcours arrêté à la création ({plan_in.partial.get('reason')}, "
+                 f"dernier fichier : {plan_in.partial.get('last')})")
+    if start_after:
+        out.info(f"Reprise           : {run.base_counters.get('total', 0)} fichier(s) traités avant l'interruption (inclus)")
+    out.info(f"Erreurs           : {run.errors}")
+    if timed_rx is not None and timed_rx.timeouts:
+        out.info(f"Regex trop lente  : {len(timed_rx.timeouts)} fichier(s) ignoré(s) (> {args.regex_timeout:g} ms)")
+    out.info(f"Durée totale      : {prof.wall_seconds:.3f} s")
+    for line in run.stats.summary_lines():
+        out.info(line)
+    if args.max_listings or args.max_renames:
+        out.info(
+            f"Temps bridé       : {list_limiter.throttled_seconds + rename_limiter.throttled_seconds:.3f} s "
+            f"(listages {list_limiter.throttled_seconds:.3f} s, renommages {rename_limiter.throttled_seconds:.3f} s)"
+        )
+    if path_filter is not None and path_filter.pruned:
+        out.info(f"Dossiers élagués  : {path_filter.pruned} (--path-pattern)")
+    if visited.dup_dirs or visited.dup_files:
+        out.info(f"Doublons écartés  : {visited.summary()}")
+    if visited.unreadable_dirs:
+        out.info(f"Dossiers ignorés  : {visited.unreadable_dirs} illisible(s)")
+    if dirs.opened or dirs.failed:
+        out.info(f"Dossiers (dirfd)  : {dirs.summary()}")
+    if not args.dry_run and not atomic_noreplace() and collision != "overwrite":
+        out.info("Note              : renommage sans écrasement non atomique sur ce système (exists + rename)")
+    if args.profile:
+        out.info(f"Profil cProfile   : {args.profile}  (python -m pstats {args.profile})")
+
+
+def write_metrics(out: Console, args: argparse.Namespace, run: Run, prof: Profiler, labels: dict[str, str]):
+    from prefix_metrics import format_textfile, write_textfile
+
+    counters = {
+        "files_scanned": run.total,
+        "files_matched": run.matched,
+        "files_renamed": run.renamed,
+        "files_dry_run": run.dry,
+        "files_skipped": run.skipped,
+        "files_planned": run.planned,
+        "files_stale": run.stale,
+        "errors": run.errors,
+    }
+    try:
+        write_textfile(
+            args.metrics_file,
+            format_textfile(counters, run.stats, prof.wall_seconds, run.errors == 0, labels),
+        )
+        out.info(f"Métriques         : {args.metrics_file}")
+    except Exception as e:
+        out.error(f"Impossible d'écrire les métriques : {e}")
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    metrics_labels = check_args(parser, args)
+    out = Console(args.output)
+    budget = ScanBudget(args.max_files, args.max_seconds, args.max_depth)
+
+    rules, path_filter = compile_patterns(args)
+    plan_in = open_plan_in(args)
+    collision = args.collision if plan_in is None else plan_in.meta.get("collision", args.collision)
+    print_header(out, args, collision, budget, path_filter, plan_in)
+    kind, target_path = choose_target(args, plan_in, path_filter)
+
+    if args.estimate:
+        run_estimate(out, args, kind, target_path, rules, path_filter)
+        return
+
+    checkpoint = None
+    start_after: tuple[str, ...] = ()
+    base_counters: dict[str, int] = {}
+    if args.checkpoint:
+        target_path = target_path.resolve()
+        checkpoint, start_after, base_counters = open_checkpoint(out, args, kind, target_path, collision)
+
+    confirm(args, kind, target_path)
+    timed_rx, rules = timed_rules(args, kind, rules)
+
+    stats = PhaseStats(latency_phases=("rename",) if args.metrics_file else ())
+    list_limiter = make_bucket(args.max_listings, stats, "throttle_list")
+    rename_limiter = make_bucket(args.max_renames, stats, "throttle_rename")
+    # Doublons (dev, inode) : dossiers toujours, fichiers avec --dedup-files
+    visited = Visited(files=args.dedup_files)
+
+    # Chemins absolus dans l'historique et le plan : racine résolue une fois, pas chaque fichier
+    if args.history is not None or args.plan_out:
+        target_path = target_path.resolve()
+    run = Run(out, kind, target_path, stats, args.bytes, base_counters)
+    run.checkpoint = checkpoint
+    if args.history is not None and not args.plan_out:
+        run.history = open_history(args, kind, target_path, collision, stats)
+    if args.plan_out:
+        run.plan_out = open_plan_out(args, kind, target_path, collision)
+    if args.log_csv:
+        # Écrit au fil de l'eau en mode flux, et avec un point de reprise (rien de perdu si le run meurt)
+        run.open_log(target_path if kind in ("D", "P") else target_path.parent, args.pipeline or checkpoint is not None)
+
+    if kind == "P":
+        source, match = plan_stages(plan_in, budget, stats)
+    else:
+        # Log CSV et plan créés dans le dossier parcouru : écartés par le parcours lui-même,
+        # avant les limites (--max-files ne compte que de vrais fichiers)
+        own_files = excluded(
+            os.fsencode(p) if args.bytes else p for p in (run.log_path, args.plan_out) if p is not None
+        )
+        # Avec point de reprise : parcours trié, et les non-correspondances vont aussi
+        # jusqu'à record() (position)
+        source = walk_files(
+            target_path, args.recursive, stats, list_limiter, args.follow_symlinks, visited, path_filter,
+            budget, own_files,
+            ordered=checkpoint is not None,
+            start_after=start_after,
+            as_bytes=args.bytes,
+        )
+        match = matcher(
+            target_path, rules, stats, path_filter,
+            keep_unmatched=checkpoint is not None,
+            on_unmatched=run.count_unmatched,
+            as_bytes=args.bytes,
+        )
+    source, match = run.walked(source), run.counted(match)
+
+    with Profiler(args.profile) as prof, DirHandleCache(args.dir_handles) as dirs:
+        if run.plan_out is not None:
+            stage = run.write_plan
+            apply_items = partial(map, run.write_plan)
+        else:
+            stage = partial(
+                apply_one, dry_run=args.dry_run, collision=collision, stats=stats, dirs=dirs,
+                rename_limiter=rename_limiter,
+            )
+            apply_items = partial(
+                apply, dry_run=args.dry_run, collision=collision, stats=stats, rename_limiter=rename_limiter, dirs=dirs,
+            )
+        out.start_progress(partial(run.progress_snapshot, args.dry_run))
+        interrupted = False
+        try:
+            execute(args, run, source, match, stage, apply_items)
+        except BaseException:
+            interrupted = True
+            out.close()
+            if run.history is not None:
+                run.history.close("interrupted")
+            # Interruption (Ctrl+C, erreur) : dernière position sûre, pour --resume
+            if checkpoint is not None:
+                checkpoint.flush()
+                out.error(f"\nPoint de reprise : {args.checkpoint} (relancer avec --resume)")
+            raise
+        finally:
+            out.stop_progress()
+            if run.plan_out is not None:
+                # Fermé même sur erreur ou Ctrl+C, avec un marqueur de plan partiel (--apply le signale)
+                marker = budget.marker()
+                if interrupted:
+                    marker = {"partial": True, "reason": "interrupted", "files": run.total, "last": run.last_planned}
+                run.plan_out.close(marker)
+            if plan_in is not None:
+                plan_in.close()
+            if timed_rx is not None:
+                timed_rx.close()
+
+        if checkpoint is not None:
+            if budget.partial:
+                # Arrêt sur limite : le run pourra continuer là où il s'est arrêté
+                checkpoint.flush()
+                out.info(f"\nPoint de reprise : {args.checkpoint} (relancer avec --resume)")
+            else:
+                checkpoint.remove()
+
+        if run.history is not None:
+            run.history.close("partial" if budget.partial else "ok")
+            out.info(f"\nHistorique : {run.history.path} (run {run.history.run_id}, {run.history.count} opération(s))")
+
+        if run.plan_out is not None:
+            note = "  — PARTIEL" if budget.partial else ""
+            out.info(f"\nPlan écrit : {args.plan_out} ({run.planned} entrée(s)){note}")
+
+        if isinstance(run.log_rows, CsvLogStream):
+            run.log_rows.close()
+            out.info(f"\nLog CSV écrit : {run.log_path}")
+        elif run.log_path is not None:
+            try:
+                with stats.phase("log", len(run.log_rows)):
+                    write_csv_log(run.log_path, run.log_rows)
+                out.info(f"\nLog CSV écrit : {run.log_path}")
+            except Exception as e:
+                out.error(f"\nImpossible d'écrire le log CSV : {e}")
+
+    print_summary(
+        out, args, run, collision, budget, plan_in, start_after, timed_rx, prof,
+        list_limiter, rename_limiter, path_filter, visited, dirs,
+    )
+    if args.metrics_file:
+        write_metrics(out, args, run, prof, metrics_labels)
+    out.close()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,123 +1,26 @@
 import os
 import re
-import csv
 import queue
 import threading
-from dataclasses import dataclass
-from datetime import datetime
+from time import perf_counter
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
+from prefix_budget import ScanBudget
+from prefix_fsops import DirHandleCache
+from prefix_perf import PhaseStats, Profiler
+from prefix_plan import PlanStore, RenameItem
+from prefix_regexguard import analyze, timeout_supported
+from prefix_throttle import TokenBucket, make_bucket
+# Modèle (planification, renommage, log) : voir prefix_renamer.py
+from prefix_renamer import (
+    build_regex,
+    rename_item,
+    write_csv_log,
+)
+from prefix_scanproc import ScanProcess, ScanRequest
 
-# -------------------------
-# Model
-# -------------------------
-
-@dataclass
-class RenameItem:
-    old_path: str
-    old_name: str
-    new_name: str
-    reason: str
-    will_rename: bool
-
-
-def build_regex(pattern: str, ignore_case: bool, word_only: bool) -> re.Pattern:
-    flags = re.UNICODE
-    if ignore_case:
-        flags |= re.IGNORECASE
-    if word_only and pattern:
-        pattern = r"\b" + pattern + r"\b"
-    return re.compile(pattern, flags)
-
-
-def make_unique_name(folder: str, desired_name: str) -> str:
-    base, ext = os.path.splitext(desired_name)
-    candidate = desired_name
-    n = 1
-    while os.path.exists(os.path.join(folder, candidate)):
-        candidate = f"{base} ({n}){ext}"
-        n += 1
-    return candidate
-
-
-def plan_rename_for_path(
-    path: str,
-    rx: re.Pattern,
-    prefix: str,
-    skip_already_prefixed: bool,
-    collision_mode: str,  # "skip" | "overwrite" | "number"
-) -> RenameItem:
-    name = os.path.basename(path)
-
-    if skip_already_prefixed and name.startswith(prefix):
-        return RenameItem(path, name, name, "already_prefixed", False)
-
-    if rx.search(name):
-        desired = prefix + name
-        folder = os.path.dirname(path)
-        new_name = desired
-        new_path = os.path.join(folder, new_name)
-
-        if os.path.exists(new_path):
-            if collision_mode == "skip":
-                return RenameItem(path, name, new_name, "collision_skip", False)
-            if collision_mode == "overwrite":
-                return RenameItem(path, name, new_name, "match_overwrite", True)
-            if collision_mode == "number":
-                unique = make_unique_name(folder, desired)
-                return RenameItem(path, name, unique, "match_numbered", True)
-
-        return RenameItem(path, name, new_name, "match", True)
-
-    return RenameItem(path, name, name, "no_match", False)
-
-
-def scan_folder(
-    folder: str,
-    rx: re.Pattern,
-    prefix: str,
-    recursive: bool,
-    skip_already_prefixed: bool,
-    collision_mode: str,
-) -> list[RenameItem]:
-    items: list[RenameItem] = []
-    if recursive:
-        for root, _, files in os.walk(folder):
-            for f in files:
-                p = os.path.join(root, f)
-                if os.path.isfile(p):
-                    items.append(plan_rename_for_path(p, rx, prefix, skip_already_prefixed, collision_mode))
-    else:
-        for f in os.listdir(folder):
-            p = os.path.join(folder, f)
-            if os.path.isfile(p):
-                items.append(plan_rename_for_path(p, rx, prefix, skip_already_prefixed, collision_mode))
-    return items
-
-
-def scan_files(
-    files: list[str],
-    rx: re.Pattern,
-    prefix: str,
-    skip_already_prefixed: bool,
-    collision_mode: str,
-) -> list[RenameItem]:
-    items: list[RenameItem] = []
-    for p in files:
-        if os.path.isfile(p):
-            items.append(plan_rename_for_path(p, rx, prefix, skip_already_prefixed, collision_mode))
-    return items
-
-
-def write_csv_log(log_path: str, rows: list[dict]):
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-    fieldnames = ["timestamp", "status", "old_path", "new_path", "reason", "error"]
-    with open(log_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
+SCAN_POLL_MS = 30  # intégration des lots du scan : petites tranches, la fenêtre reste fluide
 
 
 # -------------------------
@@ -133,6 +36,7 @@ class App(tk.Tk):
 
         self.msg_queue: queue.Queue = queue.Queue()
         self.worker_thread: threading.Thread | None = None
+        self.scan_proc: ScanProcess | None = None
         self.stop_flag = threading.Event()
 
         # Mode & selections
@@ -151,13 +55,25 @@ class App(tk.Tk):
 
         self.var_dry_run = tk.BooleanVar(value=True)
         self.var_collision = tk.StringVar(value="number")  # "number" | "skip" | "overwrite"
+        self.var_profile = tk.BooleanVar(value=False)
+        self.var_keep_unmatched = tk.BooleanVar(value=True)
+        # Limites de débit (NAS partagé) : 0 = illimité
+        self.var_max_listings = tk.StringVar(value="0")
+        self.var_max_renames = tk.StringVar(value="0")
+        # Limites de l'aperçu (0 / vide = illimité)
+        self.var_max_files = tk.StringVar(value="0")
+        self.var_max_seconds = tk.StringVar(value="0")
+        self.var_max_depth = tk.StringVar(value="")
+        # Budget de temps de la regex par nom, en ms (0 = illimité ; dépassement = fichier écarté)
+        self.var_regex_timeout = tk.StringVar(value="0")
 
         # State
-        self.scanned_items: list[RenameItem] = []
+        self.scanned_items = PlanStore("")
         self.var_status = tk.StringVar(value="Prêt.")
         self.var_count_total = tk.StringVar(value="Total: 0")
         self.var_count_rename = tk.StringVar(value="À renommer: 0")
         self.var_scope = tk.StringVar(value="Cible: (aucune)")
+        self.var_timings = tk.StringVar(value="")
         self._log_base_dir = ""
 
         # UI refs
@@ -220,6 +136,30 @@ class App(tk.Tk):
                            values=["number", "skip", "overwrite"], width=12)
         cmb.grid(row=2, column=3, sticky="w", padx=(0, 10), pady=4)
 
+        ttk.Checkbutton(params, text="Profiler (cProfile)", variable=self.var_profile).grid(row=3, column=0, sticky="w", padx=10, pady=4)
+        ttk.Checkbutton(params, text="Garder les non-correspondances (aperçu)", variable=self.var_keep_unmatched).grid(row=3, column=1, sticky="w", padx=10, pady=4)
+        ttk.Label(params, text="Budget regex (ms/nom):").grid(row=3, column=2, sticky="e", padx=(10, 4), pady=4)
+        ttk.Spinbox(
+            params, textvariable=self.var_regex_timeout, from_=0, to=60000, increment=50, width=10,
+            state="normal" if timeout_supported() else "disabled",
+        ).grid(row=3, column=3, sticky="w", padx=(0, 10), pady=4)
+
+        ttk.Label(params, text="Listages/s max:").grid(row=4, column=0, sticky="w", padx=10, pady=4)
+        ttk.Spinbox(params, textvariable=self.var_max_listings, from_=0, to=100000, increment=10, width=10).grid(row=4, column=1, sticky="w", padx=(0, 10), pady=4)
+        ttk.Label(params, text="Renommages/s max:").grid(row=4, column=2, sticky="e", padx=(10, 4), pady=4)
+        ttk.Spinbox(params, textvariable=self.var_max_renames, from_=0, to=100000, increment=10, width=10).grid(row=4, column=3, sticky="w", padx=(0, 10), pady=4)
+        ttk.Label(params, text="(0 = illimité)").grid(row=4, column=4, sticky="w", padx=(0, 10), pady=4)
+
+        limits = ttk.Frame(params)
+        limits.grid(row=5, column=0, columnspan=5, sticky="w", padx=10, pady=4)
+        ttk.Label(limits, text="Aperçu — fichiers max:").pack(side="left")
+        ttk.Spinbox(limits, textvariable=self.var_max_files, from_=0, to=100000000, increment=10000, width=10).pack(side="left", padx=(4, 12))
+        ttk.Label(limits, text="secondes max:").pack(side="left")
+        ttk.Spinbox(limits, textvariable=self.var_max_seconds, from_=0, to=86400, increment=10, width=6).pack(side="left", padx=(4, 12))
+        ttk.Label(limits, text="profondeur max:").pack(side="left")
+        ttk.Spinbox(limits, textvariable=self.var_max_depth, from_=0, to=1000, increment=1, width=5).pack(side="left", padx=(4, 12))
+        ttk.Label(limits, text="(0 / vide = illimité ; profondeur 0 = dossier seul)").pack(side="left")
+
         # ---- Boutons ----
         btns = ttk.Frame(self)
         btns.pack(fill="x", **pad)
@@ -233,6 +173,9 @@ class App(tk.Tk):
         self.btn_stop = ttk.Button(btns, text="Stop", command=self.stop, state="disabled")
         self.btn_stop.pack(side="left", padx=(8, 0))
 
+        self.btn_export = ttk.Button(btns, text="Exporter l'aperçu (CSV)…", command=self.export_preview, state="disabled")
+        self.btn_export.pack(side="left", padx=(8, 0))
+
         # ---- Counts + progress ----
         info = ttk.Frame(self)
         info.pack(fill="x", **pad)
@@ -244,7 +187,8 @@ class App(tk.Tk):
         self.progress = ttk.Progressbar(self, orient="horizontal", mode="determinate")
         self.progress.pack(fill="x", padx=10, pady=(0, 6))
 
-        ttk.Label(self, textvariable=self.var_status).pack(fill="x", padx=10, pady=(0, 8))
+        ttk.Label(self, textvariable=self.var_status).pack(fill="x", padx=10, pady=(0, 2))
+        ttk.Label(self, textvariable=self.var_timings).pack(fill="x", padx=10, pady=(0, 8))
 
         # ---- PanedWindow (Preview / Modified) ----
         # Commence juste sous la progress bar (donc ici), et occupe tout le reste.
@@ -351,6 +295,40 @@ class App(tk.Tk):
     def _clear_modified_list(self):
         self.mod_list.delete(0, tk.END)
 
+    def _profile_path(self, base_dir: str, kind: str) -> str | None:
+        """Chemin du fichier pstats si le profilage est coché, sinon None."""
+        if not self.var_profile.get():
+            return None
+        from datetime import datetime
+
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(base_dir, f"AI_prefix_profile_{kind}_{ts}.pstats")
+
+    def _get_rate(self, var: tk.StringVar, label: str) -> float | None:
+        """Limite de débit saisie (0 = illimité) ; None + message si invalide."""
+        try:
+            rate = float(var.get().strip().replace(",", ".") or 0)
+        except ValueError:
+            rate = -1.0
+        if rate < 0:
+            messagebox.showerror("Erreur", f"{label} : nombre >= 0 attendu (0 = illimité).")
+            return None
+        return rate
+
+    def _get_budget(self) -> ScanBudget | None:
+        """Limites de l'aperçu saisies ; None + message si invalides."""
+        try:
+            max_files = int(self.var_max_files.get().strip() or 0)
+            max_seconds = float(self.var_max_seconds.get().strip().replace(",", ".") or 0)
+            depth = self.var_max_depth.get().strip()
+            max_depth = int(depth) if depth else None
+            if max_files < 0 or max_seconds < 0 or (max_depth is not None and max_depth < 0):
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Erreur", "Limites de l'aperçu : nombres >= 0 attendus (0 / vide = illimité).")
+            return None
+        return ScanBudget(max_files, max_seconds, max_depth)
+
     def _get_rx(self) -> re.Pattern | None:
         pattern = self.var_pattern.get()
         try:
@@ -373,74 +351,148 @@ class App(tk.Tk):
         if rx is None:
             return
 
-        self.var_status.set("Scan en cours…")
-        self.update_idletasks()
+        regex_timeout = self._get_rate(self.var_regex_timeout, "Budget regex (ms/nom)")
+        if regex_timeout is None:
+            return
+        risks = analyze(self.var_pattern.get(), self.var_ignore_case.get())
+        if risks:
+            guard = (f"Chaque nom est limité à {regex_timeout:g} ms (fichiers trop lents écartés)."
+                     if regex_timeout else "Sans « Budget regex », un nom piégeux peut bloquer le scan.")
+            if not messagebox.askyesno(
+                "Regex risquée",
+                "Risque de backtracking catastrophique :\n- " + "\n- ".join(risks) + f"\n\n{guard}\n\nContinuer ?",
+            ):
+                return
 
-        collision_mode = self.var_collision.get()
+        max_listings = self._get_rate(self.var_max_listings, "Listages/s max")
+        if max_listings is None:
+            return
+        budget = self._get_budget()
+        if budget is None:
+            return
 
         if self.var_mode.get() == "folder":
             folder = self.var_folder.get().strip()
             if not folder or not os.path.isdir(folder):
                 messagebox.showerror("Erreur", "Choisis un dossier valide.")
                 return
-
-            self.scanned_items = scan_folder(
-                folder=folder,
-                rx=rx,
-                prefix=prefix,
-                recursive=self.var_recursive.get(),
-                skip_already_prefixed=self.var_skip_prefixed.get(),
-                collision_mode=collision_mode,
-            )
             base_for_log = folder
+            files: list[str] = []
         else:
             if not self.selected_files:
                 messagebox.showerror("Erreur", "Choisis au moins un fichier.")
                 return
-
-            self.scanned_items = scan_files(
-                files=self.selected_files,
-                rx=rx,
-                prefix=prefix,
-                skip_already_prefixed=self.var_skip_prefixed.get(),
-                collision_mode=collision_mode,
-            )
+            folder = None
             base_for_log = os.path.dirname(self.selected_files[0])
-
+            files = list(self.selected_files)
+
+        request = ScanRequest(
+            folder=folder,
+            files=files,
+            pattern=self.var_pattern.get(),
+            ignore_case=self.var_ignore_case.get(),
+            word_only=self.var_word_only.get(),
+            prefix=prefix,
+            recursive=self.var_recursive.get(),
+            skip_prefixed=self.var_skip_prefixed.get(),
+            collision_mode=self.var_collision.get(),
+            keep_unmatched=self.var_keep_unmatched.get(),
+            max_listings=max_listings,
+            max_files=budget.max_files,
+            max_seconds=budget.max_seconds,
+            max_depth=budget.max_depth,
+            profile_path=self._profile_path(base_for_log, "scan"),
+            regex_timeout=regex_timeout / 1000,
+        )
         self._log_base_dir = base_for_log
 
-        total = len(self.scanned_items)
-        will = sum(1 for it in self.scanned_items if it.will_rename)
+        # Statut seulement une fois la saisie validée : un retour anticipé le laisserait figé
+        self.var_status.set("Scan en cours…")
+        self.update_idletasks()
+
+        self._clear_tree()
+        self._clear_modified_list()
+        self.btn_scan.configure(state="disabled")
+        self.btn_run.configure(state="disabled")
+        self.btn_export.configure(state="disabled")
+        self.btn_stop.configure(state="normal")
+        self.progress.configure(mode="indeterminate")
+        self.progress.start(20)
+
+        # Parcours + regex dans un processus fils : Tk garde le GIL pour lui
+        self.scan_proc = ScanProcess(request)
+        self.after(SCAN_POLL_MS, self._poll_scan)
+
+    def _poll_scan(self):
+        proc = self.scan_proc
+        if proc is None:
+            return
+        if not proc.poll():
+            self.var_status.set(f"Scan en cours… {proc.items.total} fichier(s) analysé(s)")
+            self.after(SCAN_POLL_MS, self._poll_scan)
+            return
+        self.scan_proc = None
+        self.progress.stop()
+        self.progress.configure(mode="determinate")
+        self.btn_scan.configure(state="normal")
+        self.btn_stop.configure(state="disabled")
+        if proc.error is not None:
+            self.var_status.set(f"Scan échoué : {proc.error}")
+            messagebox.showerror("Erreur", f"Scan impossible : {proc.error}")
+            return
+        self._show_scan(proc.items, proc.result)
+
+    def _show_scan(self, items: PlanStore, result: dict):
+        self.scanned_items = items
+        timings = f"Scan : {result['stats']}"
+        if result["throttled"]:
+            timings += f"  —  bridé {result['throttled']:.2f} s"
+        if result["dup_dirs"]:
+            timings += f"  —  doublons écartés : {result['dup_dirs']} dossier(s)"
+        if result["unreadable_dirs"]:
+            timings += f"  —  dossiers illisibles ignorés : {result['unreadable_dirs']}"
+        self.var_timings.set(timings)
+
+        total = self.scanned_items.total
+        will = self.scanned_items.will_count
 
         self.var_count_total.set(f"Total: {total}")
         self.var_count_rename.set(f"À renommer: {will}")
         self.progress["value"] = 0
         self.progress["maximum"] = max(1, will)
 
-        self._clear_tree()
-        self._clear_modified_list()
-
-        sorted_items = sorted(self.scanned_items, key=lambda x: (not x.will_rename, x.reason, x.old_name.lower()))
-        for it in sorted_items[:3000]:
+        # Seules les 3000 premières lignes sont affichées : sélection partielle, pas de tri complet
+        for it in self.scanned_items.preview(3000):
             action = "RENOMMER" if it.will_rename else "—"
             self.tree.insert("", "end", values=(it.old_name, it.new_name, action, it.reason, it.old_path))
 
         self.btn_run.configure(state="normal" if will > 0 else "disabled")
+        self.btn_export.configure(state="normal" if len(self.scanned_items) else "disabled")
 
         self.var_status.set(f"Scan terminé. {will} fichier(s) à renommer.")
         if total > 3000:
             self.var_status.set(self.var_status.get() + " (Aperçu limité à 3000 lignes)")
+        if self.scanned_items.partial:
+            self.var_status.set(self.var_status.get() + f"  —  APERÇU PARTIEL : {result['partial_text']}")
+        if result["regex_timeouts"]:
+            self.var_status.set(
+                self.var_status.get() + f"  —  regex trop lente : {result['regex_timeouts']} fichier(s) écarté(s) (regex_timeout)"
+            )
 
     def run(self):
         if not self.scanned_items:
             messagebox.showinfo("Info", "Fais d'abord une prévisualisation.")
             return
 
-        todo = [it for it in self.scanned_items if it.will_rename]
+        todo = list(self.scanned_items.iter_will_rename())
         if not todo:
             messagebox.showinfo("Info", "Aucun fichier à renommer.")
             return
 
+        max_renames = self._get_rate(self.var_max_renames, "Renommages/s max")
+        if max_renames is None:
+            return
+
         dry = self.var_dry_run.get()
         if not dry:
             if not messagebox.askyesno("Confirmation", "Renommer les fichiers maintenant ?"):
@@ -457,21 +509,100 @@ class App(tk.Tk):
         self.progress["maximum"] = max(1, len(todo))
         self.var_status.set("Traitement en cours…")
 
+        from datetime import datetime
+
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         log_path = os.path.join(self._log_base_dir, f"AI_prefix_rename_log_{ts}.csv")
 
+        profile_path = self._profile_path(self._log_base_dir, "run")
+
         self.worker_thread = threading.Thread(
             target=self._worker_rename,
-            args=(todo, log_path, dry, self.var_collision.get()),
+            args=(todo, log_path, dry, self.var_collision.get(), profile_path, self.scanned_items.prefix, max_renames),
             daemon=True,
         )
         self.worker_thread.start()
 
+    def export_preview(self):
+        """Aperçu complet, dans l'ordre affiché, en CSV (tri externe : mémoire bornée)."""
+        if not len(self.scanned_items):
+            return
+        path = filedialog.asksaveasfilename(
+            title="Exporter l'aperçu",
+            initialdir=self._log_base_dir or None,
+            initialfile="AI_prefix_preview.csv",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv")],
+        )
+        if not path:
+            return
+
+        import csv
+
+        self.var_status.set("Export en cours…")
+        self.update_idletasks()
+        t0 = perf_counter()
+        try:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow(["old_name", "new_name", "action", "reason", "old_path"])
+                for it in self.scanned_items.iter_sorted():
+                    w.writerow([it.old_name, it.new_name, "RENOMMER" if it.will_rename else "", it.reason, it.old_path])
+        except OSError as e:
+            messagebox.showerror("Erreur", f"Export impossible : {e}")
+            self.var_status.set("Export échoué.")
+            return
+        self.var_status.set(f"Aperçu exporté : {path} ({len(self.scanned_items)} lignes, {perf_counter() - t0:.2f} s)")
+
     def stop(self):
+        if self.scan_proc is not None:
+            self.scan_proc.cancel()
+            self.scan_proc = None
+            self.progress.stop()
+            self.progress.configure(mode="determinate")
+            self.btn_scan.configure(state="normal")
+            self.btn_stop.configure(state="disabled")
+            self.var_status.set("Scan annulé.")
+            return
         self.stop_flag.set()
         self.var_status.set("Arrêt demandé…")
 
-    def _worker_rename(self, items: list[RenameItem], log_path: str, dry_run: bool, collision_mode: str):
+    def _worker_rename(
+        self,
+        items: list[RenameItem],
+        log_path: str,
+        dry_run: bool,
+        collision_mode: str,
+        profile_path: str | None = None,
+        prefix: str = "",
+        max_renames: float = 0.0,
+    ):
+        # cProfile ne suit que le thread courant : le profil est donc démarré ici, dans le worker
+        stats = PhaseStats()
+        limiter = make_bucket(max_renames, stats, "throttle_rename")
+        with Profiler(profile_path), DirHandleCache() as dirs:
+            self._worker_rename_loop(items, log_path, dry_run, collision_mode, stats, dirs, prefix, limiter)
+        timings = f"Exécution : {stats.compact()}"
+        if limiter.throttled_seconds:
+            timings += f"  —  bridé {limiter.throttled_seconds:.2f} s"
+        if profile_path:
+            timings += f"  —  profil: {profile_path}"
+        self.msg_queue.put(("timings", timings))
+        self.msg_queue.put(("done", None))
+
+    def _worker_rename_loop(
+        self,
+        items: list[RenameItem],
+        log_path: str,
+        dry_run: bool,
+        collision_mode: str,
+        stats: PhaseStats,
+        dirs: DirHandleCache,
+        prefix: str,
+        limiter: TokenBucket,
+    ):
+        from datetime import datetime
+
         log_rows: list[dict] = []
         processed = 0
 
@@ -484,18 +615,17 @@ class App(tk.Tk):
             folder = os.path.dirname(old_path)
             new_path = os.path.join(folder, it.new_name)
 
-            status = "DRY_RUN" if dry_run else "RENAMED"
+            status = "DRY_RUN"
             error = ""
 
-            try:
-                if not dry_run:
-                    if collision_mode == "overwrite":
-                        os.replace(old_path, new_path)
-                    else:
-                        os.rename(old_path, new_path)
-            except Exception as e:
-                status = "ERROR"
-                error = str(e)
+            if not dry_run:
+                limiter.acquire()  # temps bridé compté à part ("throttle_rename")
+            t0 = perf_counter()
+            if not dry_run:
+                # renameat relatif au dossier (descripteur réutilisé), sans écrasement sauf overwrite
+                status, new_name, error = rename_item(dirs, it, collision_mode, prefix)
+                new_path = os.path.join(folder, new_name)
+            stats.add("rename", perf_counter() - t0)
 
             processed += 1
 
@@ -515,13 +645,12 @@ class App(tk.Tk):
             self.msg_queue.put(("status", f"{'Simulation' if dry_run else 'Renommage'}: {processed}/{len(items)}"))
 
         try:
-            write_csv_log(log_path, log_rows)
+            with stats.phase("log", len(log_rows)):
+                write_csv_log(log_path, log_rows)
             self.msg_queue.put(("status", f"Terminé. Log CSV: {log_path}"))
         except Exception as e:
             self.msg_queue.put(("status", f"Terminé, mais log CSV impossible: {e}"))
 
-        self.msg_queue.put(("done", None))
-
     def _poll_queue(self):
         try:
             while True:
@@ -533,6 +662,9 @@ class App(tk.Tk):
                 elif msg == "status":
                     self.var_status.set(payload)
 
+                elif msg == "timings":
+                    self.var_timings.set(payload)
+
                 elif msg == "modified":
                     status, old_path, new_path = payload
                     line = f"[{status}] {old_path}  ->  {new_path}"
@@ -542,7 +674,7 @@ class App(tk.Tk):
                 elif msg == "done":
                     self.btn_scan.configure(state="normal")
                     self.btn_stop.configure(state="disabled")
-                    if self.scanned_items and any(it.will_rename for it in self.scanned_items):
+                    if self.scanned_items.will_count > 0:
                         self.btn_run.configure(state="normal")
 
         except queue.Empty:
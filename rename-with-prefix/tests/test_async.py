@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+import prefix_async
+from prefix_renamer import PlannedRename, compile_rules
+
+
+def make_files(root, names):
+    for name in names:
+        (root / name).write_text(name)
+
+
+def run_apply(items, **kw):
+    results = []
+    counts = asyncio.run(prefix_async.apply(items, on_result=results.append, **kw))
+    return counts, results
+
+
+def test_plan_then_apply(tmp_path):
+    make_files(tmp_path, [f"f{i}_RAG.txt" for i in range(20)] + ["autre.txt"])
+
+    async def main():
+        items = prefix_async.plan(tmp_path, compile_rules("RAG", "AI_"), batch_size=3)
+        return await prefix_async.apply(items, batch_size=4, concurrency=3)
+
+    assert asyncio.run(main())["RENAMED"] == 20
+    assert len(list(tmp_path.glob("AI_*"))) == 20
+
+
+def test_held_items_are_not_renamed(tmp_path):
+    make_files(tmp_path, ["a_RAG.txt", "b.txt", "c_RAG.txt"])
+    items = [
+        PlannedRename(tmp_path / "a_RAG.txt", "AI_a_RAG.txt"),
+        PlannedRename(tmp_path / "b.txt", None, "no_match"),
+        PlannedRename(tmp_path / "c_RAG.txt", "AI_c_RAG.txt", "stale", "[SKIP] Modifié depuis le plan"),
+    ]
+    counts, results = run_apply(items)
+    assert sorted((r.path.name, r.status) for r in results) == [
+        ("a_RAG.txt", "RENAMED"), ("b.txt", "NOMATCH"), ("c_RAG.txt", "SKIP"),
+    ]
+    assert counts["RENAMED"] == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["AI_a_RAG.txt", "b.txt", "c_RAG.txt"]
+
+
+def test_dry_run_reserves_numbered_names_across_batches(tmp_path):
+    # Dix fichiers dont la cible existe déjà, en lots parallèles d'un élément
+    make_files(tmp_path, ["AI_x.txt"])
+    items = [PlannedRename(tmp_path / f"x{i}.txt", "AI_x.txt") for i in range(10)]
+    make_files(tmp_path, [p.path.name for p in items])
+    counts, results = run_apply(items, dry_run=True, collision="number", batch_size=1, concurrency=4)
+    assert counts["DRY_RUN"] == 10
+    assert sorted(r.new_name for r in results) == sorted(f"AI_x ({i}).txt" for i in range(1, 11))
+    assert not (tmp_path / "AI_x (1).txt").exists()
+
+
+def test_cancel_stops_pending_batches(tmp_path):
+    items = [PlannedRename(tmp_path / f"f{i}_RAG.txt", f"AI_f{i}_RAG.txt") for i in range(200)]
+    make_files(tmp_path, [p.path.name for p in items])
+    started = threading.Event()
+    results = []
+
+    def on_result(r):
+        results.append(r)
+        started.set()
+
+    async def slow_items():
+        for i, item in enumerate(items):
+            if i == 50:
+                # Laisse le premier lot se terminer, puis attend l'annulation
+                while not started.is_set():
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(10)
+            yield item
+
+    async def main():
+        task = asyncio.create_task(prefix_async.apply(slow_items(), batch_size=10, on_result=on_result))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    assert asyncio.run(asyncio.wait_for(main(), 5))
+    renamed = len(list(tmp_path.glob("AI_*")))
+    assert 0 < renamed < 200
+    assert renamed <= 50
@@ -0,0 +1,45 @@
+import itertools
+
+import pytest
+
+import prefix_budget
+from prefix_budget import ScanBudget
+from prefix_renamer import compile_rules, excluded, plan
+
+
+def make_files(root, names):
+    for name in names:
+        (root / name).write_text(name)
+
+
+def test_excluded_files_do_not_count_in_budget(tmp_path):
+    make_files(tmp_path, [f"f{i}_RAG.txt" for i in range(5)] + ["log.csv"])
+    budget = ScanBudget(max_files=5)
+    own = excluded([tmp_path / "log.csv", None])
+    items = list(plan(tmp_path, compile_rules(".", "AI_"), budget=budget, exclude=own))
+    assert len(items) == 5
+    assert "log.csv" not in {it.path.name for it in items}
+    assert budget.stopped is None
+
+
+class CountingLimiter:
+    count = 0
+
+    def acquire(self):
+        self.count += 1
+
+
+@pytest.mark.parametrize("ordered", [False, True])
+def test_max_seconds_stops_walk_of_empty_dirs(tmp_path, monkeypatch, ordered):
+    # Arbre sans aucun fichier : seul le parcours peut voir passer l'échéance
+    for i in range(50):
+        (tmp_path / f"d{i:02d}" / "sub").mkdir(parents=True)
+    clock = itertools.count()
+    monkeypatch.setattr(prefix_budget, "monotonic", lambda: next(clock))  # 1 s par lecture
+    budget = ScanBudget(max_seconds=10)
+    listings = CountingLimiter()
+    items = plan(tmp_path, compile_rules(".", "AI_"), recursive=True, list_limiter=listings, budget=budget,
+                 ordered=ordered)
+    assert list(items) == []
+    assert budget.stopped == "max_seconds"
+    assert listings.count < 20
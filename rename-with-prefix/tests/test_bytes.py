@@ -0,0 +1,11 @@
+from prefix_renamer import apply, compile_rules, plan
+
+
+def test_plan_bytes_names(tmp_path):
+    raw = bytes(tmp_path) + b"/\xff_RAG.bin"
+    with open(raw, "wb"):
+        pass
+    rules = compile_rules("RAG", "AI_", as_bytes=True)
+    [r] = apply(plan(tmp_path, rules, as_bytes=True))
+    assert r.status == "RENAMED"
+    assert r.new_name == b"AI_\xff_RAG.bin"
@@ -0,0 +1,115 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from prefix_checkpoint import CheckpointWriter, load_checkpoint, mismatches
+from prefix_renamer import compile_rules, iter_files_sorted, plan
+
+CLI = Path(__file__).resolve().parents[1] / "rename-with-prefix.py"
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "racine"
+    for rel in ("a_RAG.txt", "b.txt", "sub/c_RAG.txt", "sub/d_RAG.txt", "sub/deep/e_RAG.txt", "z_RAG.txt"):
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(rel)
+    return root
+
+
+def rel_parts(root, paths):
+    return [p.relative_to(root).parts for p in paths]
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    path = str(tmp_path / "ck.json")
+    meta = {"root": "/data", "pattern": "RAG"}
+    ck = CheckpointWriter(path, meta, every_s=3600)
+    ck.update(("sub", "c_RAG.txt"), lambda: {"total": 3})
+    assert ck.writes == 0  # écriture différée
+    ck.flush()
+    data = load_checkpoint(path)
+    assert data["last"] == ["sub", "c_RAG.txt"]
+    assert data["counters"] == {"total": 3}
+    assert mismatches(data, meta) == []
+    assert mismatches(data, {**meta, "pattern": "PDF"}) == ["pattern"]
+    ck.remove()
+    with pytest.raises(FileNotFoundError):
+        load_checkpoint(path)
+
+
+def test_load_checkpoint_rejects_other_files(tmp_path):
+    path = tmp_path / "autre.json"
+    path.write_text('{"format": "autre"}')
+    with pytest.raises(ValueError):
+        load_checkpoint(str(path))
+
+
+def test_sorted_walk_resumes_after_last(tree):
+    full = rel_parts(tree, iter_files_sorted(tree, True))
+    assert full == sorted(full)
+    for i, last in enumerate(full):
+        assert rel_parts(tree, iter_files_sorted(tree, True, start_after=last)) == full[i + 1:]
+
+
+def test_plan_resume_keeps_unmatched_positions(tree):
+    rules = compile_rules("RAG", "AI_")
+    items = list(plan(tree, rules, True, ordered=True, start_after=("b.txt",), keep_unmatched=True))
+    assert rel_parts(tree, [it.path for it in items]) == [
+        ("sub", "c_RAG.txt"), ("sub", "d_RAG.txt"), ("sub", "deep", "e_RAG.txt"), ("z_RAG.txt",),
+    ]
+    items = list(plan(tree, rules, True, ordered=True, keep_unmatched=True))
+    assert [it.reason for it in items[:2]] == ["match", "no_match"]
+
+
+def run_cli(*args):
+    res = subprocess.run(
+        [sys.executable, str(CLI), "--yes", "--summary-only", *args],
+        capture_output=True, text=True, encoding="utf-8", errors="replace", check=True,
+    )
+    return int(re.search(r"Fichiers analysés : (\d+)", res.stdout).group(1))
+
+
+def test_cli_checkpoint_resume(tree, tmp_path):
+    ck = tmp_path / "ck.json"
+    common = ("--path", str(tree), "--recursive", "--checkpoint", str(ck))
+    assert run_cli(*common, "--max-files", "3") == 3
+    data = load_checkpoint(str(ck))
+    assert data["counters"]["total"] == 3
+    assert sorted(p.name for p in tree.rglob("AI_*")) == ["AI_a_RAG.txt", "AI_c_RAG.txt"]
+
+    # Reprise : compteurs cumulés, aucun fichier traité deux fois
+    assert run_cli(*common, "--resume") == 6
+    assert not ck.exists()
+    assert sorted(p.name for p in tree.rglob("*") if p.is_file()) == [
+        "AI_a_RAG.txt", "AI_c_RAG.txt", "AI_d_RAG.txt", "AI_e_RAG.txt", "AI_z_RAG.txt", "b.txt",
+    ]
+
+
+def test_checkpoint_keeps_non_utf8_last(tmp_path):
+    path = str(tmp_path / "ck.json")
+    last = ("sub", os.fsdecode(b"bad_RAG_\xff.txt"))
+    ck = CheckpointWriter(path, {}, every_s=3600)
+    ck.update(last, dict)
+    ck.flush()
+    assert tuple(load_checkpoint(path)["last"]) == last
+
+
+def test_cli_resume_after_non_utf8_name(tmp_path):
+    root = tmp_path / "racine"
+    root.mkdir()
+    for name in (b"a_RAG.txt", b"b_RAG_\xff.txt", b"c_RAG.txt"):
+        (root / os.fsdecode(name)).write_text("x")
+    ck = tmp_path / "ck.json"
+    common = ("--path", str(root), "--checkpoint", str(ck))
+    assert run_cli(*common, "--max-files", "2") == 2
+    assert os.fsencode(load_checkpoint(str(ck))["last"][-1]) == b"b_RAG_\xff.txt"
+    assert run_cli(*common, "--resume") == 3
+    assert sorted(os.fsencode(p.name) for p in root.iterdir()) == [
+        b"AI_a_RAG.txt", b"AI_b_RAG_\xff.txt", b"AI_c_RAG.txt",
+    ]
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from prefix_client import printable, request
+from prefix_daemon import Coalescer, RenameServer
+
+CLIENT = Path(__file__).resolve().parents[1] / "prefix_client.py"
+BAD = os.fsdecode(b"bad_RAG_\xff.txt")
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "getuid"), reason="sockets Unix")
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    sock = str(tmp_path / "d.sock")
+    coalescer = Coalescer(window_s=0.0, max_batch=10, dir_handles=4)
+    server = RenameServer(sock, coalescer)
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    yield sock
+    server.shutdown()
+    server.server_close()
+    coalescer.close()
+
+
+def test_printable():
+    assert printable("ok") == "ok"
+    assert printable("é") == "é"
+    assert printable(BAD) == "bad_RAG_\\xff.txt"
+
+
+def test_daemon_roundtrips_non_utf8_names(daemon, tmp_path):
+    (tmp_path / BAD).write_text("x")
+    resp = request(daemon, {"op": "rename", "paths": [str(tmp_path / BAD)], "pattern": "RAG", "prefix": "AI_"})
+    assert resp["ok"]
+    (r,) = resp["results"]
+    assert r["status"] == "RENAMED"
+    assert r["path"] == str(tmp_path / BAD)  # chemin d'origine, octet pour octet
+    assert os.fsencode(r["new_name"]) == b"AI_bad_RAG_\xff.txt"
+    assert (tmp_path / ("AI_" + BAD)).exists()
+
+
+def test_client_cli_with_non_utf8_argument(daemon, tmp_path):
+    (tmp_path / BAD).write_text("x")
+    res = subprocess.run(
+        [sys.executable, str(CLIENT), "--socket", daemon, "--no-fallback", os.fsencode(tmp_path / BAD)],
+        capture_output=True, env={**os.environ, "PYTHONIOENCODING": "utf-8"},
+    )
+    assert res.returncode == 0, res.stdout + res.stderr
+    assert b"AI_bad_RAG_\\xff.txt" in res.stdout
+    assert (tmp_path / ("AI_" + BAD)).exists()
@@ -0,0 +1,64 @@
+import io
+import time
+
+import pytest
+
+from prefix_console import Console, format_duration, format_progress
+
+
+class SlowTTY(io.StringIO):
+    """Flux qui se dit terminal et rend la main aux autres threads à chaque écriture."""
+
+    def isatty(self):
+        return True
+
+    def write(self, s):
+        time.sleep(0)
+        return super().write(s)
+
+
+def test_format_progress():
+    assert format_duration(3725) == "1:02:05"
+    assert format_duration(65) == "01:05"
+    line = format_progress(50, 100, 10.0, "| renommés 50")
+    assert "50%" in line and "50/100" in line and line.endswith("| renommés 50")
+    assert format_progress(10, None, 2.0).startswith("10 fichier(s)  5 f/s")
+
+
+def test_lines_are_buffered():
+    out = io.StringIO()
+    c = Console("lines", stream=out, flush_lines=3, flush_interval=3600)
+    c.item("a")
+    c.item("b")
+    assert out.getvalue() == ""
+    c.item("c")
+    assert out.getvalue() == "a\nb\nc\n"
+    c.info("fin")
+    c.close()
+    assert out.getvalue().endswith("fin\n")
+
+
+@pytest.mark.parametrize("mode, shown", [
+    ("lines", ["[OK] a", "[ERR] b", "résumé"]),
+    ("summary", ["[ERR] b", "résumé"]),
+    ("quiet", ["[ERR] b"]),
+])
+def test_modes(mode, shown):
+    out = io.StringIO()
+    c = Console(mode, stream=out)
+    c.item("[OK] a")
+    c.item("[ERR] b", is_error=True)
+    c.info("résumé")
+    c.close()
+    assert out.getvalue().splitlines() == shown
+
+
+def test_progress_thread_loses_no_lines():
+    out, bar = SlowTTY(), SlowTTY()
+    c = Console("progress", stream=out, progress_stream=bar, flush_lines=10**9, flush_interval=3600)
+    c.start_progress(lambda: (0, None, ""), interval=0.0005)
+    n = 20000
+    for i in range(n):
+        c.info(str(i))
+    c.close()
+    assert out.getvalue().splitlines() == [str(i) for i in range(n)]
@@ -0,0 +1,65 @@
+import pytest
+
+from prefix_daemon import Coalescer, job_error
+
+
+@pytest.fixture
+def coalescer():
+    c = Coalescer(window_s=0.0, max_batch=10, dir_handles=4)
+    yield c
+    c.close()
+
+
+def rename_req(paths, **kw):
+    return {"op": "rename", "paths": paths, "pattern": "RAG", "prefix": "AI_", "collision": "skip", **kw}
+
+
+@pytest.mark.parametrize("req, error", [
+    (rename_req("/un/chemin"), "paths"),
+    (rename_req(["ok", 3]), "paths"),
+    ({"op": "rename"}, "paths"),
+    (rename_req([], dry_run="oui"), "dry_run"),
+    (rename_req([], pattern=None), "pattern"),
+])
+def test_job_error_rejects_bad_requests(req, error):
+    assert error in job_error(req)
+
+
+def test_job_error_accepts_valid_request():
+    assert job_error(rename_req(["/a", "/b"], recursive=True, dry_run=False)) is None
+
+
+def test_bad_paths_become_error_rows(coalescer, tmp_path):
+    (tmp_path / "a_RAG.txt").write_text("a")
+    missing = str(tmp_path / "absent_RAG.txt")
+    resp = coalescer.submit(rename_req([missing, "nul\0_RAG.txt", str(tmp_path)]))
+    assert resp["ok"]
+    by_status = sorted((r["status"], r["path"]) for r in resp["results"])
+    assert [s for s, _ in by_status] == ["ERROR", "ERROR", "RENAMED"]
+    assert (tmp_path / "AI_a_RAG.txt").exists()
+    assert coalescer.counters["errors"] == 2
+
+
+def test_loop_survives_failed_batch(coalescer, tmp_path, monkeypatch):
+    (tmp_path / "a_RAG.txt").write_text("a")
+    run_batch = coalescer._run_batch
+
+    def broken(batch):
+        monkeypatch.setattr(coalescer, "_run_batch", run_batch)
+        raise RuntimeError("panne")
+
+    monkeypatch.setattr(coalescer, "_run_batch", broken)
+    resp = coalescer.submit(rename_req([str(tmp_path)]))
+    assert not resp["ok"]
+    assert "panne" in resp["error"]
+
+    # Le thread du démon traite toujours les jobs suivants
+    resp = coalescer.submit(rename_req([str(tmp_path)]))
+    assert resp["ok"]
+    assert [r["status"] for r in resp["results"]] == ["RENAMED"]
+
+
+def test_invalid_rule_is_reported(coalescer):
+    resp = coalescer.submit(rename_req([], pattern="("))
+    assert not resp["ok"]
+    assert "Règle invalide" in resp["error"]
@@ -0,0 +1,56 @@
+import pytest
+
+from prefix_estimate import Interval, estimate, format_report
+from prefix_renamer import compile_rules
+
+
+def make_tree(root, depth, fanout, per_dir):
+    """Arbre régulier : per_dir fichiers par dossier, dont un sur deux contient RAG."""
+    for i in range(per_dir):
+        (root / (f"f{i}_RAG.txt" if i % 2 == 0 else f"f{i}.txt")).write_text("x")
+    if depth:
+        for j in range(fanout):
+            sub = root / f"d{j}"
+            sub.mkdir()
+            make_tree(sub, depth - 1, fanout, per_dir)
+
+
+def test_small_tree_counts_are_exact(tmp_path):
+    make_tree(tmp_path, depth=2, fanout=2, per_dir=4)
+    (tmp_path / "AI_f0_RAG.txt").write_text("x")  # nom cible déjà pris à la racine
+    res = estimate(tmp_path, compile_rules("RAG", "AI_"), seconds=5, seed=1)
+    assert res.exact
+    assert res.dirs_listed == 7
+    assert res.metrics["dirs"] == Interval(7, 7, 7)
+    assert res.metrics["files"].value == 7 * 4 + 1
+    assert res.metrics["matched"].value == 7 * 2
+    assert res.metrics["collisions"].value == 1
+
+
+def test_non_recursive_lists_root_only(tmp_path):
+    make_tree(tmp_path, depth=1, fanout=3, per_dir=2)
+    res = estimate(tmp_path, compile_rules("RAG", "AI_"), recursive=False, seed=1)
+    assert res.exact and res.probes == 1 and res.dirs_listed == 1
+    assert res.metrics["files"].value == 2
+
+
+def test_sampled_estimate_is_exact_on_regular_tree(tmp_path):
+    # Arbre régulier : chaque descente donne le total exact, l'intervalle est nul
+    make_tree(tmp_path, depth=3, fanout=3, per_dir=2)
+    res = estimate(tmp_path, compile_rules("RAG", "AI_"), max_probes=3, seed=7)
+    assert not res.exact
+    assert res.probes == 3
+    files = res.metrics["files"]
+    assert files.value == pytest.approx(40 * 2)
+    assert files.low == pytest.approx(files.high)
+    lines = format_report(res)
+    assert lines[0] == "=== Estimation (échantillonnage) ==="
+    assert any(line.startswith("Fichiers") and "~80" in line for line in lines)
+
+
+def test_single_probe_interval_is_unbounded(tmp_path):
+    make_tree(tmp_path, depth=2, fanout=2, per_dir=1)
+    res = estimate(tmp_path, compile_rules("RAG", "AI_"), max_probes=1, seed=3)
+    assert not res.exact
+    assert res.metrics["files"].high == float("inf")
+    assert any("∞" in line for line in format_report(res))
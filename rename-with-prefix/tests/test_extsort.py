@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+import prefix_extsort
+from prefix_extsort import external_sort
+
+
+@pytest.mark.parametrize("n", [0, 1, 9, 10, 11, 57])
+def test_matches_sorted_across_chunk_sizes(tmp_path, n):
+    rng = random.Random(n)
+    records = [rng.randrange(20) for _ in range(n)]
+    assert list(external_sort(records, chunk_size=10, tmp_dir=str(tmp_path))) == sorted(records)
+    assert list(tmp_path.iterdir()) == []  # runs supprimés en fin d'itération
+
+
+def test_stable_across_runs(tmp_path):
+    # Clés égales réparties sur plusieurs runs : l'ordre d'arrivée est conservé
+    records = [(i % 3, i) for i in range(40)]
+    out = list(external_sort(records, key=lambda r: r[0], chunk_size=7, tmp_dir=str(tmp_path)))
+    assert out == sorted(records, key=lambda r: r[0])
+
+
+def test_single_chunk_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.setattr(prefix_extsort, "_write_run", lambda *a: pytest.fail("run écrit"))
+    assert list(external_sort([3, 1, 2], chunk_size=10, tmp_dir=str(tmp_path))) == [1, 2, 3]
+
+
+def test_runs_removed_when_iteration_interrupted(tmp_path, monkeypatch):
+    monkeypatch.setattr(prefix_extsort, "SPILL_BLOCK", 4)
+    it = external_sort(range(100, 0, -1), chunk_size=10, tmp_dir=str(tmp_path))
+    assert next(it) == 1
+    assert len(list(tmp_path.iterdir())) == 10
+    it.close()
+    assert list(tmp_path.iterdir()) == []
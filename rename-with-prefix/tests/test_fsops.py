@@ -0,0 +1,66 @@
+import errno
+
+import pytest
+
+import prefix_fsops
+from prefix_fsops import DirHandleCache, rename_noreplace
+
+
+def test_rename_noreplace_renames(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    rename_noreplace(None, str(tmp_path), "a.txt", "AI_a.txt")
+    assert not (tmp_path / "a.txt").exists()
+    assert (tmp_path / "AI_a.txt").read_text() == "a"
+
+
+def test_rename_noreplace_never_overwrites(tmp_path):
+    (tmp_path / "a.txt").write_text("source")
+    (tmp_path / "AI_a.txt").write_text("cible")
+    with pytest.raises(FileExistsError):
+        rename_noreplace(None, str(tmp_path), "a.txt", "AI_a.txt")
+    assert (tmp_path / "a.txt").read_text() == "source"
+    assert (tmp_path / "AI_a.txt").read_text() == "cible"
+
+
+def test_rename_noreplace_with_dir_handles(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    (tmp_path / "AI_b.txt").write_text("cible")
+    with DirHandleCache(4) as dirs:
+        rename_noreplace(dirs, str(tmp_path), "a.txt", "AI_a.txt")
+        with pytest.raises(FileExistsError):
+            rename_noreplace(dirs, str(tmp_path), "b.txt", "AI_b.txt")
+    assert (tmp_path / "AI_a.txt").read_text() == "a"
+    assert (tmp_path / "AI_b.txt").read_text() == "cible"
+
+
+def test_rename_noreplace_without_renameat2(tmp_path, monkeypatch):
+    # Repli exists + rename (autres systèmes, FS sans RENAME_NOREPLACE)
+    monkeypatch.setattr(prefix_fsops, "_load_renameat2", lambda: None)
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    (tmp_path / "AI_b.txt").write_text("cible")
+    rename_noreplace(None, str(tmp_path), "a.txt", "AI_a.txt")
+    with pytest.raises(FileExistsError):
+        rename_noreplace(None, str(tmp_path), "b.txt", "AI_b.txt")
+    assert (tmp_path / "AI_a.txt").read_text() == "a"
+    assert (tmp_path / "AI_b.txt").read_text() == "cible"
+
+
+def test_rename_noreplace_missing_source(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        rename_noreplace(None, str(tmp_path), "absent.txt", "AI_absent.txt")
+
+
+def test_dry_run_probe_error_is_a_per_file_result(tmp_path, monkeypatch):
+    import prefix_renamer
+    from prefix_renamer import PlannedRename, apply
+
+    def stale(dirs, folder, name):
+        raise OSError(errno.ESTALE, "Stale file handle", name)
+
+    monkeypatch.setattr(prefix_renamer, "exists_in_dir", stale)
+    items = [PlannedRename(tmp_path / f"f{i}_RAG.txt", f"AI_f{i}_RAG.txt") for i in range(3)]
+    results = list(apply(items, dry_run=True, collision="number"))
+    assert [r.status for r in results] == ["ERROR"] * 3
+    assert "Stale" in results[0].message
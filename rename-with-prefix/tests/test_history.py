@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from prefix_history import HistoryWriter, find_ops, import_csv, open_history, trace_forward
+
+CLI = Path(__file__).resolve().parents[1] / "rename-with-prefix.py"
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "history.sqlite")
+
+
+def test_writer_batches_and_closes_run(db, tmp_path):
+    w = HistoryWriter(db, {"root": str(tmp_path), "pattern": "RAG", "prefix": "AI_"}, batch=2)
+    for i in range(5):
+        w.add(f"/d/f{i}_RAG.txt", f"/d/AI_f{i}_RAG.txt", "RENAMED", fid=(1, i))
+    assert w.count == 4  # deux lots complets, le dernier attend close()
+    w.close()
+    conn = open_history(db)
+    assert conn.execute("SELECT count(*) FROM ops").fetchone()[0] == 5
+    assert conn.execute("SELECT outcome, root FROM runs").fetchone() == ("ok", str(tmp_path))
+
+
+def test_find_and_trace_forward(db):
+    w = HistoryWriter(db, {})
+    w.add("/d/a_RAG.txt", "/d/AI_a_RAG.txt", "RENAMED", fid=(None, None))
+    w.add("/d/AI_a_RAG.txt", "/d/X_AI_a_RAG.txt", "RENAMED", fid=(None, None))
+    w.close()
+    conn = open_history(db)
+    assert len(find_ops(conn, "/d/AI_a_RAG.txt", by_inode=False)) == 2
+    assert trace_forward(conn, "/d/a_RAG.txt") == ["/d/a_RAG.txt", "/d/AI_a_RAG.txt", "/d/X_AI_a_RAG.txt"]
+
+
+def test_non_utf8_names_are_stored_as_text(db):
+    name = os.fsdecode(b"/d/bad_RAG_\xff.txt")
+    w = HistoryWriter(db, {"root": os.fsdecode(b"/d\xfe")})
+    w.add(name, os.fsdecode(b"/d/AI_bad_RAG_\xff.txt"), "RENAMED", fid=(None, None))
+    w.close()
+    conn = open_history(db)
+    assert conn.execute("SELECT old_path FROM ops").fetchone()[0] == "/d/bad_RAG_\\xff.txt"
+    assert conn.execute("SELECT root FROM runs").fetchone()[0] == "/d\\xfe"
+    assert len(find_ops(conn, name, by_inode=False)) == 1
+
+
+def test_import_csv(db, tmp_path):
+    csv_path = tmp_path / "log.csv"
+    csv_path.write_bytes(
+        b"timestamp,status,old_path,new_path,reason,error\r\n"
+        b"2024-01-02T03:04:05,RENAMED,/d/a_\xff.txt,/d/AI_a_\xff.txt,match,\r\n"
+    )
+    conn = open_history(db)
+    assert import_csv(conn, str(csv_path)) == 1
+    assert conn.execute("SELECT old_path, status FROM ops").fetchone() == ("/d/a_\\xff.txt", "RENAMED")
+
+
+def test_cli_history_with_non_utf8_name(db, tmp_path):
+    root = tmp_path / "racine"
+    root.mkdir()
+    (root / os.fsdecode(b"bad_RAG_\xff.txt")).write_text("x")
+    subprocess.run(
+        [sys.executable, str(CLI), "--path", str(root), "--yes", "--summary-only", "--history", db],
+        capture_output=True, check=True,
+    )
+    conn = open_history(db)
+    (new_path, dev, ino), = conn.execute("SELECT new_path, dev, ino FROM ops").fetchall()
+    assert new_path.endswith("AI_bad_RAG_\\xff.txt")
+    assert ino == os.stat(root / os.fsdecode(b"AI_bad_RAG_\xff.txt")).st_ino
@@ -0,0 +1,52 @@
+import pytest
+
+from prefix_pathmatch import PathFilter, split_components
+
+
+def test_split_components_anchored():
+    assert split_components(r"^[^/]+/clients/[^/]+/RAG/") == (["[^/]+", "clients", "[^/]+", "RAG", ""], 5, False)
+    assert split_components(r"^a/b\.txt$") == (["a", r"b\.txt$"], 2, True)
+
+
+def test_split_components_not_prunable():
+    assert split_components("clients/RAG") is None  # pas ancrée
+    assert split_components("^a/b|c") is None       # alternative de premier niveau
+    assert split_components("^(a|b)/c") == (["(a|b)", "c"], 2, False)
+
+
+@pytest.mark.parametrize("pattern, n_safe", [
+    (r"^a/b/c/d", 4),
+    (r"^.*/RAG/", 0),
+    (r"^a/\S+/RAG/", 1),
+    (r"^a/[^x]+/RAG/", 1),         # classe niée sans "/"
+    (r"^a/[!-0]/RAG/", 1),         # plage qui couvre "/"
+    (r"^a/(b/c)/d", 1),            # "/" dans un groupe
+    (r"^a/(?=b)c/d", 1),           # lookaround
+    (r"^a/b\x2fc/d", 1),           # "/" écrit autrement
+    (r"^a/b\N{SOLIDUS}c/d", 1),
+    (r"^a/b\057c/d", 1),
+    (r"^a/[\x2f]/d", 1),
+    (r"^a/[^/\W]+/d", 1),
+    (r"^a//?b/c", 1),              # "/" quantifié
+    (r"^a/\w+\-\d/c", 3),
+])
+def test_split_components_safe_prefix(pattern, n_safe):
+    assert split_components(pattern)[1] == n_safe
+
+
+def test_path_filter_prunes_only_impossible_dirs():
+    f = PathFilter(r"^clients/[^/]+/RAG/")
+    assert f.prunes
+    assert f.keep_dir("clients")
+    assert f.keep_dir("clients/acme/RAG")
+    assert not f.keep_dir("archives")
+    assert not f.keep_dir("clients/acme/autre")
+    assert f.pruned == 2
+    assert f.matches("clients/acme/RAG/note.pdf")
+    assert not f.matches("clients/acme/note.pdf")
+
+
+def test_path_filter_depth_limit():
+    f = PathFilter(r"^[^/]+/[^/]+\.pdf$")
+    assert f.keep_dir("a")
+    assert not f.keep_dir("a/b")
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from prefix_plan import PlanReader, PlanWriter, is_unchanged
+
+
+def test_plan_writer_reader(tmp_path):
+    f = tmp_path / "a_RAG.txt"
+    f.write_text("a")
+    path = tmp_path / "plan.jsonl"
+    with PlanWriter(path, {"collision": "number"}) as w:
+        w.add(f, "AI_a_RAG.txt")
+    with PlanReader(path) as reader:
+        assert reader.meta["collision"] == "number"
+        entries = list(reader)
+    assert [(e.path, e.new_name) for e in entries] == [(f, "AI_a_RAG.txt")]
+    assert reader.partial is None
+
+
+def test_plan_writer_marks_interrupted(tmp_path):
+    f = tmp_path / "a_RAG.txt"
+    f.write_text("a")
+    path = tmp_path / "plan.jsonl"
+    try:
+        with PlanWriter(path, {}) as w:
+            w.add(f, "AI_a_RAG.txt")
+            raise RuntimeError("arrêt")
+    except RuntimeError:
+        pass
+    with PlanReader(path) as reader:
+        assert len(list(reader)) == 1
+    assert reader.partial == {"partial": True, "reason": "interrupted", "files": 1}
+
+
+def test_plan_roundtrips_non_utf8_names(tmp_path):
+    f = tmp_path / os.fsdecode(b"bad_RAG_\xff.txt")
+    f.write_text("a")
+    path = tmp_path / "plan.jsonl.gz"
+    with PlanWriter(path, {"root": str(tmp_path)}) as w:
+        w.add(f, "AI_" + f.name)
+    with PlanReader(path) as reader:
+        (entry,) = list(reader)
+    assert entry.path == f
+    assert os.fsencode(entry.new_name) == b"AI_bad_RAG_\xff.txt"
+    assert is_unchanged(entry.path, entry.fp)
+
+
+def test_plan_reader_reports_truncated_line(tmp_path):
+    f = tmp_path / "a_RAG.txt"
+    f.write_text("a")
+    path = tmp_path / "plan.jsonl"
+    with PlanWriter(path, {}) as w:
+        w.add(f, "AI_a_RAG.txt")
+    path.write_bytes(path.read_bytes()[:-10])
+    with PlanReader(path) as reader, pytest.raises(ValueError, match="ligne 3"):
+        list(reader)
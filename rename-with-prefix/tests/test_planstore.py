@@ -0,0 +1,61 @@
+import os
+
+from prefix_plan import PlanStore, Reason, RenameItem
+
+
+def item(folder, name, reason, new_name=None, prefix="AI_"):
+    if new_name is None:
+        new_name = prefix + name if reason in ("match", "match_overwrite") else name
+    return RenameItem(os.path.join(folder, name), name, new_name, reason, Reason[reason.upper()].will_rename)
+
+
+def test_planstore_roundtrip():
+    items = [
+        item("/d1", "a_RAG.txt", "match"),
+        item("/d1", "b_RAG.txt", "match_numbered", "AI_b_RAG (1).txt"),
+        item("/d2", "AI_c.txt", "already_prefixed"),
+        item("/d2", "d.txt", "no_match"),
+        item("/d2", "é_RAG.txt", "collision_skip", "AI_é_RAG.txt"),
+    ]
+    store = PlanStore("AI_")
+    store.extend(items)
+    assert len(store) == store.total == 5
+    assert store.dirs == ["/d1", "/d2"]
+    assert list(store) == items
+    assert store[-1] == items[-1]
+    assert store.will_count == 2
+    assert [it.old_name for it in store.iter_will_rename()] == ["a_RAG.txt", "b_RAG.txt"]
+
+
+def test_planstore_drops_unmatched():
+    store = PlanStore("AI_", keep_unmatched=False)
+    store.append(item("/d", "x.txt", "no_match"))
+    store.append(item("/d", "x_RAG.txt", "match"))
+    assert len(store) == 1
+    assert store.dropped == 1
+    assert store.total == 2
+
+
+def test_planstore_preview_order():
+    store = PlanStore("AI_")
+    store.extend([
+        item("/d", "z.txt", "no_match"),
+        item("/d", "B_RAG.txt", "match"),
+        item("/d", "a_RAG.txt", "match"),
+    ])
+    # Raison d'abord (à renommer en tête), puis nom sans casse
+    assert [it.old_name for it in store.preview(10)] == ["a_RAG.txt", "B_RAG.txt", "z.txt"]
+    assert [it.old_name for it in store.preview(1)] == ["a_RAG.txt"]
+    assert list(store.iter_sorted(chunk_size=1)) == store.preview(10)
+
+
+def test_planstore_batches():
+    sender = PlanStore("AI_")
+    receiver = PlanStore("AI_")
+    sender.extend([item("/d1", "a_RAG.txt", "match"), item("/d1", "b_RAG.txt", "match_numbered", "AI_b_RAG (2).txt")])
+    receiver.extend_batch(sender.take_batch())
+    sender.extend([item("/d2", "c_RAG.txt", "match"), item("/d1", "d.txt", "no_match")])
+    receiver.extend_batch(sender.take_batch())
+    assert len(sender) == 0
+    assert [it.old_path for it in receiver] == ["/d1/a_RAG.txt", "/d1/b_RAG.txt", "/d2/c_RAG.txt", "/d1/d.txt"]
+    assert receiver[1].new_name == "AI_b_RAG (2).txt"
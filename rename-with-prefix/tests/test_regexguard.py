@@ -0,0 +1,66 @@
+import importlib.util
+import re
+import signal
+import sys
+
+import pytest
+
+import prefix_regexguard
+from prefix_regexguard import RegexSkipped, RegexTimeout, TimedPattern, analyze, timeout_supported
+
+needs_timer = pytest.mark.skipif(not timeout_supported(), reason="pas de setitimer")
+CATASTROPHIC = re.compile(r"^(a+)+$")
+SLOW_NAME = "a" * 40 + "b"
+
+
+@pytest.mark.parametrize("pattern", [r"(a+)+", r"(\w+\s?)*", r"(\w|\d\d)+"])
+def test_analyze_flags_exponential_forms(pattern):
+    assert analyze(pattern)
+
+
+@pytest.mark.parametrize("pattern", [r"RAG", r"^\d+_RAG\.pdf$", r"(a|b)+", r"(?>a+)+", r"(a|)+"])
+def test_analyze_accepts_safe_forms(pattern):
+    assert analyze(pattern) == []
+
+
+def test_analyze_raises_on_invalid_pattern():
+    with pytest.raises(re.error):
+        analyze("(")
+
+
+def test_analyze_without_re_internals(monkeypatch, tmp_path):
+    # Internes de re introuvables : le module se charge quand même, sans analyse statique
+    for name in ("re._parser", "re._constants", "sre_parse", "sre_constants"):
+        monkeypatch.setitem(sys.modules, name, None)
+    monkeypatch.delattr(re, "_parser")
+    monkeypatch.delattr(re, "_constants")
+    spec = importlib.util.spec_from_file_location("regexguard_copy", prefix_regexguard.__file__)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    assert mod.analyze(r"(a+)+") == []
+    with pytest.raises(re.error):
+        mod.analyze("(")
+
+
+@needs_timer
+def test_timed_pattern_skip_mode():
+    with TimedPattern(CATASTROPHIC, 0.02, "skip") as rx:
+        assert rx.search("aaa")
+        with pytest.raises(RegexSkipped):
+            rx.search(SLOW_NAME)
+        assert rx.timeouts == [SLOW_NAME]
+        assert rx.search("aaaa")  # la minuterie reste armée pour les noms suivants
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
+
+@needs_timer
+def test_timed_pattern_fail_mode_restores_handler():
+    before = signal.getsignal(signal.SIGALRM)
+    rx = TimedPattern(CATASTROPHIC, 0.02)
+    try:
+        with pytest.raises(RegexTimeout) as info:
+            rx.search(SLOW_NAME)
+        assert not isinstance(info.value, RegexSkipped)
+    finally:
+        rx.close()
+    assert signal.getsignal(signal.SIGALRM) is before
@@ -0,0 +1,51 @@
+from prefix_renamer import PlannedRename, apply, apply_one, compile_rules, matcher, plan, walk_files
+
+
+def make_files(root, names):
+    for name in names:
+        (root / name).write_text(name)
+
+
+def test_plan_and_apply(tmp_path):
+    make_files(tmp_path, ["a_RAG.txt", "b_RAG.txt", "AI_b_RAG.txt", "c.txt", "AI_d_RAG.txt"])
+    rules = compile_rules("RAG", "AI_")
+    results = {r.path.name: r for r in apply(plan(tmp_path, rules), collision="number")}
+    assert set(results) == {"a_RAG.txt", "b_RAG.txt"}
+    assert results["a_RAG.txt"].status == "RENAMED"
+    assert results["b_RAG.txt"].new_name == "AI_b_RAG (1).txt"
+    assert (tmp_path / "AI_b_RAG (1).txt").read_text() == "b_RAG.txt"
+
+
+def test_apply_held_items(tmp_path):
+    make_files(tmp_path, ["a_RAG.txt", "b.txt"])
+    items = [
+        PlannedRename(tmp_path / "b.txt", None, "no_match"),
+        PlannedRename(tmp_path / "a_RAG.txt", "AI_a_RAG.txt", "stale", "[SKIP] Modifié depuis le plan"),
+        PlannedRename(tmp_path / "a_RAG.txt", "a_RAG.txt", "regex_timeout", "[ERR] Regex trop lente"),
+    ]
+    results = list(apply(items, collision="skip"))
+    assert [(r.status, r.reason) for r in results] == [
+        ("NOMATCH", "no_match"), ("SKIP", "stale"), ("ERROR", "regex_timeout"),
+    ]
+    assert (tmp_path / "a_RAG.txt").exists()  # rien n'est renommé
+
+
+def test_plan_unmatched_hook(tmp_path):
+    make_files(tmp_path, ["a_RAG.txt", "b.txt", "c.txt"])
+    seen = []
+    items = list(plan(tmp_path, compile_rules("RAG", "AI_"), on_unmatched=seen.append))
+    assert [it.path.name for it in items] == ["a_RAG.txt"]
+    assert sorted(p.name for p in seen) == ["b.txt", "c.txt"]
+
+
+def test_walk_and_match_as_pipeline_stages(tmp_path):
+    from prefix_pipeline import run_pipeline
+
+    make_files(tmp_path, ["a_RAG.txt", "b.txt", "c_RAG.txt"])
+    rules = compile_rules("RAG", "AI_")
+    seen = []
+    match = matcher(tmp_path, rules, on_unmatched=seen.append)
+    results = []
+    run_pipeline(walk_files(tmp_path), [match, apply_one], results.append, batch_size=1)
+    assert sorted((r.path.name, r.status) for r in results) == [("a_RAG.txt", "RENAMED"), ("c_RAG.txt", "RENAMED")]
+    assert [p.name for p in seen] == ["b.txt"]
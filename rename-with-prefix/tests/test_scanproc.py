@@ -0,0 +1,46 @@
+import time
+
+from prefix_scanproc import ScanProcess, ScanRequest
+
+
+def scan_request(folder, **kw):
+    fields = dict(
+        folder=str(folder), files=[], pattern="RAG", ignore_case=False, word_only=False, prefix="AI_",
+        recursive=True, skip_prefixed=True, collision_mode="skip", keep_unmatched=False,
+    )
+    fields.update(kw)
+    return ScanRequest(**fields)
+
+
+def wait(proc, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not proc.poll():
+        assert time.monotonic() < deadline, "scan trop long"
+        time.sleep(0.01)
+    return proc
+
+
+def test_scan_in_child_process(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ("a_RAG.txt", "b.txt", "sub/c_RAG.txt", "AI_d_RAG.txt"):
+        (tmp_path / name).write_text("x")
+    proc = wait(ScanProcess(scan_request(tmp_path)))
+    assert proc.error is None
+    assert proc.items.total == 4
+    assert sorted(it.old_name for it in proc.items.iter_will_rename()) == ["a_RAG.txt", "c_RAG.txt"]
+    assert proc.result["partial"] is None
+    assert proc.result["unreadable_dirs"] == 0
+
+
+def test_scan_budget_marks_partial(tmp_path):
+    for i in range(10):
+        (tmp_path / f"f{i}_RAG.txt").write_text("x")
+    proc = wait(ScanProcess(scan_request(tmp_path, max_files=3)))
+    assert proc.items.total == 3
+    assert proc.result["partial"]["reason"] == "max_files"
+
+
+def test_scan_error_is_reported(tmp_path):
+    proc = wait(ScanProcess(scan_request(tmp_path, pattern="(")))
+    assert proc.result is None
+    assert "error" in proc.error
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from prefix_renamer import Visited, compile_rules, plan
+from prefix_slowfs import SlowFS, SlowFSConfig
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for d in ("a", "a/b", "a/b/c", "e", "f", "g", "h", "i", "j"):
+        (tmp_path / d).mkdir(parents=True)
+        for i in range(3):
+            (tmp_path / d / f"f{i}_RAG.txt").write_text("x")
+    return tmp_path
+
+
+def test_install_restores_os_and_counts_calls(tmp_path):
+    scandir = os.scandir
+    with SlowFS(SlowFSConfig(latency_ms=1)) as fs:
+        assert os.scandir is not scandir
+        list(os.scandir(tmp_path))
+        os.stat(tmp_path)
+    assert os.scandir is scandir
+    assert fs.calls["list"] == 1 and fs.calls["meta"] == 1
+    assert fs.slept == pytest.approx(0.002)
+
+
+def test_unknown_error_is_rejected():
+    with pytest.raises(ValueError):
+        SlowFS(SlowFSConfig(errors=("ENOPE",)))
+
+
+@pytest.mark.parametrize("ordered", [False, True])
+def test_walk_skips_unreadable_subdirs(tree, ordered):
+    # Graine 42 : le listage de la racine passe, plusieurs sous-dossiers échouent en ESTALE
+    visited = Visited()
+    cfg = SlowFSConfig(error_rate=0.3, error_ops=("list",), errors=("ESTALE",))
+    with SlowFS(cfg) as fs:
+        items = list(plan(tree, compile_rules("RAG", "AI_"), recursive=True, visited=visited, ordered=ordered))
+    assert fs.injected_errors["list"] > 0
+    assert visited.unreadable_dirs == fs.injected_errors["list"]
+    assert 0 < len(items) < 30
+
+
+def test_unreadable_root_still_raises(tree):
+    with SlowFS(SlowFSConfig(error_rate=1.0, error_ops=("list",), errors=("EIO",))):
+        with pytest.raises(OSError):
+            list(plan(tree, compile_rules("RAG", "AI_"), recursive=True))
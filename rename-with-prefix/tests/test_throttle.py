@@ -0,0 +1,65 @@
+import pytest
+
+import prefix_throttle
+from prefix_perf import PhaseStats
+from prefix_throttle import NO_LIMIT, TokenBucket, make_bucket
+
+
+class FakeClock:
+    """Horloge figée : sleep() la fait avancer, sans attendre réellement."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = FakeClock()
+    monkeypatch.setattr(prefix_throttle, "monotonic", c.monotonic)
+    monkeypatch.setattr(prefix_throttle, "perf_counter", c.monotonic)
+    monkeypatch.setattr(prefix_throttle, "sleep", c.sleep)
+    return c
+
+
+@pytest.mark.parametrize("rate", [None, 0, -5])
+def test_make_bucket_without_rate_is_no_limit(rate):
+    assert make_bucket(rate) is NO_LIMIT
+    NO_LIMIT.acquire()
+    assert NO_LIMIT.throttled_seconds == 0.0
+
+
+def test_invalid_rate_rejected():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_burst_passes_then_waits_at_rate(clock):
+    stats = PhaseStats()
+    bucket = TokenBucket(10, stats=stats, phase="throttle_list")
+    for _ in range(10):  # rafale par défaut : une seconde de débit
+        bucket.acquire()
+    assert clock.slept == []
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.slept == pytest.approx([0.1] * 5)
+    assert bucket.waits == 5
+    assert bucket.throttled_seconds == pytest.approx(0.5)
+    assert clock.now == pytest.approx(0.5)  # 15 opérations en 0,5 s : 10 de rafale + 5 au débit
+
+
+def test_tokens_refill_with_idle_time_up_to_burst(clock):
+    bucket = TokenBucket(4, burst=2)
+    bucket.acquire(2)
+    clock.now += 100  # longue pause : le seau ne dépasse pas sa rafale
+    bucket.acquire(2)
+    assert clock.slept == []
+    bucket.acquire()
+    assert clock.slept == pytest.approx([0.25])